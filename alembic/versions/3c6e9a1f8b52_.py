@@ -0,0 +1,26 @@
+"""order replies by (parent_comment_id, created_at, id) for comment trees
+
+Revision ID: 3c6e9a1f8b52
+Revises: 5d8b2f0e7c93
+Create Date: 2026-10-18 17:41:05.214378
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c6e9a1f8b52'
+down_revision = '5d8b2f0e7c93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_comment_parent_created', 'comment', ['parent_comment_id', 'created_at', 'id'], unique=False)
+    op.drop_index('ix_comment_parent_comment_id', table_name='comment')
+
+
+def downgrade() -> None:
+    op.create_index('ix_comment_parent_comment_id', 'comment', ['parent_comment_id'], unique=False)
+    op.drop_index('ix_comment_parent_created', table_name='comment')
@@ -0,0 +1,27 @@
+"""add post.search_vector for full-text search
+
+Revision ID: 3f9c2d1a7b54
+Revises: 6106860260f9
+Create Date: 2026-10-18 09:12:40.118302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2d1a7b54'
+down_revision = '6106860260f9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 기존 row 도 ALTER TABLE 시점에 계산된다 (table rewrite)
+    op.add_column('post', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed("setweight(to_tsvector('simple', coalesce(title, '')), 'A') || setweight(to_tsvector('simple', coalesce(content, '')), 'B')", persisted=True), nullable=True))
+    op.create_index('ix_post_search_vector', 'post', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_post_search_vector', table_name='post', postgresql_using='gin')
+    op.drop_column('post', 'search_vector')
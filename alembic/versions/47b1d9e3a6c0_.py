@@ -0,0 +1,33 @@
+"""composite indexes for board / comment listings and likes by user
+
+Revision ID: 47b1d9e3a6c0
+Revises: e2a6f4c81b39
+Create Date: 2026-10-18 12:05:16.294471
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '47b1d9e3a6c0'
+down_revision = 'e2a6f4c81b39'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_post_board_created', 'post', ['board_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_comment_post_created', 'comment', ['post_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_like_user_post', 'like', ['user_id', 'post_id'], unique=False)
+    # 새 index 의 첫 컬럼과 같아서 필요 없어진 단일 컬럼 index
+    op.drop_index('ix_post_board_id', table_name='post')
+    op.drop_index('ix_comment_post_id', table_name='comment')
+
+
+def downgrade() -> None:
+    op.create_index('ix_comment_post_id', 'comment', ['post_id'], unique=False)
+    op.create_index('ix_post_board_id', 'post', ['board_id'], unique=False)
+    op.drop_index('ix_like_user_post', table_name='like')
+    op.drop_index('ix_comment_post_created', table_name='comment')
+    op.drop_index('ix_post_board_created', table_name='post')
@@ -0,0 +1,38 @@
+"""add hashtag_trend hourly rollup for trending hashtags
+
+Revision ID: 5d8b2f0e7c93
+Revises: 9a3e5c7f1d24
+Create Date: 2026-10-18 15:02:18.731640
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d8b2f0e7c93'
+down_revision = '9a3e5c7f1d24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('hashtag_trend',
+    sa.Column('bucket', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('hashtag_name', sa.String(), nullable=False),
+    sa.Column('post_cnt', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.ForeignKeyConstraint(['hashtag_name'], ['hashtag.name'], ),
+    sa.PrimaryKeyConstraint('bucket', 'hashtag_name')
+    )
+    # backfill (link 는 9a3e5c7f1d24 에서 채워짐)
+    op.execute(
+        "INSERT INTO hashtag_trend (hashtag_name, bucket, post_cnt) "
+        "SELECT hashtag_name, date_trunc('hour', created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC', count(*) "
+        "FROM connect_post_hashtag GROUP BY 1, 2"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('hashtag_trend')
@@ -0,0 +1,36 @@
+"""add comment.path (materialized path) for thread ordering
+
+Revision ID: 7e2b4d9c0a16
+Revises: 3c6e9a1f8b52
+Create Date: 2026-10-18 18:26:47.905113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e2b4d9c0a16'
+down_revision = '3c6e9a1f8b52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('comment', sa.Column('path', sa.String(collation='C'), nullable=True))
+    # backfill: 최상위 댓글부터 id 를 8 자리 hex 로 이어 붙인다
+    op.execute(
+        "WITH RECURSIVE tree (id, path) AS ("
+        " SELECT id, lpad(to_hex(id), 8, '0') FROM comment WHERE parent_comment_id IS NULL"
+        " UNION ALL"
+        " SELECT comment.id, tree.path || lpad(to_hex(comment.id), 8, '0')"
+        " FROM comment JOIN tree ON comment.parent_comment_id = tree.id"
+        ") UPDATE comment SET path = tree.path FROM tree WHERE comment.id = tree.id"
+    )
+    op.alter_column('comment', 'path', nullable=False)
+    op.create_index('ix_comment_post_path', 'comment', ['post_id', 'path'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_comment_post_path', table_name='comment')
+    op.drop_column('comment', 'path')
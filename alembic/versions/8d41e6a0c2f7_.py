@@ -0,0 +1,37 @@
+"""enable pg_trgm and add trigram indexes for the ILIKE filters
+
+Revision ID: 8d41e6a0c2f7
+Revises: 3f9c2d1a7b54
+Create Date: 2026-10-18 10:03:51.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41e6a0c2f7'
+down_revision = '3f9c2d1a7b54'
+branch_labels = None
+depends_on = None
+
+# (index name, table, column)
+TRGM_INDEXES = [
+    ('ix_board_title_trgm', 'board', 'title'),
+    ('ix_post_title_trgm', 'post', 'title'),
+    ('ix_user_email_trgm', 'user', 'email'),
+    ('ix_comment_content_trgm', 'comment', 'content'),
+    ('ix_hashtag_name_trgm', 'hashtag', 'name'),
+]
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRGM_INDEXES:
+        op.create_index(name, table, [column], unique=False, postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(TRGM_INDEXES):
+        op.drop_index(name, table_name=table, postgresql_using='gin')
+    # extension 은 다른 곳에서 쓰고 있을 수 있어서 남겨둔다
@@ -0,0 +1,43 @@
+"""hashtag -> post lookup index, cascade post deletion to hashtag links
+
+Revision ID: 9a3e5c7f1d24
+Revises: 47b1d9e3a6c0
+Create Date: 2026-10-18 14:20:41.508213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a3e5c7f1d24'
+down_revision = '47b1d9e3a6c0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_post_hashtag_name_post', 'connect_post_hashtag', ['hashtag_name', 'post_id'], unique=False)
+    op.drop_constraint('connect_post_hashtag_post_id_fkey', 'connect_post_hashtag', type_='foreignkey')
+    op.create_foreign_key('connect_post_hashtag_post_id_fkey', 'connect_post_hashtag', 'post', ['post_id'], ['id'], ondelete='CASCADE')
+    # 지금까지는 link 를 쓰지 않았으므로 기존 post 본문에서 채운다 (`app.utils.hashtag.HASHTAG_REGEX` 와 같은 pattern)
+    op.execute(
+        """
+        INSERT INTO hashtag (name)
+        SELECT DISTINCT match[1] FROM post, regexp_matches(post.content, '#([0-9a-zA-Z가-힣]+)', 'g') AS match
+        ON CONFLICT DO NOTHING
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO connect_post_hashtag (post_id, hashtag_name, created_at)
+        SELECT DISTINCT post.id, match[1], post.created_at FROM post, regexp_matches(post.content, '#([0-9a-zA-Z가-힣]+)', 'g') AS match
+        ON CONFLICT DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('connect_post_hashtag_post_id_fkey', 'connect_post_hashtag', type_='foreignkey')
+    op.create_foreign_key('connect_post_hashtag_post_id_fkey', 'connect_post_hashtag', 'post', ['post_id'], ['id'])
+    op.drop_index('ix_post_hashtag_name_post', table_name='connect_post_hashtag')
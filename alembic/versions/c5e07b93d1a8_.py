@@ -0,0 +1,30 @@
+"""denormalize post.like_cnt and backfill it from like
+
+Revision ID: c5e07b93d1a8
+Revises: 8d41e6a0c2f7
+Create Date: 2026-10-18 10:41:07.553190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e07b93d1a8'
+down_revision = '8d41e6a0c2f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('post', sa.Column('like_cnt', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    # backfill (like 가 있는 post 만)
+    op.execute(
+        'UPDATE post SET like_cnt = like_cnt_by_post.cnt '
+        'FROM (SELECT post_id, count(*) AS cnt FROM "like" GROUP BY post_id) AS like_cnt_by_post '
+        'WHERE post.id = like_cnt_by_post.post_id'
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('post', 'like_cnt')
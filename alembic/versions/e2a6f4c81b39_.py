@@ -0,0 +1,46 @@
+"""add post_score for popularity / hot sorting
+
+Revision ID: e2a6f4c81b39
+Revises: c5e07b93d1a8
+Create Date: 2026-10-18 11:27:33.870214
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a6f4c81b39'
+down_revision = 'c5e07b93d1a8'
+branch_labels = None
+depends_on = None
+
+HOT_DECAY_SECONDS = 45000
+
+
+def upgrade() -> None:
+    op.create_table('post_score',
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('board_id', sa.Integer(), nullable=False),
+    sa.Column('popularity', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('hot', sa.Float(), server_default=sa.text(f'(extract(epoch from CURRENT_TIMESTAMP) / {HOT_DECAY_SECONDS})'), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+    sa.ForeignKeyConstraint(['board_id'], ['board.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['post_id'], ['post.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('post_id')
+    )
+    # backfill (like_cnt 는 c5e07b93d1a8 에서 채워짐), index 는 채운 뒤에 만든다
+    op.execute(
+        'INSERT INTO post_score (post_id, board_id, popularity, hot, created_at) '
+        f'SELECT id, board_id, like_cnt, log(greatest(like_cnt, 1)) + extract(epoch from created_at) / {HOT_DECAY_SECONDS}, created_at '
+        'FROM post WHERE board_id IS NOT NULL'
+    )
+    op.create_index('ix_post_score_board_popularity', 'post_score', ['board_id', 'popularity', 'post_id'], unique=False)
+    op.create_index('ix_post_score_board_hot', 'post_score', ['board_id', 'hot', 'post_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_post_score_board_hot', table_name='post_score')
+    op.drop_index('ix_post_score_board_popularity', table_name='post_score')
+    op.drop_table('post_score')
@@ -1,11 +1,10 @@
 import functools
 import logging
 
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 
-from app.utils.ctx import Context, bind_context, create_app_ctx
+from app.utils.ctx import Context, ContextMiddleware, create_app_ctx
 
 from .apis import ALL_ROUTERS
 from .settings import AppSettings
@@ -46,20 +45,18 @@ async def _web_app_startup(app: FastAPI, app_settings: AppSettings) -> None:
         )
         logger.error("`DEBUG_ALLOW_CORS_ALL_ORIGIN` is on!")
 
-    async def _ctx_middleware(
-        request: Request, call_next: RequestResponseEndpoint  
-    ) -> Response:
-        async with bind_context(app_ctx):  # 3
-            response = await call_next(request)  # 6
-        return response
-
-    app.add_middleware(BaseHTTPMiddleware, dispatch=_ctx_middleware)  # 2
+    app.add_middleware(ContextMiddleware, app_ctx=app_ctx)  # 2
 
 
 async def _web_app_shutdown(app: FastAPI) -> None:
     app_ctx: Context = app.extra["_app_ctx"]
 
     try:
-        await app_ctx.db.engine.dispose()
+        await app_ctx.db.dispose()
+    except Exception:
+        logger.warning("Failed dispose DB engine", exc_info=True)
+
+    try:
+        await app_ctx.cache.close()
     except Exception:
-        logger.warning("Failed dispose DB engine", exc_info=True)
\ No newline at end of file
+        logger.warning("Failed close cache", exc_info=True)
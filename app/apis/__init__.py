@@ -2,6 +2,7 @@ from .auth import router as auth_router
 from .board import router as board_router
 from .comment import router as comment_router
 from .hashtag import router as hashtag_router
+from .internal import router as internal_router
 from .post import router as post_router
 from .user import router as user_router
 
@@ -12,6 +13,7 @@ ALL_ROUTERS = [
     board_router,
     comment_router,
     hashtag_router,
+    internal_router,
     post_router,
     user_router,
 ]
@@ -1,15 +1,22 @@
 import datetime
-from typing import Literal
+import operator
+import re
+from typing import Iterable, Literal
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.sql import expression as sql_exp
-from sqlalchemy.sql import func as sql_func
 from starlette.status import HTTP_403_FORBIDDEN, HTTP_404_NOT_FOUND, HTTP_409_CONFLICT
 
 from app.database import models as m
 from app.utils.auth import resolve_access_token, validate_user_role
+from app.utils.board_directory import BOARD_ENTRY_COLUMNS, BoardEntry
 from app.utils.ctx import Context
+from app.utils.hashtag import remove_post_hashtags
+from app.utils.http_cache import (etag_matches, json_response, make_etag, model_response,
+                                  not_modified)
+from app.utils.pagination import CountMode, slice_page
 
 router = APIRouter(prefix="/boards", tags=["boards"])
 
@@ -32,11 +39,13 @@ class GetBoardResponse(BaseModel):
     """
 
 
-@router.get("/{board_id}")
-async def get_board(board_id: int):
-    board: m.Board = await Context.current.db.session.scalar(
-        sql_exp.select(m.Board).where(m.Board.id == board_id)
-    )
+def _board_etag(board_id: int, updated_at: datetime.datetime) -> str:
+    return make_etag("board", board_id, updated_at.isoformat())
+
+
+@router.get("/{board_id}", response_model=GetBoardResponse)
+async def get_board(board_id: int, request: Request):
+    board = await Context.current.boards.get(board_id)
 
     if board is None:
         raise HTTPException(
@@ -44,7 +53,13 @@ async def get_board(board_id: int):
             detail=f"Board ID as {board_id} is not found.",
         )
 
-    return GetBoardResponse.from_orm(board)
+    etag = _board_etag(board.id, board.updated_at)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    return json_response(
+        request, GetBoardResponse.from_orm(board).json().encode("utf-8"), etag
+    )
 
 
 class SearchBoardRequest(BaseModel):
@@ -59,46 +74,68 @@ class SearchBoardRequest(BaseModel):
     # pagination
     offset: int = 0
     count: int = 20
+    count_mode: CountMode = "exact"
 
 
 class SearchBoardResponse(BaseModel):
     boards: list[GetBoardResponse]
-    count: int  # total number of boards (not saved to db)
-
-
-@router.post("/search")
-async def search_board(q: SearchBoardRequest):
-    board_query = sql_exp.select(m.Board)
+    count: int | None  # total number of boards (not saved to db)
+    has_more: bool | None
+
+
+def _ilike_regex(pattern: str) -> re.Pattern[str]:
+    """SQL `ILIKE` pattern (`%`, `_`, `\\` escape) 과 같게 맞는 정규식"""
+    regex = []
+    chars = iter(pattern)
+    for char in chars:
+        if char == "%":
+            regex.append(".*")
+        elif char == "_":
+            regex.append(".")
+        elif char == "\\":
+            regex.append(re.escape(next(chars, "\\")))
+        else:
+            regex.append(re.escape(char))
+    return re.compile("".join(regex), re.IGNORECASE | re.DOTALL)
+
+
+# board snapshot 을 메모리에서 거르고 정렬한다 (DB 조회 없음)
+@router.post("/search", response_model=SearchBoardResponse)
+async def search_board(q: SearchBoardRequest, request: Request):
+    boards: Iterable[BoardEntry] = (await Context.current.boards.snapshot()).boards
 
     if q.written_user_id is not None:
-        board_query = board_query.where(m.Board.written_user_id == q.written_user_id)
+        boards = (
+            board for board in boards if board.written_user_id == q.written_user_id
+        )
     if q.title is not None:
-        board_query = board_query.where(m.Board.title.ilike(q.title))
-
-    board_cnt: int = await Context.current.db.session.scalar(
-        sql_exp.select(sql_func.count()).select_from(board_query.subquery())
+        title_regex = _ilike_regex(q.title)
+        boards = (board for board in boards if title_regex.fullmatch(board.title))
+
+    # snapshot 은 id 순이고 sort 는 stable 하므로, 같은 값끼리는 id 순
+    boards = sorted(
+        boards,
+        key=operator.attrgetter(q.sort_by),
+        reverse=q.sort_direction == "desc",
     )
 
-    board_query = board_query.order_by(
-        getattr(getattr(m.Board, q.sort_by), q.sort_direction)()
+    page = slice_page(
+        boards, count_mode=q.count_mode, offset=q.offset, limit=q.count
     )
-    if q.sort_direction == "asc":
-        board_query = board_query.order_by(getattr(m.Board, q.sort_by).asc())
-    else:  # "desc"
-        board_query = board_query.order_by(getattr(m.Board, q.sort_by).desc())
 
-    board_query = board_query.offset(q.offset).limit(q.count)
-    boards = (await Context.current.db.session.scalars(board_query)).all()
-
-    if board_cnt == 0:
+    if not page.found:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND,
             detail=f"Not found any board matching your request.",
         )
 
-    return SearchBoardResponse(
-        boards=[GetBoardResponse.from_orm(board) for board in boards],
-        count=board_cnt,
+    return model_response(
+        request,
+        SearchBoardResponse(
+            boards=[GetBoardResponse.from_orm(board) for board in page.rows],
+            count=page.count,
+            has_more=page.has_more,
+        ),
     )
 
 
@@ -122,17 +159,29 @@ async def create_board(
         written_user_id=user_id,
     )
 
-    is_title_exist = await Context.current.db.session.scalar(
-        sql_exp.exists().where(m.Board.title == q.title).select()
-    )
-    if is_title_exist:
+    if await Context.current.boards.get_by_title(q.title) is not None:
         raise HTTPException(
             status_code=HTTP_409_CONFLICT, 
             detail="This board title already exists."
         )
 
     Context.current.db.session.add(board)
-    await Context.current.db.session.commit()
+    try:
+        await Context.current.db.session.commit()
+    except IntegrityError:  # 다른 worker 가 snapshot 을 다시 읽기 전에 만든 title
+        raise HTTPException(
+            status_code=HTTP_409_CONFLICT,
+            detail="This board title already exists.",
+        )
+    await Context.current.boards.put(
+        BoardEntry(
+            id=board.id,
+            title=board.title,
+            created_at=board.created_at,
+            updated_at=board.updated_at,
+            written_user_id=board.written_user_id,
+        )
+    )
 
     return PostBoardResponse(board_id=board.id)
 
@@ -145,11 +194,7 @@ async def update_board(
 ):
     await validate_user_role(user_id, m.UserRoleEnum.Admin)
 
-    board: m.Board | None = (
-        await Context.current.db.session.execute(
-            sql_exp.select(m.Board).where(m.Board.id == board_id)
-        )
-    ).scalar_one_or_none()
+    board = await Context.current.boards.get(board_id)
 
     if board is None:
         raise HTTPException(
@@ -163,10 +208,36 @@ async def update_board(
             detail="This is not your board. Therefore, it cannot be updated.",
         )
 
-    board.title = q.title
+    same_title_board = await Context.current.boards.get_by_title(q.title)
+    if same_title_board is not None and same_title_board.id != board_id:
+        raise HTTPException(
+            status_code=HTTP_409_CONFLICT,
+            detail="This board title already exists.",
+        )
 
-    Context.current.db.session.add(board)
-    await Context.current.db.session.commit()
+    try:
+        updated = (
+            await Context.current.db.session.execute(
+                sql_exp.update(m.Board)
+                .where(m.Board.id == board_id)
+                .values(title=q.title)
+                .returning(*BOARD_ENTRY_COLUMNS)
+            )
+        ).one_or_none()
+        await Context.current.db.session.commit()
+    except IntegrityError:
+        raise HTTPException(
+            status_code=HTTP_409_CONFLICT,
+            detail="This board title already exists.",
+        )
+
+    if updated is None:  # 다른 worker 에서 이미 삭제됨
+        await Context.current.boards.discard(board_id)
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail=f"Cannot find board with board_id as {board_id}",
+        )
+    await Context.current.boards.put(BoardEntry(*updated))
 
 
 @router.delete("/{board_id:int}")
@@ -194,5 +265,15 @@ async def delete_board(
             detail="This is not your board. Therefore, it cannot be deleted.",
         )
 
+    hashtag_usage = await remove_post_hashtags(
+        m.PostHashTag.post_id.in_(
+            sql_exp.select(m.Post.id).where(m.Post.board_id == board_id)
+        )
+    )
     await Context.current.db.session.delete(board)
-    await Context.current.db.session.commit()
\ No newline at end of file
+    await Context.current.db.session.commit()
+    Context.current.hashtags.update_usage(hashtag_usage)
+    await Context.current.boards.discard(board_id)
+    # cascade 로 지워진 post / 댓글 (board 삭제는 드물어서 통째로 비운다)
+    await Context.current.cache.delete_prefix("post:")
+    await Context.current.cache.delete_prefix("comment:")
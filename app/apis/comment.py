@@ -1,15 +1,22 @@
 import datetime
 from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from pydantic import BaseModel, Field
+from sqlalchemy import BigInteger, Integer, Sequence
+from sqlalchemy import orm as sql_orm
 from sqlalchemy.sql import expression as sql_exp
 from sqlalchemy.sql import func as sql_func
-from starlette.status import HTTP_403_FORBIDDEN, HTTP_404_NOT_FOUND
+from starlette.status import HTTP_400_BAD_REQUEST, HTTP_403_FORBIDDEN, HTTP_404_NOT_FOUND
 
 from app.database import models as m
+from app.database.db import use_read_replica
 from app.utils.auth import resolve_access_token, validate_user_role
+from app.utils.cache import get_cached, set_cached
 from app.utils.ctx import Context
+from app.utils.http_cache import (etag_matches, json_response, make_etag, model_response,
+                                  not_modified)
+from app.utils.pagination import CountMode, decode_cursor, encode_cursor, fetch_page
 
 router = APIRouter(prefix="/posts/{post_id:int}/comments", tags=["comments"])
 
@@ -27,11 +34,38 @@ class GetCommentResponse(BaseModel):
         orm_mode = True
 
 
-@router.get("/{comment_id:int}")
+def _comment_etag(comment_id: int, updated_at: datetime.datetime) -> str:
+    return make_etag("comment", comment_id, updated_at.isoformat())
+
+
+@router.get(
+    "/{comment_id:int}",
+    response_model=GetCommentResponse,
+    dependencies=[Depends(use_read_replica)],
+)
 async def get_comment(
     post_id: int,
     comment_id: int,
+    request: Request,
 ):
+    cache_key = f"comment:{post_id}:{comment_id}"
+    cached = await get_cached(Context.current.cache, cache_key)
+    if cached is not None:
+        etag, body = cached
+        return json_response(request, body, etag)
+
+    if "if-none-match" in request.headers:
+        updated_at = await Context.current.db.session.scalar(
+            sql_exp.select(m.Comment.updated_at).where(
+                (m.Comment.post_id == post_id) & (m.Comment.id == comment_id)
+            )
+        )
+        if updated_at is not None:
+            etag = _comment_etag(comment_id, updated_at)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+
+    Context.current.db.use_primary()  # 캐시에 넣을 값
     comment: m.Comment = await Context.current.db.session.scalar(
         sql_exp.select(m.Comment).where(
             (m.Comment.post_id == post_id) & (m.Comment.id == comment_id)
@@ -44,7 +78,11 @@ async def get_comment(
             detail=f"Comment not found.",
         )
 
-    return GetCommentResponse.from_orm(comment)
+    etag = _comment_etag(comment.id, comment.updated_at)
+    body = await set_cached(
+        Context.current.cache, cache_key, etag, GetCommentResponse.from_orm(comment)
+    )
+    return json_response(request, body, etag)
 
 
 class SearchCommentRequest(BaseModel):
@@ -58,17 +96,24 @@ class SearchCommentRequest(BaseModel):
     # pagination
     offset: int = 0
     count: int = 5
+    count_mode: CountMode = "exact"
 
 
 class SearchCommentResponse(BaseModel):
     comments: list[GetCommentResponse]
-    count: int  # total number of comments (not saved to db)
+    count: int | None  # total number of comments (not saved to db)
+    has_more: bool | None
 
 
-@router.post("/search")
+@router.post(
+    "/search",
+    response_model=SearchCommentResponse,
+    dependencies=[Depends(use_read_replica)],
+)
 async def search_comments(
     post_id: int,
     q: SearchCommentRequest,
+    request: Request,
 ):
     comment_query = sql_exp.select(m.Comment)
 
@@ -85,33 +130,253 @@ async def search_comments(
             m.Comment.parent_comment_id == q.parent_comment_id
         )
 
-    comment_cnt: int = await Context.current.db.session.scalar(
-        sql_exp.select(sql_func.count()).select_from(comment_query.subquery())
-    )
-
     comment_query = comment_query.order_by(
         getattr(getattr(m.Comment, q.sort_by), q.sort_direction)()
     )
+    # id 로 순서를 확정 (ix_comment_post_created 의 마지막 컬럼)
     if q.sort_direction == "asc":
-        comment_query = comment_query.order_by(getattr(m.Comment, q.sort_by).asc())
+        comment_query = comment_query.order_by(m.Comment.id.asc())
     else:
-        comment_query = comment_query.order_by(getattr(m.Comment, q.sort_by).desc())
+        comment_query = comment_query.order_by(m.Comment.id.desc())
+
+    page = await fetch_page(
+        comment_query, count_mode=q.count_mode, offset=q.offset, limit=q.count
+    )
+    comments = page.rows
+
+    if not page.found:
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail="Not found any comment matching your request.",
+        )
+
+    return model_response(
+        request,
+        SearchCommentResponse(
+            comments=[GetCommentResponse.from_orm(comment) for comment in comments],
+            count=page.count,
+            has_more=page.has_more,
+        ),
+    )
+
+
+class CommentTreeNode(GetCommentResponse):
+    replies: list["CommentTreeNode"] = []  # 작성순
+    # breadth / depth 제한이나 collapsed 때문에 빠진 대댓글이 있음
+    has_more_replies: bool = False
+
+
+CommentTreeNode.update_forward_refs()
+
+
+class GetCommentTreeResponse(BaseModel):
+    comments: list[CommentTreeNode]  # root_comment_id 가 있으면 그 댓글 하나
+    has_more: bool  # breadth 를 넘는 최상위 댓글이 더 있음
+
+
+_TREE_COLUMNS = (
+    m.Comment.id,
+    m.Comment.content,
+    m.Comment.written_user_id,
+    m.Comment.post_id,
+    m.Comment.parent_comment_id,
+    m.Comment.created_at,
+    m.Comment.updated_at,
+)
+
+
+def _first_replies(condition, breadth: int):
+    # 작성순으로 breadth + 1 개 (넘친 1 개는 has_more 표시용으로만 쓴다)
+    order = (m.Comment.created_at, m.Comment.id)
+    return (
+        sql_exp.select(
+            *_TREE_COLUMNS, sql_func.row_number().over(order_by=order).label("rn")
+        )
+        .where(condition)
+        .order_by(*order)
+        .limit(breadth + 1)
+    )
+
+
+@router.get(
+    "/tree",
+    response_model=GetCommentTreeResponse,
+    dependencies=[Depends(use_read_replica)],
+)
+async def get_comment_tree(
+    post_id: int,
+    request: Request,
+    root_comment_id: int | None = None,
+    depth: int = 5,
+    breadth: int = 20,
+    count: int = 200,
+    collapsed: list[int] = Query(default=[]),  # 대댓글을 펼치지 않을 댓글
+):
+    if min(depth, breadth, count) < 1:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="depth, breadth and count must be positive.",
+        )
+    count = min(count, Context.current.settings.COMMENT_TREE_MAX_NODES)
+
+    if root_comment_id is None:
+        roots = _first_replies(
+            (m.Comment.post_id == post_id) & m.Comment.parent_comment_id.is_(None),
+            breadth,
+        ).subquery("roots")
+    else:
+        # rn 은 row_number() 와 같은 bigint 여야 재귀 CTE 의 타입이 맞는다
+        rn = sql_exp.literal(1, BigInteger).label("rn")
+        roots = (
+            sql_exp.select(*_TREE_COLUMNS, rn)
+            .where((m.Comment.post_id == post_id) & (m.Comment.id == root_comment_id))
+            .subquery("roots")
+        )
+
+    tree = sql_exp.select(*roots.c, sql_exp.literal(1).label("depth")).cte(
+        "comment_tree", recursive=True
+    )
+    replies = _first_replies(
+        m.Comment.parent_comment_id == tree.c.id, breadth
+    ).lateral("replies")
+    expand = (tree.c.depth < depth) & (tree.c.rn <= breadth)
+    if collapsed:
+        expand &= tree.c.id.not_in(collapsed)
+    tree = tree.union_all(
+        sql_exp.select(*replies.c, tree.c.depth + 1)
+        .select_from(tree.join(replies, sql_exp.true()))
+        .where(expand)
+    )
+
+    # WITH RECURSIVE 의 행 순서는 보장되지 않으므로 (depth, 부모, 작성순) 으로 정렬해서 자른다
+    # -> 부모가 항상 자식보다 먼저, 넘친 행 (rn > breadth) 은 같은 부모의 대댓글 뒤에 온다
+    order = (tree.c.depth, tree.c.parent_comment_id, tree.c.rn)
+    limited = (
+        sql_exp.select(tree).order_by(*order).limit(count + 1).subquery("limited")
+    )
+    has_replies = sql_exp.exists().where(m.Comment.parent_comment_id == limited.c.id)
+    rows = (
+        await Context.current.db.session.execute(
+            sql_exp.select(*limited.c, has_replies.label("has_replies")).order_by(
+                limited.c.depth, limited.c.parent_comment_id, limited.c.rn
+            )
+        )
+    ).all()
+
+    if not rows:
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail="Not found any comment matching your request.",
+        )
+
+    # 부모가 자식보다 먼저 나오므로 한 번 훑으면서 tree 를 만든다
+    nodes: dict[int, CommentTreeNode] = {}
+    comments: list[CommentTreeNode] = []
+    has_more = False
+    for index, row in enumerate(rows):
+        if index == count or row.rn > breadth:  # 잘렸거나 넘친 행: 부모에 표시만 한다
+            if row.depth == 1:
+                has_more = True
+            else:
+                nodes[row.parent_comment_id].has_more_replies = True
+            continue
+
+        # 대댓글이 더 안 펼쳐지면 (depth / collapsed / count) has_replies 가 그대로 남는다
+        node = CommentTreeNode(
+            id=row.id,
+            content=row.content,
+            written_user_id=row.written_user_id,
+            post_id=row.post_id,
+            parent_comment_id=row.parent_comment_id,
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+            has_more_replies=row.has_replies,
+        )
+        nodes[node.id] = node
+        if row.depth == 1:
+            comments.append(node)
+        else:
+            parent = nodes[row.parent_comment_id]
+            if not parent.replies:
+                parent.has_more_replies = False
+            parent.replies.append(node)
+
+    return model_response(
+        request,
+        GetCommentTreeResponse(comments=comments, has_more=has_more),
+    )
+
+
+class ThreadCommentResponse(GetCommentResponse):
+    depth: int  # 최상위 댓글이 1
+
+
+class GetCommentThreadResponse(BaseModel):
+    comments: list[ThreadCommentResponse]  # thread 순서 (부모 다음에 그 대댓글)
+    next_cursor: str | None  # 다음 페이지가 없으면 None
+
+
+# path 순서 = 화면에 펼친 thread 순서라서, 한 페이지가 (post_id, path) index 의 range scan 하나
+@router.get(
+    "/thread",
+    response_model=GetCommentThreadResponse,
+    dependencies=[Depends(use_read_replica)],
+)
+async def get_comment_thread(
+    post_id: int,
+    request: Request,
+    root_comment_id: int | None = None,  # 이 댓글의 subtree 만
+    cursor: str | None = None,
+    count: int = Query(default=50, ge=1, le=200),
+):
+    comment_query = (
+        sql_exp.select(m.Comment)
+        .where(m.Comment.post_id == post_id)
+        .order_by(m.Comment.path)
+        .limit(count + 1)
+    )
+
+    if root_comment_id is not None:
+        root_path = (
+            sql_exp.select(m.Comment.path)
+            .where((m.Comment.post_id == post_id) & (m.Comment.id == root_comment_id))
+            .scalar_subquery()
+        )
+        comment_query = comment_query.where(m.Comment.in_subtree(root_path))
+
+    if cursor is not None:
+        values = decode_cursor(cursor)
+        if len(values) != 1 or not isinstance(values[0], str):
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail="The cursor is invalid.",
+            )
+        comment_query = comment_query.where(m.Comment.path > values[0])
 
-    comment_query = comment_query.offset(q.offset).limit(q.count)
     comments = (await Context.current.db.session.scalars(comment_query)).all()
 
-    if comment_cnt == 0:
+    if not comments and cursor is None:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND,
             detail="Not found any comment matching your request.",
         )
 
-    return SearchCommentResponse(
-        comments=[GetCommentResponse.from_orm(comment) for comment in comments],
-        count=comment_cnt,
+    has_more = len(comments) > count
+    comments = comments[:count]
+
+    return model_response(
+        request,
+        GetCommentThreadResponse(
+            comments=[ThreadCommentResponse.from_orm(comment) for comment in comments],
+            next_cursor=encode_cursor([comments[-1].path]) if has_more else None,
+        ),
     )
 
 
+# comment.id 의 serial sequence (path 를 만들려고 INSERT 전에 id 를 받는다)
+_COMMENT_ID_SEQ = Sequence("comment_id_seq")
+
+
 class PostCommentRequest(BaseModel):
     content: str
     parent_comment_id: int | None  # optional
@@ -129,27 +394,56 @@ async def create_comment(
 ):
     await validate_user_role(user_id, m.UserRoleEnum.Admin)
 
-    post: m.Post | None = await Context.current.db.session.scalar(
-        sql_exp.select(m.Board).where(m.Post.id == post_id)
+    # id 를 먼저 받아야 path 를 만들 수 있으므로 INSERT ... SELECT 한 문장으로 넣는다
+    # (post / 부모 댓글이 없으면 아무 행도 안 들어감)
+    new_id = sql_exp.select(_COMMENT_ID_SEQ.next_value().label("id")).subquery()
+    parent = sql_orm.aliased(m.Comment)
+    path = m.Comment.path_segment(new_id.c.id)
+    if q.parent_comment_id is not None:
+        path = parent.path + path
+
+    source = (
+        sql_exp.select(
+            new_id.c.id,
+            m.Post.id,
+            sql_exp.literal(user_id),
+            sql_exp.literal(q.content),
+            sql_exp.literal(q.parent_comment_id, Integer),
+            path,
+        )
+        .select_from(new_id)
+        .join(m.Post, m.Post.id == post_id)
+    )
+    if q.parent_comment_id is not None:
+        source = source.join(
+            parent, (parent.id == q.parent_comment_id) & (parent.post_id == post_id)
+        )
+
+    comment_id: int | None = await Context.current.db.session.scalar(
+        sql_exp.insert(m.Comment)
+        .from_select(
+            [
+                "id",
+                "post_id",
+                "written_user_id",
+                "content",
+                "parent_comment_id",
+                "path",
+            ],
+            source,
+        )
+        .returning(m.Comment.id)
     )
 
-    if post is None:
+    if comment_id is None:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND,
-            detail=f"Cannot find post with post_id as {post_id}",
+            detail=f"Cannot find post with post_id as {post_id} or its parent comment",
         )
 
-    comment = m.Comment(
-        post_id=post_id,
-        written_user_id=user_id,
-        content=q.content,
-        parent_comment_id=q.parent_comment_id,
-    )
-
-    Context.current.db.session.add(comment)
     await Context.current.db.session.commit()
 
-    return PostCommentResponse(comment_id=comment.id)
+    return PostCommentResponse(comment_id=comment_id)
 
 
 @router.put("/{comment_id:int}")
@@ -183,6 +477,7 @@ async def update_comment(
 
     Context.current.db.session.add(comment)
     await Context.current.db.session.commit()
+    await Context.current.cache.delete(f"comment:{post_id}:{comment_id}")
 
 
 @router.delete("/{comment_id:int}")
@@ -211,5 +506,12 @@ async def delete_comment(
             detail="This is not your comment. Therefore, it cannot be deleted.",
         )
 
-    await Context.current.db.session.delete(comment)
+    # 대댓글까지 path prefix 로 한 번에 지운다 (orm cascade 는 단계마다 자식을 읽어 온다)
+    await Context.current.db.session.execute(
+        sql_exp.delete(m.Comment)
+        .where((m.Comment.post_id == post_id) & m.Comment.in_subtree(comment.path))
+        .execution_options(synchronize_session=False)
+    )
     await Context.current.db.session.commit()
+    # 대댓글도 같이 지워지므로 post 의 댓글 캐시를 비운다
+    await Context.current.cache.delete_prefix(f"comment:{post_id}:")
@@ -2,16 +2,23 @@ import datetime
 import re
 from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from pydantic import BaseModel
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.sql import expression as sql_exp
 from sqlalchemy.sql import func as sql_func
-from starlette.status import HTTP_403_FORBIDDEN, HTTP_404_NOT_FOUND
+from starlette.status import HTTP_400_BAD_REQUEST, HTTP_403_FORBIDDEN, HTTP_404_NOT_FOUND
 
+from app.apis.post import GetPostResponse
 from app.database import models as m
+from app.database.db import use_read_replica
 from app.utils.auth import resolve_access_token, validate_user_role
+from app.utils.cache import get_cached, set_cached
 from app.utils.ctx import Context
+from app.utils.hashtag import TREND_BUCKET, trend_bucket
+from app.utils.hashtag_index import MAX_SUGGESTIONS
+from app.utils.http_cache import json_response, make_etag, model_response
+from app.utils.pagination import CountMode, decode_cursor, encode_cursor, fetch_page
 
 router = APIRouter(prefix="/hashtag", tags=["hashtag"])
 
@@ -34,24 +41,26 @@ class SearchHashtagRequest(BaseModel):
     # pagination
     offset: int = 0
     count: int = 20
+    count_mode: CountMode = "exact"
 
 
 class SearchHashtagResponse(BaseModel):
     hashtags: list[GetHashtagResponse]
-    count: int  # total number of hashtags (not saved to db)
+    count: int | None  # total number of hashtags (not saved to db)
+    has_more: bool | None
 
 
-@router.post("/search")
-async def search_hashtag(q: SearchHashtagRequest):
+@router.post(
+    "/search",
+    response_model=SearchHashtagResponse,
+    dependencies=[Depends(use_read_replica)],
+)
+async def search_hashtag(q: SearchHashtagRequest, request: Request):
     hashtag_query = sql_exp.select(m.Hashtag)
 
     if q.name is not None:
         hashtag_query = hashtag_query.where(m.Hashtag.name.ilike(q.name))
 
-    hashtag_cnt: int = await Context.current.db.session.scalar(
-        sql_exp.select(sql_func.count()).select_from(hashtag_query.subquery())
-    )
-
     hashtag_query = hashtag_query.order_by(
         getattr(getattr(m.Hashtag, q.sort_by), q.sort_direction)()
     )
@@ -60,16 +69,184 @@ async def search_hashtag(q: SearchHashtagRequest):
     else:  # "desc"
         hashtag_query = hashtag_query.order_by(getattr(m.Hashtag, q.sort_by).desc())
 
-    hashtag_query = hashtag_query.offset(q.offset).limit(q.count)
-    hashtags = (await Context.current.db.session.scalars(hashtag_query)).all()
+    page = await fetch_page(
+        hashtag_query, count_mode=q.count_mode, offset=q.offset, limit=q.count
+    )
+    hashtags = page.rows
 
-    if hashtag_cnt == 0:
+    if not page.found:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND,
             detail=f"Not found any hashtag matching your request.",
         )
 
-    return SearchHashtagResponse(
-        hashtags=[GetHashtagResponse.from_orm(hashtag) for hashtag in hashtags],
-        count=hashtag_cnt,
+    return model_response(
+        request,
+        SearchHashtagResponse(
+            hashtags=[GetHashtagResponse.from_orm(hashtag) for hashtag in hashtags],
+            count=page.count,
+            has_more=page.has_more,
+        ),
+    )
+
+
+class SuggestedHashtag(BaseModel):
+    name: str
+    post_cnt: int  # 이 tag 가 붙은 post 수
+
+
+class SuggestHashtagResponse(BaseModel):
+    hashtags: list[SuggestedHashtag]  # post_cnt 가 많은 순
+
+
+# 입력 중 자동완성: 메모리 index (`Context.hashtags`) 에서 찾는다 (DB 조회 없음)
+@router.get("/suggest", response_model=SuggestHashtagResponse)
+async def suggest_hashtag(
+    prefix: str,
+    request: Request,
+    count: int = Query(default=10, ge=1, le=MAX_SUGGESTIONS),
+):
+    prefix = prefix.removeprefix("#")
+    if not prefix:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="The prefix is empty.",
+        )
+
+    suggestions = await Context.current.hashtags.suggest(prefix, count)
+
+    return model_response(
+        request,
+        SuggestHashtagResponse(
+            hashtags=[
+                SuggestedHashtag(name=name, post_cnt=post_cnt)
+                for name, post_cnt in suggestions
+            ]
+        ),
+    )
+
+
+TrendingWindow = Literal["1h"] | Literal["6h"] | Literal["24h"] | Literal["7d"]
+
+_TRENDING_WINDOWS: dict[str, datetime.timedelta] = {
+    "1h": datetime.timedelta(hours=1),
+    "6h": datetime.timedelta(hours=6),
+    "24h": datetime.timedelta(hours=24),
+    "7d": datetime.timedelta(days=7),
+}
+
+
+class TrendingHashtag(BaseModel):
+    name: str
+    post_cnt: int  # 기간 동안 이 tag 가 붙은 post 수
+
+
+class GetTrendingHashtagsResponse(BaseModel):
+    window: TrendingWindow
+    start: datetime.datetime
+    end: datetime.datetime  # 마지막으로 끝난 bucket 까지 (진행 중인 bucket 제외)
+    hashtags: list[TrendingHashtag]
+
+
+# hashtag_trend 의 끝난 bucket 들만 합치므로, 결과는 다음 bucket 이 끝날 때까지 같다 (그동안 캐시)
+@router.get(
+    "/trending",
+    response_model=GetTrendingHashtagsResponse,
+    dependencies=[Depends(use_read_replica)],
+)
+async def get_trending_hashtags(
+    request: Request,
+    window: TrendingWindow = "24h",
+    count: int = Query(default=10, ge=1, le=100),
+):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    end = trend_bucket(now)
+    start = end - _TRENDING_WINDOWS[window]
+
+    cache_key = f"hashtag_trending:{window}:{count}:{end.isoformat()}"
+    cached = await get_cached(Context.current.cache, cache_key)
+    if cached is not None:
+        etag, body = cached
+        return json_response(request, body, etag)
+
+    # 다음 bucket 까지 캐시되므로, 정시 직전의 쓰기를 놓친 replica 에서 읽지 않는다
+    Context.current.db.use_primary()
+    post_cnt = sql_func.sum(m.HashtagTrend.post_cnt)
+    rows = await Context.current.db.session.execute(
+        sql_exp.select(m.HashtagTrend.hashtag_name, post_cnt)
+        .where((m.HashtagTrend.bucket >= start) & (m.HashtagTrend.bucket < end))
+        .group_by(m.HashtagTrend.hashtag_name)
+        .having(post_cnt > 0)
+        .order_by(post_cnt.desc(), m.HashtagTrend.hashtag_name)
+        .limit(count)
+    )
+
+    response = GetTrendingHashtagsResponse(
+        window=window,
+        start=start,
+        end=end,
+        hashtags=[TrendingHashtag(name=name, post_cnt=cnt) for name, cnt in rows],
+    )
+    etag = make_etag("hashtag_trending", window, count, end.isoformat())
+    body = await set_cached(
+        Context.current.cache,
+        cache_key,
+        etag,
+        response,
+        ttl=(end + TREND_BUCKET - now).total_seconds(),
+    )
+    return json_response(request, body, etag)
+
+
+class GetHashtagPostsResponse(BaseModel):
+    posts: list[GetPostResponse]  # 최신 post 부터
+    next_cursor: str | None  # 다음 페이지가 없으면 None
+
+
+# (hashtag_name, post_id) index 를 post_id 역순으로 읽는 keyset pagination
+@router.get(
+    "/{name}/posts",
+    response_model=GetHashtagPostsResponse,
+    dependencies=[Depends(use_read_replica)],
+)
+async def get_hashtag_posts(
+    name: str,
+    request: Request,
+    cursor: str | None = None,
+    count: int = Query(default=20, ge=1, le=100),
+):
+    post_query = (
+        sql_exp.select(m.Post)
+        .join(m.PostHashTag, m.PostHashTag.post_id == m.Post.id)
+        .where(m.PostHashTag.hashtag_name == name)
+        .order_by(m.PostHashTag.post_id.desc())
+        .limit(count + 1)
+    )
+
+    if cursor is not None:
+        values = decode_cursor(cursor)
+        if len(values) != 1 or not isinstance(values[0], int):
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail="The cursor is invalid.",
+            )
+        post_query = post_query.where(m.PostHashTag.post_id < values[0])
+
+    posts = (await Context.current.db.session.scalars(post_query)).all()
+
+    if not posts and cursor is None:
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail=f"Not found any post with hashtag #{name}.",
+        )
+
+    has_more = len(posts) > count
+    posts = posts[:count]
+
+    return model_response(
+        request,
+        GetHashtagPostsResponse(
+            posts=[GetPostResponse.from_orm(post) for post in posts],
+            next_cursor=encode_cursor([posts[-1].id]) if has_more else None,
+        ),
     )
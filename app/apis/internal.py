@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel
+
+from app.database import models as m
+from app.utils.auth import resolve_access_token, validate_user_role
+from app.utils.ctx import Context
+
+router = APIRouter(prefix="/internal", tags=["internal"])
+
+
+class GetPoolStatusResponse(BaseModel):
+    size: int
+    max_overflow: int
+    checked_out: int
+    idle: int
+    overflow: int
+    acquire_cnt: int
+    acquire_timeout_cnt: int
+    acquire_wait_avg_ms: float
+    acquire_wait_p95_ms: float
+    acquire_wait_max_ms: float
+
+    class Config:
+        orm_mode = True
+
+
+# pool 크기 조정용 (운영자 전용)
+@router.get("/db/pool")
+async def get_pool_status(
+    my_user_id: int = Depends(resolve_access_token),
+):
+    await validate_user_role(my_user_id, m.UserRoleEnum.Owner)
+
+    return GetPoolStatusResponse.from_orm(Context.current.db.pool_status())
+
+
+@router.get("/db/pool/replicas")
+async def get_replica_pool_status(
+    my_user_id: int = Depends(resolve_access_token),
+):
+    await validate_user_role(my_user_id, m.UserRoleEnum.Owner)
+
+    return [
+        GetPoolStatusResponse.from_orm(pool_status)
+        for pool_status in Context.current.db.replica_pool_status()
+    ]
+
+
+class GetCacheStatsResponse(BaseModel):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size_bytes: int
+    max_bytes: int
+
+    class Config:
+        orm_mode = True
+
+
+# 응답 캐시 hit ratio / 크기 확인용 (운영자 전용, hit / miss 는 이 worker 의 값)
+@router.get("/cache")
+async def get_cache_stats(
+    my_user_id: int = Depends(resolve_access_token),
+):
+    await validate_user_role(my_user_id, m.UserRoleEnum.Owner)
+
+    return GetCacheStatsResponse.from_orm(await Context.current.cache.stats())
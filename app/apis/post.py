@@ -1,18 +1,26 @@
 import datetime
-import re
+from collections import Counter
 from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel, conint, conlist
 from sqlalchemy.dialects.postgresql import insert as pg_insert
-from sqlalchemy.orm import undefer
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.sql import expression as sql_exp
 from sqlalchemy.sql import func as sql_func
 from starlette.status import HTTP_400_BAD_REQUEST, HTTP_403_FORBIDDEN, HTTP_404_NOT_FOUND
 
 from app.database import models as m
-from app.utils.auth import resolve_access_token, validate_user_role
+from app.database.db import use_read_replica
+from app.utils.auth import (resolve_access_token, resolve_optional_access_token,
+                            validate_user_role)
+from app.utils.cache import get_cached, set_cached
 from app.utils.ctx import Context
+from app.utils.hashtag import add_post_hashtags, extract_hashtags, remove_post_hashtags
+from app.utils.http_cache import (PRIVATE_CACHE_CONTROL, etag_matches, json_response,
+                                  make_etag, model_response, not_modified)
+from app.utils.pagination import (CountMode, count_rows, decode_cursor, encode_cursor,
+                                  fetch_page)
 
 router = APIRouter(prefix="/posts", tags=["posts"])
 
@@ -31,15 +39,43 @@ class GetPostResponse(BaseModel):
         orm_mode = True
 
 
-@router.get("/{post_id}")
+def _post_etag(post_id: int, updated_at: datetime.datetime, like_cnt: int) -> str:
+    return make_etag("post", post_id, updated_at.isoformat(), like_cnt)
+
+
+@router.get(
+    "/{post_id}",
+    response_model=GetPostResponse,
+    dependencies=[Depends(use_read_replica)],
+)
 async def get_post(
     post_id: int,
+    request: Request,
 ):
+    cache_key = f"post:{post_id}"
+    cached = await get_cached(Context.current.cache, cache_key)
+    if cached is not None:
+        etag, body = cached
+        return json_response(request, body, etag)
+
+    if "if-none-match" in request.headers:
+        # post 를 읽어서 직렬화하기 전에 ETag 재료 컬럼만 보고 304 인지 확인
+        version = (
+            await Context.current.db.session.execute(
+                sql_exp.select(m.Post.updated_at, m.Post.like_cnt).where(
+                    m.Post.id == post_id
+                )
+            )
+        ).one_or_none()
+        if version is not None:
+            etag = _post_etag(post_id, *version)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+
+    Context.current.db.use_primary()  # 캐시에 넣을 값
     post: m.Post = (
         await Context.current.db.session.execute(
-            sql_exp.select(m.Post)
-            .options(undefer(m.Post.like_cnt))  # after (추가됨)
-            .where(m.Post.id == post_id)
+            sql_exp.select(m.Post).where(m.Post.id == post_id)
         )
     ).scalar_one_or_none()
 
@@ -49,7 +85,11 @@ async def get_post(
             detail=f"The post with {post_id} could not be found.",
         )
 
-    return GetPostResponse.from_orm(post)
+    etag = _post_etag(post.id, post.updated_at, post.like_cnt)
+    body = await set_cached(
+        Context.current.cache, cache_key, etag, GetPostResponse.from_orm(post)
+    )
+    return json_response(request, body, etag)
 
 
 class SearchPostRequest(BaseModel):
@@ -58,25 +98,82 @@ class SearchPostRequest(BaseModel):
     written_user_id: int | None
     board_id: int | None
     title: str | None
+    # full-text search (title, content), websearch 문법 ("a b", "a or b", "-a")
+    query: str | None
     # sort
-    sort_by: Literal["created_at"] | Literal["updated_at"] = "created_at"
+    sort_by: Literal["created_at"] | Literal["updated_at"] | Literal[
+        "rank"
+    ] | Literal["popularity"] | Literal[
+        "hot"
+    ] = "created_at"  # "rank" 는 query 가 있을 때만 (ts_rank, "desc" 가 관련도 높은 순)
+    # "popularity" (like 수), "hot" (like 수 + 최신) 는 post_score, "desc" 가 높은 순
     sort_direction: Literal["asc"] | Literal["desc"] = "asc"
     # pagination
-    offset: int = 0
-    count: int = 20
+    pagination: Literal["offset"] | Literal["cursor"] = "offset"
+    offset: conint(ge=0) = 0  # "offset" 일 때만 사용
+    cursor: str | None  # "cursor" 일 때 이전 페이지의 next_cursor (첫 페이지는 None)
+    count: conint(ge=1, le=100) = 20
+    count_mode: CountMode = "exact"
 
 
 class SearchPostResponse(BaseModel):
     posts: list[GetPostResponse]
-    count: int  # total number of posts (not saved to db)
+    count: int | None  # total number of posts (not saved to db)
+    has_more: bool | None
+    next_cursor: str | None = None  # "cursor" 모드에서 다음 페이지가 있을 때만
+
+
+def _seek_post_query(post_query: sql_exp.Select, q: SearchPostRequest):
+    """
+    keyset(seek) pagination: (sort_by 값, id) 가 cursor 다음인 행부터 가져온다.
+    앞 페이지들을 읽고 버리는 offset 과 달리 페이지 깊이와 상관없이 일정하다.
+    """
+    sort_column = getattr(m.Post, q.sort_by)
+
+    if q.cursor is not None:
+        values = decode_cursor(q.cursor)
+        if len(values) != 4 or values[:2] != [q.sort_by, q.sort_direction]:
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail="The cursor does not match sort_by and sort_direction.",
+            )
+        try:
+            sort_value = datetime.datetime.fromisoformat(values[2])
+            post_id = int(values[3])
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail="The cursor is invalid.",
+            )
+
+        seek_key = sql_exp.tuple_(sort_column, m.Post.id)
+        if q.sort_direction == "asc":
+            post_query = post_query.where(seek_key > sql_exp.tuple_(sort_value, post_id))
+        else:
+            post_query = post_query.where(seek_key < sql_exp.tuple_(sort_value, post_id))
+
+    return post_query.order_by(
+        getattr(sort_column, q.sort_direction)(),
+        getattr(m.Post.id, q.sort_direction)(),
+    ).limit(q.count + 1)  # 다음 페이지가 있는지 보기 위해 1개 더
+
+
+def _next_post_cursor(post: m.Post, q: SearchPostRequest) -> str:
+    return encode_cursor(
+        [q.sort_by, q.sort_direction, getattr(post, q.sort_by).isoformat(), post.id]
+    )
 
 
-@router.post("/search")
+@router.post(
+    "/search",
+    response_model=SearchPostResponse,
+    dependencies=[Depends(use_read_replica)],
+)
 async def search_post(
     q: SearchPostRequest,
+    request: Request,
 ):
-    # post_query = sql_exp.select(m.Post)
-    post_query = sql_exp.select(m.Post).options(undefer(m.Post.like_cnt))  # after
+    post_query = sql_exp.select(m.Post)
 
     if q.like_user_id is not None:
         post_query = post_query.join(m.Post.likes).where(
@@ -84,14 +181,42 @@ async def search_post(
         )
     if q.written_user_id is not None:
         post_query = post_query.where(m.Post.written_user_id == q.written_user_id)
-    if q.board_id is not None:
+    scored = q.sort_by in ("popularity", "hot")
+    if scored:
+        # board 별 점수 index (board_id, 점수, post_id) 를 순서대로 읽도록 post_score 로 거른다
+        post_query = post_query.join(m.Post.score)
+        if q.board_id is not None:
+            post_query = post_query.where(m.PostScore.board_id == q.board_id)
+    elif q.board_id is not None:
         post_query = post_query.where(m.Post.board_id == q.board_id)
     if q.title is not None:
         post_query = post_query.where(m.Post.title.ilike(q.title))
+    if q.query is not None:
+        ts_query = sql_func.websearch_to_tsquery("simple", q.query)
+        post_query = post_query.where(m.Post.search_vector.bool_op("@@")(ts_query))
 
-    post_cnt: int = await Context.current.db.session.scalar(
-        sql_exp.select(sql_func.count()).select_from(post_query.subquery())
-    )
+    if q.sort_by == "rank":
+        if q.query is None:
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail="sort_by rank requires a query.",
+            )
+        if q.pagination == "cursor":
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail="sort_by rank supports only offset pagination.",
+            )
+        sort_column = sql_func.ts_rank(m.Post.search_vector, ts_query)
+    elif scored:
+        if q.pagination == "cursor":
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail=f"sort_by {q.sort_by} supports only offset pagination.",
+            )
+        sort_column = getattr(m.PostScore, q.sort_by)
+    else:
+        sort_column = getattr(m.Post, q.sort_by)
+    tie_column = m.PostScore.post_id if scored else m.Post.id
 
     # [sorting way1) dictionary]
     # sort_by_column = {
@@ -106,27 +231,122 @@ async def search_post(
 
     # post_query = post_query.order_by(sort_exp)
 
-    # [sorting way2) getattr() method]
-    post_query = post_query.order_by(
-        getattr(getattr(m.Post, q.sort_by), q.sort_direction)()
-    )
-    if q.sort_direction == "asc":
-        post_query = post_query.order_by(getattr(m.Post, q.sort_by).asc())
+    next_cursor = None
+    if q.pagination == "cursor":
+        # seek 조건이 붙기 전의 query 로 세야 전체 개수가 된다
+        post_cnt = await count_rows(post_query, q.count_mode)
+        posts = (
+            await Context.current.db.session.scalars(_seek_post_query(post_query, q))
+        ).all()
+
+        has_more = len(posts) > q.count
+        if has_more:
+            posts = posts[: q.count]
+            next_cursor = _next_post_cursor(posts[-1], q)
+        found = bool(posts) or q.cursor is not None
+        if q.count_mode != "has_more":
+            has_more = None
     else:
-        post_query = post_query.order_by(getattr(m.Post, q.sort_by).desc())
-
-    post_query = post_query.offset(q.offset).limit(q.count)
-    posts = (await Context.current.db.session.scalars(post_query)).all()
+        # [sorting way2) getattr() method]
+        post_query = post_query.order_by(getattr(sort_column, q.sort_direction)())
+        if q.sort_direction == "asc":
+            post_query = post_query.order_by(tie_column.asc())
+        else:
+            post_query = post_query.order_by(tie_column.desc())
+
+        page = await fetch_page(
+            post_query, count_mode=q.count_mode, offset=q.offset, limit=q.count
+        )
+        posts, post_cnt, has_more, found = (
+            page.rows, page.count, page.has_more, page.found
+        )
 
-    if post_cnt == 0:
+    if not found:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND,
             detail=f"Not found any post matching your request.",
         )
 
-    return SearchPostResponse(
-        posts=[GetPostResponse.from_orm(post) for post in posts],
-        count=post_cnt,
+    return model_response(
+        request,
+        SearchPostResponse(
+            posts=[GetPostResponse.from_orm(post) for post in posts],
+            count=post_cnt,
+            has_more=has_more,
+            next_cursor=next_cursor,
+        ),
+    )
+
+
+class GetPostStatsRequest(BaseModel):
+    post_ids: conlist(int, min_items=1, max_items=100)  # 피드 한 화면 분량
+
+
+class PostStats(BaseModel):
+    post_id: int
+    like_cnt: int
+    comment_cnt: int
+    liked_by_me: bool  # 로그인 안 했으면 항상 False
+
+
+class GetPostStatsResponse(BaseModel):
+    stats: list[PostStats]  # 요청 순서, 없는 post 는 빠짐
+
+
+# 피드에 보이는 post 들의 카운터를 post 수와 상관없이 쿼리 하나로
+@router.post(
+    "/stats",
+    response_model=GetPostStatsResponse,
+    dependencies=[Depends(use_read_replica)],
+)
+async def get_post_stats(
+    q: GetPostStatsRequest,
+    request: Request,
+    user_id: int | None = Depends(resolve_optional_access_token),
+):
+    post_ids = list(dict.fromkeys(q.post_ids))
+
+    # like_cnt 는 post 에 있고, 댓글 수는 (post_id, ...) index 에서 group by 로 센다
+    comments = (
+        sql_exp.select(m.Comment.post_id, sql_func.count().label("cnt"))
+        .where(m.Comment.post_id.in_(post_ids))
+        .group_by(m.Comment.post_id)
+        .subquery()
+    )
+    stats_query = (
+        sql_exp.select(
+            m.Post.id,
+            m.Post.like_cnt,
+            sql_func.coalesce(comments.c.cnt, 0),
+        )
+        .outerjoin(comments, comments.c.post_id == m.Post.id)
+        .where(m.Post.id.in_(post_ids))
+    )
+    if user_id is None:
+        stats_query = stats_query.add_columns(sql_exp.false())
+    else:
+        stats_query = stats_query.outerjoin(
+            m.Like, (m.Like.post_id == m.Post.id) & (m.Like.user_id == user_id)
+        ).add_columns(m.Like.user_id.is_not(None))
+
+    stats = {
+        post_id: PostStats(
+            post_id=post_id,
+            like_cnt=like_cnt,
+            comment_cnt=comment_cnt,
+            liked_by_me=liked_by_me,
+        )
+        for post_id, like_cnt, comment_cnt, liked_by_me in (
+            await Context.current.db.session.execute(stats_query)
+        )
+    }
+
+    return model_response(
+        request,
+        GetPostStatsResponse(
+            stats=[stats[post_id] for post_id in post_ids if post_id in stats]
+        ),
+        PRIVATE_CACHE_CONTROL,  # liked_by_me 는 요청한 유저마다 다르다
     )
 
 
@@ -149,36 +369,27 @@ async def create_post(
 ):
     await validate_user_role(user_id, m.UserRoleEnum.Admin)
 
+    if await Context.current.boards.get(q.board_id) is None:
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail=f"Cannot find board with board_id as {q.board_id}",
+        )
+
     post = m.Post(
         title=q.title,
         content=q.content,
         board_id=q.board_id,
         written_user_id=user_id,
+        score=m.PostScore(board_id=q.board_id),
     )
 
     Context.current.db.session.add(post)
+    await Context.current.db.session.flush()  # post.id
 
-    # create hashtag
-    content = q.content
-    if content.find('#') != -1:  # is exist hashtag
-        pattern = "#([0-9a-zA-Z가-힣]*)"
-        hashtags = re.compile(pattern).findall(content)  # type: list
-
-        await Context.current.db.session.execute(
-            pg_insert(m.Hashtag)
-            .values([{"name": hashtag} for hashtag in hashtags])
-            .on_conflict_do_nothing()  # This is only available with postgresql
-        )
-        """
-        INSERT INTO hashtag
-        VALUES (name) (
-            'code',
-            'camp',
-        )
-        ON CONFLICT DO NOTHING;
-        """
+    hashtag_usage = await add_post_hashtags(post.id, extract_hashtags(q.content))
 
     await Context.current.db.session.commit()
+    Context.current.hashtags.update_usage(hashtag_usage)
 
     return PostPostResponse(post_id=post.id)
 
@@ -214,19 +425,33 @@ async def update_post(
 
     Context.current.db.session.add(post)
 
-    # create new hashtag
-    content = q.content
-    if content.find('#') != -1:  # is exist hashtag
-        pattern = "#([0-9a-zA-Z가-힣]*)"
-        hashtags = re.compile(pattern).findall(content)
-
-        await Context.current.db.session.execute(
-            pg_insert(m.Hashtag)
-            .values([{"name": hashtag} for hashtag in hashtags])
-            .on_conflict_do_nothing()
+    # 바뀐 hashtag 만 반영
+    old_hashtags = set(
+        await Context.current.db.session.scalars(
+            sql_exp.select(m.PostHashTag.hashtag_name).where(
+                m.PostHashTag.post_id == post_id
+            )
+        )
+    )
+    new_hashtags = extract_hashtags(q.content)
+    hashtag_usage: Counter[str] = Counter()
+    removed_hashtags = old_hashtags.difference(new_hashtags)
+    if removed_hashtags:
+        hashtag_usage.update(
+            await remove_post_hashtags(
+                (m.PostHashTag.post_id == post_id)
+                & m.PostHashTag.hashtag_name.in_(sorted(removed_hashtags))
+            )
+        )
+    hashtag_usage.update(
+        await add_post_hashtags(
+            post_id, [name for name in new_hashtags if name not in old_hashtags]
         )
+    )
 
     await Context.current.db.session.commit()
+    Context.current.hashtags.update_usage(hashtag_usage)
+    await Context.current.cache.delete(f"post:{post_id}")
 
 
 @router.delete("/{post_id:int}")
@@ -252,78 +477,137 @@ async def delete_post(
             detail="This is not your post. Therefore, it cannot be deleted.",
         )
 
+    hashtag_usage = await remove_post_hashtags(m.PostHashTag.post_id == post_id)
     await Context.current.db.session.delete(post)
     await Context.current.db.session.commit()
+    Context.current.hashtags.update_usage(hashtag_usage)
+    await Context.current.cache.delete(f"post:{post_id}")
+    await Context.current.cache.delete_prefix(f"comment:{post_id}:")  # cascade 로 지워진 댓글
 
 
 class LikeResponse(BaseModel):
     post_id: int
 
 
+def _count_like(changed: sql_exp.CTE, delta: int) -> sql_exp.Select:
+    """
+    like 행을 바꾼 CTE (`changed`) 에 행이 있을 때만 post / post_score 카운터도 같이 고친다.
+    바뀐 행이 없으면 (이미 like / unlike 상태) 카운터도 그대로이고 결과가 비어 있다.
+
+    WITH liked AS (
+        INSERT INTO "like" (post_id, user_id) VALUES (1, 2)
+        ON CONFLICT DO NOTHING RETURNING post_id
+    ),
+    counted AS (
+        UPDATE post SET like_cnt = like_cnt + 1 FROM liked WHERE post.id = liked.post_id
+    ),
+    scored AS (UPDATE post_score SET popularity = ... FROM liked WHERE ...)
+    SELECT liked.post_id FROM liked
+    """
+    # CTE 안의 DML 은 ORM entity 가 아닌 Table 로 만들어야 한다
+    post, post_score = m.Post.__table__, m.PostScore.__table__
+    counted = (
+        sql_exp.update(post)
+        .where(post.c.id == changed.c.post_id)
+        .values(like_cnt=post.c.like_cnt + delta, updated_at=post.c.updated_at)
+        .cte("counted")
+    )
+    scored = (
+        sql_exp.update(post_score)
+        .where(post_score.c.post_id == changed.c.post_id)
+        .values(m.PostScore.add_likes(delta))
+        .cte("scored")
+    )
+    return sql_exp.select(changed.c.post_id).add_cte(counted, scored)
+
+
+def _violated_constraint(error: IntegrityError) -> str | None:
+    # asyncpg 의 원래 예외는 dbapi adapter 예외의 __cause__
+    return getattr(error.orig.__cause__, "constraint_name", None)
+
+
+_LIKE_FKEY_DETAILS = {
+    "like_post_id_fkey": "This Post not found.",
+    "like_user_id_fkey": "User not found.",
+}
+
+
+# like / unlike 는 각각 statement 하나 (먼저 SELECT 로 확인하면 동시 요청이 unique 위반으로 500)
+# idempotent=true 면 이미 like (unlike) 된 상태여도 200
 @router.post("/{post_id:int}/like")
 async def like_post(
     post_id: int,
+    idempotent: bool = False,
     user_id: int = Depends(resolve_access_token),
 ):
-    post: m.Post | None = await Context.current.db.session.scalar(
-        sql_exp.select(m.Post).where(m.Post.id == post_id)
+    like = m.Like.__table__
+    liked = (
+        pg_insert(like)
+        .values(post_id=post_id, user_id=user_id)
+        .on_conflict_do_nothing()
+        .returning(like.c.post_id)
+        .cte("liked")
     )
 
-    if post is None:
-        raise HTTPException(
-            status_code=HTTP_404_NOT_FOUND,
-            detail="This Post not found.",
-        )
-
-    like: m.Like | None = await Context.current.db.session.scalar(
-        sql_exp.select(m.Like).where(
-            (m.Like.post_id == post_id) & (m.Like.user_id == user_id)
-        )
-    )
-
-    if like is not None:
-        raise HTTPException(
-            status_code=HTTP_400_BAD_REQUEST,
-            detail="This post has already been liked.",
+    try:
+        liked_post_id: int | None = await Context.current.db.session.scalar(
+            _count_like(liked, 1)
         )
+    except IntegrityError as e:
+        # 없는 post 와 삭제된 user 의 token 을 구분해서 알려준다
+        detail = _LIKE_FKEY_DETAILS.get(_violated_constraint(e))
+        if detail is None:
+            raise
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND, detail=detail)
+
+    if liked_post_id is None:
+        if not idempotent:
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail="This post has already been liked.",
+            )
+        return LikeResponse(post_id=post_id)
 
-    like = m.Like(
-        post_id=post_id,
-        user_id=user_id,
-    )
-
-    Context.current.db.session.add(like)
     await Context.current.db.session.commit()
+    await Context.current.cache.delete(f"post:{post_id}")  # like_cnt
 
-    return LikeResponse(post_id=like.post_id)
+    return LikeResponse(post_id=liked_post_id)
 
 
 @router.delete("/{post_id:int}/like")
 async def like_delete(
     post_id: int,
+    idempotent: bool = False,
     user_id: int = Depends(resolve_access_token),
 ):
-    post: m.Post | None = await Context.current.db.session.scalar(
-        sql_exp.select(m.Post).where(m.Post.id == post_id)
+    like = m.Like.__table__
+    unliked = (
+        sql_exp.delete(like)
+        .where((like.c.post_id == post_id) & (like.c.user_id == user_id))
+        .returning(like.c.post_id)
+        .cte("unliked")
     )
 
-    if post is None:
-        raise HTTPException(
-            status_code=HTTP_404_NOT_FOUND,
-            detail="This Post not found.",
-        )
-
-    like: m.Like | None = await Context.current.db.session.scalar(
-        sql_exp.select(m.Like).where(
-            (m.Like.post_id == post_id) & (m.Like.user_id == user_id)
-        )
+    unliked_post_id: int | None = await Context.current.db.session.scalar(
+        _count_like(unliked, -1)
     )
 
-    if like is None:
-        raise HTTPException(
+    if unliked_post_id is None:
+        # 지운 행이 없을 때만 post 가 있는지 따로 본다
+        post_exists = await Context.current.db.session.scalar(
+            sql_exp.exists().where(m.Post.id == post_id).select()
+        )
+        if not post_exists:
+            raise HTTPException(
+                status_code=HTTP_404_NOT_FOUND,
+                detail="This Post not found.",
+            )
+        if not idempotent:
+            raise HTTPException(
                 status_code=HTTP_400_BAD_REQUEST,
-                detail="This post has already been marked as unliked."
+                detail="This post has already been marked as unliked.",
             )
+        return
 
-    await Context.current.db.session.delete(like)
     await Context.current.db.session.commit()
+    await Context.current.cache.delete(f"post:{post_id}")  # like_cnt
@@ -1,16 +1,16 @@
 import datetime
 from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile
 from pydantic import BaseModel
 from sqlalchemy.sql import expression as sql_exp
-from sqlalchemy.sql import func as sql_func
 from starlette.status import (
     HTTP_400_BAD_REQUEST,
     HTTP_404_NOT_FOUND,
 )
 
 from app.database import models as m
+from app.database.db import use_read_replica
 from app.utils.auth import (
     generate_hashed_password,
     resolve_access_token,
@@ -20,6 +20,9 @@ from app.utils.auth import (
 )
 from app.utils.blob import get_image_url, upload_profile_img
 from app.utils.ctx import Context
+from app.utils.hashtag import remove_post_hashtags
+from app.utils.http_cache import PRIVATE_CACHE_CONTROL, model_response
+from app.utils.pagination import CountMode, fetch_page
 
 router = APIRouter(prefix="/user", tags=["user"])
 
@@ -74,17 +77,24 @@ class SearchUserRequest(BaseModel):
     # pagination
     offset: int = 0
     count: int = 20
+    count_mode: CountMode = "exact"
 
 
 class SearchUserResponse(BaseModel):
     users: list[GetUserResponse]
-    count: int  # total number of users (not saved to db)
+    count: int | None  # total number of users (not saved to db)
+    has_more: bool | None
 
 
 # 유저에 대한 search (+ get_img_url)
-@router.post("/search")
+@router.post(
+    "/search",
+    response_model=SearchUserResponse,
+    dependencies=[Depends(use_read_replica)],
+)
 async def search_user(
     q: SearchUserRequest,
+    request: Request,
     my_user_id: int = Depends(resolve_access_token),
 ):
     await validate_user_role(my_user_id, m.UserRoleEnum.Owner)
@@ -96,10 +106,6 @@ async def search_user(
     if q.role is not None:
         user_query = user_query.where(m.User.role == q.role)
 
-    user_cnt: int = await Context.current.db.session.scalar(
-        sql_exp.select(sql_func.count()).select_from(user_query.subquery())
-    )
-
     sort_by_column = {
         "created_at": m.User.created_at,
         "updated_at": m.User.updated_at,
@@ -110,22 +116,29 @@ async def search_user(
     }[q.sort_direction]
     user_query = user_query.order_by(sort_exp)
 
-    user_query = user_query.offset(q.offset).limit(q.count)
-    users = (await Context.current.db.session.scalars(user_query)).all()
+    page = await fetch_page(
+        user_query, count_mode=q.count_mode, offset=q.offset, limit=q.count
+    )
+    users = page.rows
 
     for user in users:
         if user.profile_file_key is not None:
             user.profile_file_url = get_image_url(user.profile_file_key)
 
-    if user_cnt == 0:
+    if not page.found:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND,
             detail=f"Not found any user matching your request.",
         )
 
-    return SearchUserResponse(
-        users=[GetUserResponse.from_orm(user) for user in users],
-        count=user_cnt,
+    return model_response(
+        request,
+        SearchUserResponse(
+            users=[GetUserResponse.from_orm(user) for user in users],
+            count=page.count,
+            has_more=page.has_more,
+        ),
+        PRIVATE_CACHE_CONTROL,
     )
 
 
@@ -304,6 +317,29 @@ async def change_user_role(
     await Context.current.db.session.commit()
 
 
+async def _release_likes(user_id: int) -> None:
+    # 탈퇴하는 유저의 like 는 cascade 로 지워지므로, 그 post 들의 like_cnt / 점수도 같이 내려준다
+    # (session.delete 보다 먼저: autoflush 로 like 가 먼저 지워지면 대상을 못 찾음)
+    await Context.current.db.session.execute(
+        sql_exp.update(m.Post)
+        .where((m.Post.id == m.Like.post_id) & (m.Like.user_id == user_id))
+        .values(like_cnt=m.Post.like_cnt - 1, updated_at=m.Post.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    await Context.current.db.session.execute(
+        sql_exp.update(m.PostScore)
+        .where((m.PostScore.post_id == m.Like.post_id) & (m.Like.user_id == user_id))
+        .values(m.PostScore.add_likes(-1))
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def _invalidate_user_content() -> None:
+    # 탈퇴한 유저의 post / 댓글이 지워지고 다른 post 의 like_cnt 도 바뀌므로 통째로 비운다
+    await Context.current.cache.delete_prefix("post:")
+    await Context.current.cache.delete_prefix("comment:")
+
+
 # 스스로 탈퇴하기
 @router.delete("/me")
 async def delete_self(
@@ -319,8 +355,16 @@ async def delete_self(
             detail="User not found.",
         )
 
+    await _release_likes(user.id)
+    hashtag_usage = await remove_post_hashtags(
+        m.PostHashTag.post_id.in_(
+            sql_exp.select(m.Post.id).where(m.Post.written_user_id == user.id)
+        )
+    )
     await Context.current.db.session.delete(user)
     await Context.current.db.session.commit()
+    await _invalidate_user_content()
+    Context.current.hashtags.update_usage(hashtag_usage)
 
 
 # (Owner 권한으로) 다른 유저 탈퇴시키기
@@ -341,5 +385,13 @@ async def delete_user(
             detail=f"There is no User whose user_id is {user_id}. Please try again.",
         )
 
+    await _release_likes(user.id)
+    hashtag_usage = await remove_post_hashtags(
+        m.PostHashTag.post_id.in_(
+            sql_exp.select(m.Post.id).where(m.Post.written_user_id == user.id)
+        )
+    )
     await Context.current.db.session.delete(user)
     await Context.current.db.session.commit()
+    await _invalidate_user_content()
+    Context.current.hashtags.update_usage(hashtag_usage)
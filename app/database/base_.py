@@ -28,11 +28,13 @@ class ModelBase(ModelMeta):
         server_default=sql_text("CURRENT_TIMESTAMP"),
         nullable=False,
     )
+    # UPDATE 할 때 같이 갱신 (db trigger 가 없으므로 orm / core update 가 넣어준다)
+    # 카운터처럼 내용이 바뀌지 않는 UPDATE 는 `updated_at=Model.updated_at` 로 유지할 것
     updated_at = Column(
         TIMESTAMP(timezone=True),
         nullable=False,
         server_default=sql_text("CURRENT_TIMESTAMP"),
-        server_onupdate=FetchedValue(),
+        onupdate=sql_text("CURRENT_TIMESTAMP"),
     )
 
     @property
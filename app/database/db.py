@@ -1,17 +1,27 @@
+import collections
+import dataclasses
+import itertools
+import re
+import time
 import uuid
 from asyncio import current_task
 
 import asyncpg
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from sqlalchemy import exc as sa_exc
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
     async_scoped_session,
     create_async_engine,
 )
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.sql import expression as sa_exp
 
+from app.database.query_budget import record_statement
+from app.settings import AppSettings
 from app.utils.ctx import Context
 
 
@@ -27,34 +37,248 @@ from app.utils.ctx import Context
 
 
 # [after]
-async def _asyncpg_prepare(  # type: ignore
-    self,
-    query,
-    *,
-    name=None,
-    timeout=None,
-    record_class=None,
-):
-    return await self._prepare(
+class _PoolerSafeConnection(asyncpg.Connection):
+    """
+    pgbouncer(transaction pooling) 뒤에서는 트랜잭션마다 다른 서버 커넥션을 받는다.
+    이름이 겹치거나 사라진 prepared statement 를 만나지 않도록,
+    매번 고유한 이름으로 prepare 하고 캐시하지 않는다.
+    """
+
+    async def prepare(  # type: ignore
+        self,
         query,
-        name=str(uuid.uuid1()) if name is None else name,  # hotfix
-        timeout=timeout,
-        use_cache=False,
-        record_class=record_class,
+        *,
+        name=None,
+        timeout=None,
+        record_class=None,
+    ):
+        return await self._prepare(
+            query,
+            name=str(uuid.uuid1()) if name is None else name,
+            timeout=timeout,
+            use_cache=False,
+            record_class=record_class,
+        )
+
+
+def _statement_cache_connect_args(app_settings: AppSettings) -> dict:
+    if app_settings.DATABASE_STATEMENT_CACHE_MODE == "pgbouncer":
+        return {
+            "statement_cache_size": 0,  # asyncpg
+            "prepared_statement_cache_size": 0,  # sqlalchemy asyncpg adapter
+            "connection_class": _PoolerSafeConnection,
+        }
+
+    # "lru": 커넥션마다 prepared statement 를 LRU 로 재사용 (parse/plan 1회)
+    return {
+        "statement_cache_size": app_settings.DATABASE_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": app_settings.DATABASE_STATEMENT_CACHE_SIZE,
+    }
+
+
+_ACQUIRE_WAIT_WINDOW = 1000
+
+
+class _InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    커넥션 checkout 에 걸린 시간(대기 + 새 커넥션 생성)을 기록하는 pool.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:  # type: ignore
+        super().__init__(*args, **kwargs)
+        self.acquire_cnt = 0
+        self.acquire_timeout_cnt = 0
+        self.acquire_wait_max = 0.0
+        self.acquire_waits: collections.deque[float] = collections.deque(
+            maxlen=_ACQUIRE_WAIT_WINDOW
+        )
+
+    def _do_get(self):  # type: ignore
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        except sa_exc.TimeoutError:
+            self.acquire_timeout_cnt += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started_at
+            self.acquire_cnt += 1
+            self.acquire_wait_max = max(self.acquire_wait_max, waited)
+            self.acquire_waits.append(waited)
+
+
+@dataclasses.dataclass
+class PoolStatus:
+    size: int
+    max_overflow: int
+    checked_out: int
+    idle: int
+    overflow: int
+    acquire_cnt: int
+    acquire_timeout_cnt: int
+    # 최근 `_ACQUIRE_WAIT_WINDOW` 번의 checkout 기준 (max 는 전체 기간)
+    acquire_wait_avg_ms: float
+    acquire_wait_p95_ms: float
+    acquire_wait_max_ms: float
+
+
+def _pool_status(pool: _InstrumentedPool) -> PoolStatus:
+    waits = sorted(pool.acquire_waits)
+    return PoolStatus(
+        size=pool.size(),
+        max_overflow=pool._max_overflow,
+        checked_out=pool.checkedout(),
+        idle=pool.checkedin(),
+        overflow=max(pool.overflow(), 0),  # pool_size 미만일 때는 음수
+        acquire_cnt=pool.acquire_cnt,
+        acquire_timeout_cnt=pool.acquire_timeout_cnt,
+        acquire_wait_avg_ms=sum(waits) / len(waits) * 1000 if waits else 0.0,
+        acquire_wait_p95_ms=waits[int(len(waits) * 0.95)] * 1000 if waits else 0.0,
+        acquire_wait_max_ms=pool.acquire_wait_max * 1000,
+    )
+
+
+_SERVER_TIMING_MAX_STATEMENTS = 10
+_SERVER_TIMING_DESC_LENGTH = 60
+_WHITESPACE_REGEX = re.compile(r"\s+")
+
+
+@dataclasses.dataclass
+class QueryStats:
+    """요청(세션) 하나에서 실행된 SQL 통계"""
+
+    count: int = 0
+    total: float = 0.0  # seconds
+    statement_cnt: collections.Counter[str] = dataclasses.field(
+        default_factory=collections.Counter
+    )
+    slowest: float = 0.0
+    slowest_statement: str | None = None
+    # (statement, seconds), 앞에서부터 `_SERVER_TIMING_MAX_STATEMENTS` 개만
+    statements: list[tuple[str, float]] = dataclasses.field(default_factory=list)
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.total += elapsed
+        self.statement_cnt[statement] += 1
+        if elapsed >= self.slowest:
+            self.slowest = elapsed
+            self.slowest_statement = statement
+        if len(self.statements) < _SERVER_TIMING_MAX_STATEMENTS:
+            self.statements.append((statement, elapsed))
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        """`threshold` 번 이상 실행된 statement (N+1 의심)"""
+        return {
+            statement: cnt
+            for statement, cnt in self.statement_cnt.items()
+            if cnt >= threshold
+        }
+
+    def server_timing(self, with_statements: bool = False) -> str:
+        """
+        ex) db;dur=3.1;desc="2 queries", db-slowest;dur=2.0
+        `with_statements` 면 statement 별로 (SQL 이 클라이언트에 보이므로 debug 용)
+            sql-1;dur=1.1;desc="SELECT count(*) AS count_1 FROM (SELECT ...",
+            sql-2;dur=2.0;desc="SELECT post.id, post.title, ..."
+        """
+        metrics = [
+            f'db;dur={self.total * 1000:.2f};desc="{self.count} queries"',
+            f"db-slowest;dur={self.slowest * 1000:.2f}",
+        ]
+        if not with_statements:
+            return ", ".join(metrics)
+
+        for i, (statement, elapsed) in enumerate(self.statements, start=1):
+            metrics.append(
+                f'sql-{i};dur={elapsed * 1000:.2f};desc="{_timing_desc(statement)}"'
+            )
+        return ", ".join(metrics)
+
+
+def _timing_desc(statement: str) -> str:
+    desc = _WHITESPACE_REGEX.sub(" ", statement).strip()
+    # quoted-string 에 들어갈 수 있도록 (header 는 ascii)
+    desc = desc.replace("\\", "").replace('"', "").encode("ascii", "ignore").decode()
+    if len(desc) > _SERVER_TIMING_DESC_LENGTH:
+        desc = desc[: _SERVER_TIMING_DESC_LENGTH - 3] + "..."
+    return desc
+
+
+def _create_engine(db_uri: str, app_settings: AppSettings) -> AsyncEngine:
+    return create_async_engine(
+        db_uri,
+        connect_args=_statement_cache_connect_args(app_settings),
+        poolclass=_InstrumentedPool,
+        pool_size=app_settings.DATABASE_POOL_SIZE,
+        max_overflow=app_settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=app_settings.DATABASE_POOL_TIMEOUT,
+        pool_recycle=app_settings.DATABASE_POOL_RECYCLE,
+        pool_pre_ping=app_settings.DATABASE_POOL_PRE_PING,
     )
 
+
+class _RoutingSession(Session):
+    """
+    read-only 로 표시된 세션의 SELECT 는 replica 로 보낸다.
+    한 번이라도 쓰기(flush, INSERT/UPDATE/DELETE)를 한 세션은 그 뒤로 primary 만 사용한다.
+    (세션 = 요청(Context) 단위이므로, 요청 안에서 자신이 쓴 값을 다시 읽을 수 있다.)
+    """
+
+    def __init__(self, *args, db: "DbConn", **kwargs) -> None:  # type: ignore
+        super().__init__(*args, **kwargs)
+        self._db = db
+        self.read_only = False
+        self._has_written = False
+        self._replica: Engine | None = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):  # type: ignore
+        primary = super().get_bind(mapper, clause=clause, **kwargs)
+
+        if not self.read_only or self._has_written or not self._db.replica_engines:
+            return primary
+
+        if (
+            self._flushing
+            or not isinstance(clause, sa_exp.Select)
+            or clause._for_update_arg is not None
+        ):
+            self._has_written = True
+            return primary
+
+        if self._replica is None:  # 요청 안에서는 같은 replica 를 사용
+            self._replica = self._db.next_replica_engine().sync_engine
+        return self._replica
+
+
 class DbConn:
-    def __init__(self, db_uri: str) -> None:
-        self.engine: AsyncEngine = create_async_engine(
-            db_uri,
+    def __init__(self, app_settings: AppSettings) -> None:
+        self.engine: AsyncEngine = _create_engine(
+            app_settings.DATABASE_URL, app_settings
         )  # db 세션 관리 방법
-    
-        asyncpg.Connection.prepare = _asyncpg_prepare
+        self.replica_engines: list[AsyncEngine] = [
+            _create_engine(replica_url, app_settings)
+            for replica_url in app_settings.DATABASE_REPLICA_URLS
+        ]
+        self._replica_cycle = itertools.cycle(self.replica_engines)  # round-robin
+
+        if app_settings.SQL_INSTRUMENTATION:
+            for engine in (self.engine, *self.replica_engines):
+                event.listen(
+                    engine.sync_engine, "before_cursor_execute", _before_cursor_execute
+                )
+                event.listen(
+                    engine.sync_engine,
+                    "after_cursor_execute",
+                    self._after_cursor_execute,
+                )
 
         self._scoped_session = async_scoped_session(
             sessionmaker(
                 self.engine,
                 class_=AsyncSession,
+                sync_session_class=_RoutingSession,
+                db=self,
                 autocommit=False,
                 autoflush=False,
                 expire_on_commit=False,
@@ -67,5 +291,72 @@ class DbConn:
     def session(self) -> AsyncSession:
         return self._scoped_session()
 
+    @property
+    def has_scoped_session(self) -> bool:
+        """현재 요청에서 세션이 만들어졌는지 (세션은 `session` 에 처음 접근할 때 만들어진다)"""
+        return self._scoped_session.registry.has()
+
+    @property
+    def query_stats(self) -> QueryStats | None:
+        """현재 요청의 SQL 통계 (`SQL_INSTRUMENTATION` 이 꺼져 있거나 SQL 을 쓰지 않았으면 None)"""
+        if not self.has_scoped_session:
+            return None
+        return self.session.info.get("query_stats")
+
+    def _after_cursor_execute(  # type: ignore
+        self, conn, cursor, statement, parameters, context, executemany
+    ) -> None:
+        elapsed = time.perf_counter() - conn.info.pop("query_started_at")
+        record_statement(statement, parameters)
+
+        try:
+            if not self.has_scoped_session:  # 요청 밖 (ex. startup, 세션 없이 engine 직접 사용)
+                return
+        except LookupError:  # Context 가 바인딩되지 않음
+            return
+
+        self.session.info.setdefault("query_stats", QueryStats()).record(
+            statement, elapsed
+        )
+
+    def mark_read_only(self) -> None:
+        """현재 요청의 세션을 read-only 로 표시한다. (replica 가 있으면 SELECT 를 replica 로)"""
+        self.session.sync_session.read_only = True  # type: ignore
+
+    def use_primary(self) -> None:
+        """
+        현재 요청의 남은 SELECT 를 primary 로 보낸다.
+        공유 응답 캐시를 채우는 읽기처럼 replica lag 이 남으면 안 되는 경우
+        (늦은 replica 가 방금 무효화된 key 에 수정 전 값을 다시 넣을 수 있다)
+        """
+        self.session.sync_session.read_only = False  # type: ignore
+
+    def next_replica_engine(self) -> AsyncEngine:
+        return next(self._replica_cycle)
+
+    def pool_status(self) -> PoolStatus:
+        return _pool_status(self.engine.pool)  # type: ignore
+
+    def replica_pool_status(self) -> list[PoolStatus]:
+        return [
+            _pool_status(engine.pool)  # type: ignore
+            for engine in self.replica_engines
+        ]
+
+    async def dispose(self) -> None:
+        for engine in (self.engine, *self.replica_engines):
+            await engine.dispose()
+
     async def clear_scoped_session(self) -> None:
         await self._scoped_session.remove()  # 8
+
+
+def _before_cursor_execute(  # type: ignore
+    conn, cursor, statement, parameters, context, executemany
+) -> None:
+    conn.info["query_started_at"] = time.perf_counter()
+
+
+async def use_read_replica() -> None:
+    """read-only 라우트에 `dependencies=[Depends(use_read_replica)]` 로 붙인다."""
+    Context.current.db.mark_read_only()
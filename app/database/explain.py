@@ -0,0 +1,31 @@
+"""
+EXPLAIN 을 SQLAlchemy statement 로 감싸는 construct.
+
+    plan = await session.scalar(Explain(sql_exp.select(m.Post).where(...)))
+
+바인딩 파라미터는 감싼 statement 의 것을 그대로 사용한다.
+"""
+from typing import Any
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.elements import ClauseElement
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement: Any, *, analyze: bool = False) -> None:
+        self.statement = statement
+        self.analyze = analyze
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler: Any, **kw: Any) -> str:
+    options = "ANALYZE, FORMAT JSON" if element.analyze else "FORMAT JSON"
+    return f"EXPLAIN ({options}) " + compiler.process(element.statement, **kw)
+
+
+def plan_rows(plan: list[dict[str, Any]]) -> int:
+    """`EXPLAIN (FORMAT JSON)` 결과에서 planner 의 최상위 예상 row 수"""
+    return int(plan[0]["Plan"]["Plan Rows"])
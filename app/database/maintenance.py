@@ -0,0 +1,175 @@
+"""
+운영용 일회성 db 작업.
+
+    python -m app.database.maintenance repair-like-cnt
+    python -m app.database.maintenance repair-post-score
+    python -m app.database.maintenance repair-hashtag-trend
+    python -m app.database.maintenance prune-hashtag-trend
+
+`.env` (또는 `app_` 환경변수) 의 DATABASE_URL 을 사용한다.
+"""
+import argparse
+import asyncio
+import datetime
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.sql import expression as sql_exp
+from sqlalchemy.sql import func as sql_func
+
+from app.database import models as m
+from app.settings import AppSettings
+from app.utils.ctx import Context, bind_context, create_app_ctx
+from app.utils.hashtag import trend_bucket_sql
+
+
+async def repair_like_cnt() -> int:
+    """
+    post.like_cnt 를 like 테이블의 실제 개수로 다시 맞춘다.
+    어긋난 post 만 UPDATE 하고, 고친 post 수를 반환한다.
+    """
+    actual_cnt = (
+        sql_exp.select(sql_func.count())
+        .where(m.Like.post_id == m.Post.id)
+        .correlate(m.Post)
+        .scalar_subquery()
+    )
+    result = await Context.current.db.session.execute(
+        sql_exp.update(m.Post)
+        .where(m.Post.like_cnt != actual_cnt)
+        .values(like_cnt=actual_cnt, updated_at=m.Post.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    await Context.current.db.session.commit()
+
+    return result.rowcount
+
+
+async def repair_post_score() -> int:
+    """
+    post_score 를 post / like 기준으로 다시 만든다. (없는 row 는 추가)
+    점수가 어긋난 post 만 쓰고, 고친 post 수를 반환한다.
+    """
+    like_cnt = (
+        sql_exp.select(sql_func.count())
+        .where(m.Like.post_id == m.Post.id)
+        .correlate(m.Post)
+        .scalar_subquery()
+    )
+    expected = sql_exp.select(
+        m.Post.id,
+        m.Post.board_id,
+        like_cnt,
+        sql_func.log(sql_func.greatest(like_cnt, 1))
+        + sql_func.extract("epoch", m.Post.created_at) / m.HOT_DECAY_SECONDS,
+        # post_score.created_at 을 post 와 맞춰야 이후 like 때 hot 의 시간 항이 같아진다
+        m.Post.created_at,
+    ).where(m.Post.board_id.is_not(None))
+
+    insert_stmt = pg_insert(m.PostScore).from_select(
+        ["post_id", "board_id", "popularity", "hot", "created_at"], expected
+    )
+    excluded = insert_stmt.excluded
+    result = await Context.current.db.session.execute(
+        insert_stmt.on_conflict_do_update(
+            index_elements=[m.PostScore.post_id],
+            set_={
+                "board_id": excluded.board_id,
+                "popularity": excluded.popularity,
+                "hot": excluded.hot,
+                "created_at": excluded.created_at,
+            },
+            where=(
+                (m.PostScore.board_id != excluded.board_id)
+                | (m.PostScore.popularity != excluded.popularity)
+                | (m.PostScore.created_at != excluded.created_at)
+            ),
+        )
+    )
+    await Context.current.db.session.commit()
+
+    return result.rowcount
+
+
+# 가장 긴 trending 기간 (`/hashtag/trending?window=7d`) 보다 오래된 bucket 은 읽지 않는다
+HASHTAG_TREND_RETENTION = datetime.timedelta(days=7)
+
+
+def _hashtag_trend_start():
+    """보관하는 가장 오래된 bucket"""
+    return trend_bucket_sql(sql_func.now()) - HASHTAG_TREND_RETENTION
+
+
+async def repair_hashtag_trend() -> int:
+    """
+    보관 기간 (`HASHTAG_TREND_RETENTION`) 안의 hashtag_trend 를 connect_post_hashtag 기준으로 다시 만든다.
+    어긋난 bucket 만 쓰고 link 가 없는 bucket 은 지운다. 고친 bucket 수를 반환한다.
+    (prune 으로 지운 오래된 bucket 은 되살리지 않는다)
+    """
+    start = _hashtag_trend_start()
+    bucket = trend_bucket_sql(m.PostHashTag.created_at)
+    expected = (
+        sql_exp.select(m.PostHashTag.hashtag_name, bucket, sql_func.count())
+        .where(m.PostHashTag.created_at >= start)
+        .group_by(m.PostHashTag.hashtag_name, bucket)
+    )
+
+    insert_stmt = pg_insert(m.HashtagTrend).from_select(
+        ["hashtag_name", "bucket", "post_cnt"], expected
+    )
+    upserted = await Context.current.db.session.execute(
+        insert_stmt.on_conflict_do_update(
+            index_elements=[m.HashtagTrend.bucket, m.HashtagTrend.hashtag_name],
+            set_={"post_cnt": insert_stmt.excluded.post_cnt},
+            where=m.HashtagTrend.post_cnt != insert_stmt.excluded.post_cnt,
+        )
+    )
+    deleted = await Context.current.db.session.execute(
+        sql_exp.delete(m.HashtagTrend)
+        .where(
+            (m.HashtagTrend.bucket >= start)
+            & ~sql_exp.exists().where(
+                (m.PostHashTag.hashtag_name == m.HashtagTrend.hashtag_name)
+                & (trend_bucket_sql(m.PostHashTag.created_at) == m.HashtagTrend.bucket)
+            )
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await Context.current.db.session.commit()
+
+    return upserted.rowcount + deleted.rowcount
+
+
+async def prune_hashtag_trend() -> int:
+    """`HASHTAG_TREND_RETENTION` 보다 오래된 bucket 을 지우고, 지운 수를 반환한다."""
+    result = await Context.current.db.session.execute(
+        sql_exp.delete(m.HashtagTrend)
+        .where(m.HashtagTrend.bucket < _hashtag_trend_start())
+        .execution_options(synchronize_session=False)
+    )
+    await Context.current.db.session.commit()
+
+    return result.rowcount
+
+
+COMMANDS = {
+    "repair-like-cnt": repair_like_cnt,
+    "repair-post-score": repair_post_score,
+    "repair-hashtag-trend": repair_hashtag_trend,
+    "prune-hashtag-trend": prune_hashtag_trend,
+}
+
+
+async def _run(command: str) -> None:
+    app_ctx = await create_app_ctx(AppSettings())
+    try:
+        async with bind_context(app_ctx):
+            fixed_cnt = await COMMANDS[command]()
+        print(f"{command}: {fixed_cnt} row(s) fixed")
+    finally:
+        await app_ctx.db.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    asyncio.run(_run(parser.parse_args().command))
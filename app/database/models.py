@@ -1,6 +1,8 @@
 import enum
 import datetime
 from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, TIMESTAMP
+from sqlalchemy import DDL, Computed, Float, Index, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy import text as sql_text
 from sqlalchemy import orm as sql_orm
 from sqlalchemy.schema import FetchedValue
@@ -27,6 +29,28 @@ from app.database.base_ import ModelBase
 TZ_UTC = datetime.timezone.utc
 
 
+def _pg_trgm_available(ddl, target, bind, **kw) -> bool:
+    # pg_trgm 은 contrib 이라 설치 안 된 postgres 도 있음 -> 없으면 trigram index 를 건너뜀
+    # (운영 db 는 alembic migration 이 extension 을 만든다)
+    if bind is None:  # offline (`alembic upgrade --sql`)
+        return True
+    return bind.scalar(
+        sql_text(
+            "SELECT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm')"
+        )
+    )
+
+
+def _trgm_index(name: str, column: str) -> Index:
+    """ILIKE '%...%' 도 탈 수 있는 GIN trigram index"""
+    return Index(
+        name,
+        column,
+        postgresql_using="gin",
+        postgresql_ops={column: "gin_trgm_ops"},
+    ).ddl_if(callable_=_pg_trgm_available)
+
+
 class UserRoleEnum(int, enum.Enum):
     Owner = 50
     Admin = 25
@@ -44,6 +68,8 @@ class Board(ModelBase):
     )  # relationship: orm 에서만, db에 들어가지 않음
     posts = relationship("Post", uselist=True, back_populates="board", cascade="all")
 
+    __table_args__ = (_trgm_index("ix_board_title_trgm", "title"),)
+
     def __repr__(self):
         # `Board(id={self.id}, board_name={self.board_name}, )`
         result = f"Board(id={self.id!r}, board_name={self.board_name!r}, )"
@@ -58,15 +84,52 @@ class Post(ModelBase):
     content = Column(Text, nullable=True, default=None)
     written_user_id = Column(Integer, ForeignKey("user.id"), index=True, nullable=False)
     written_user = relationship("User", uselist=False)
-    board_id = Column(Integer, ForeignKey("board.id"), index=True)
+    board_id = Column(Integer, ForeignKey("board.id"))  # index: ix_post_board_created
     board = relationship("Board", uselist=False)
     likes = relationship("Like", uselist=True, back_populates="post", cascade="all")
     comments = relationship(
         "Comment", uselist=True, back_populates="post", cascade="all"
     )
-    # hashtags = relationship("Hashtag", uselist=False, back_populates="post", cascade="all")
+    # 본문의 hashtag (create / update_post 가 connect_post_hashtag 에 직접 쓴다)
+    hashtags = relationship(
+        "PostHashTag",
+        uselist=True,
+        back_populates="post",
+        cascade="save-update, merge",
+        passive_deletes="all",  # post 삭제시 FK 의 ON DELETE CASCADE 로 같이 지워짐
+    )
+    # full-text search 용 (title 가중치 A, content 가중치 B), db 가 계산해서 저장
+    search_vector = sql_orm.deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+                "setweight(to_tsvector('simple', coalesce(content, '')), 'B')",
+                persisted=True,
+            ),
+            nullable=True,
+        )
+    )
+    # like 수 (비정규화), like / unlike 할 때 같은 transaction 에서 `like_cnt ± 1`
+    # 어긋나면 `python -m app.database.maintenance repair-like-cnt` 로 다시 맞춘다
+    like_cnt = Column(
+        Integer, nullable=False, default=0, server_default=sql_text("0")
+    )
+    # 인기순 / hot 정렬용 점수 (post_score 테이블)
+    score = relationship(
+        "PostScore",
+        uselist=False,
+        back_populates="post",
+        cascade="save-update, merge",
+        passive_deletes="all",  # post 삭제시 FK 의 ON DELETE CASCADE 로 같이 지워짐
+    )
 
-    like_cnt: int
+    __table_args__ = (
+        # board 별 목록 (board_id 로 거르고 created_at 순, id 는 keyset 용 tie-breaker)
+        Index("ix_post_board_created", "board_id", "created_at", "id"),
+        Index("ix_post_search_vector", "search_vector", postgresql_using="gin"),
+        _trgm_index("ix_post_title_trgm", "title"),
+    )
 
 
 class User(ModelBase):
@@ -84,6 +147,8 @@ class User(ModelBase):
     comments = relationship(
         "Comment", uselist=True, back_populates="written_user", cascade="all"
     )
+
+    __table_args__ = (_trgm_index("ix_user_email_trgm", "email"),)
     
     # 만약 profile_file_url 가져와지지 않으면 'async_property' 적용
 
@@ -111,6 +176,63 @@ class Like(ModelBase):
     user_id = Column(Integer, ForeignKey("user.id"), primary_key=True)
     user = relationship("User", uselist=False)
 
+    # PK 가 (post_id, user_id) 라 user_id 로만 찾을 때 (like_user_id 필터) 는 못 씀
+    __table_args__ = (Index("ix_like_user_post", "user_id", "post_id"),)
+
+
+# hot = log(like 수) + 작성 시각 / HOT_DECAY_SECONDS
+# 작성 시각이 12.5 시간 늦을 때마다 like 10 배 (log 밑 10) 만큼의 가산점
+# 시간 항은 post 마다 상수라 like 이벤트 때만 다시 계산하면 됨 (주기적 재계산 X)
+HOT_DECAY_SECONDS = 45000
+
+
+# board 별 인기순 / hot 정렬을 위한 점수
+# like / unlike 때 증분으로 갱신, (board_id, 점수, post_id) index 로 top-N 을 정렬 없이 읽음
+class PostScore(ModelBase):
+    __tablename__ = "post_score"
+
+    post_id = Column(
+        Integer, ForeignKey("post.id", ondelete="CASCADE"), primary_key=True
+    )
+    post = relationship("Post", uselist=False, back_populates="score")
+    board_id = Column(
+        Integer, ForeignKey("board.id", ondelete="CASCADE"), nullable=False
+    )
+    popularity = Column(  # like 수
+        Integer, nullable=False, server_default=sql_text("0")
+    )
+    hot = Column(
+        Float,
+        nullable=False,
+        server_default=sql_text(
+            f"(extract(epoch from CURRENT_TIMESTAMP) / {HOT_DECAY_SECONDS})"
+        ),
+    )
+
+    __table_args__ = (
+        Index("ix_post_score_board_popularity", "board_id", "popularity", "post_id"),
+        Index("ix_post_score_board_hot", "board_id", "hot", "post_id"),
+    )
+
+    @classmethod
+    def hot_score(cls, popularity):
+        # created_at 은 post 와 같은 transaction 에서 만들어져 post.created_at 과 같음
+        return (
+            sa_func.log(sa_func.greatest(popularity, 1))
+            + sa_func.extract("epoch", cls.created_at) / HOT_DECAY_SECONDS
+        )
+
+    @classmethod
+    def add_likes(cls, delta: int) -> dict:
+        """`UPDATE post_score SET ...` 에 넘길 값 (popularity ± delta, hot 재계산)"""
+        return {
+            "popularity": cls.popularity + delta,
+            "hot": cls.hot_score(cls.popularity + delta),
+        }
+
+
+COMMENT_PATH_SEGMENT = 8  # id 하나당 hex 글자 수 (id < 2**32)
+
 
 class Comment(ModelBase):
     __tablename__ = "comment"
@@ -119,9 +241,10 @@ class Comment(ModelBase):
     content = Column(Text, nullable=False, default=None)
     written_user_id = Column(Integer, ForeignKey("user.id"), index=True, nullable=False)
     written_user = relationship("User", uselist=False)
-    post_id = Column(Integer, ForeignKey("post.id"), index=True)
+    post_id = Column(Integer, ForeignKey("post.id"))  # index: ix_comment_post_created
     post = relationship("Post", uselist=False)
-    parent_comment_id = Column(Integer, ForeignKey("comment.id"), index=True)
+    # index: ix_comment_parent_created
+    parent_comment_id = Column(Integer, ForeignKey("comment.id"))
     # parent_comment = relationship("Comment", uselist=False)
     children_comment = relationship(
         "Comment",
@@ -129,6 +252,32 @@ class Comment(ModelBase):
         backref=backref("parent_comment", remote_side=[id]),
         cascade="all",
     )
+    # 조상부터 자기까지 id 를 고정폭 hex 로 이어 붙인 값 (e.g. "0000002a0000002f")
+    # byte 순서 ("C" collation) 로 정렬하면 thread 의 pre-order (부모 다음에 대댓글)
+    path = Column(String(collation="C"), nullable=False)
+
+    __table_args__ = (
+        Index("ix_comment_post_created", "post_id", "created_at", "id"),
+        # 대댓글을 작성순으로 LIMIT 만큼만 읽는다 (comment tree 의 LATERAL)
+        Index("ix_comment_parent_created", "parent_comment_id", "created_at", "id"),
+        # thread 순서 keyset pagination / subtree range
+        Index("ix_comment_post_path", "post_id", "path"),
+        _trgm_index("ix_comment_content_trgm", "content"),
+    )
+
+    @classmethod
+    def path_segment(cls, comment_id):
+        return sa_func.lpad(sa_func.to_hex(comment_id), COMMENT_PATH_SEGMENT, "0")
+
+    @classmethod
+    def in_subtree(cls, path):
+        """path 의 댓글과 그 아래 대댓글 전부 (index range scan)"""
+        # "g" 는 hex 숫자 ("0"-"9", "a"-"f") 보다 큰 첫 글자
+        return (cls.path >= path) & (cls.path < path + "g")
+
+    @property
+    def depth(self) -> int:
+        return len(self.path) // COMMENT_PATH_SEGMENT  # 최상위 댓글이 1
 
 
 class Hashtag(ModelBase):
@@ -136,29 +285,41 @@ class Hashtag(ModelBase):
 
     name = Column(String, primary_key=True)
 
+    __table_args__ = (_trgm_index("ix_hashtag_name_trgm", "name"),)
+
 
 class PostHashTag(ModelBase):
     __tablename__ = "connect_post_hashtag"
 
-    post_id = Column(Integer, ForeignKey("post.id"), primary_key=True)
-    post = relationship("Post", uselist=False)
+    post_id = Column(
+        Integer, ForeignKey("post.id", ondelete="CASCADE"), primary_key=True
+    )
+    post = relationship("Post", uselist=False, back_populates="hashtags")
     hashtag_name = Column(String, ForeignKey("hashtag.name"), primary_key=True)
     hashtag = relationship("Hashtag", uselist=False)
 
+    # PK 가 (post_id, hashtag_name) 라 tag 로 post 를 찾을 때는 못 씀
+    __table_args__ = (
+        Index("ix_post_hashtag_name_post", "hashtag_name", "post_id"),
+    )
+
+
+# 시간 단위 hashtag 사용량 (인기 hashtag 용 rollup)
+# post 에 tag 가 붙을 때 / 떨어질 때 link 의 created_at 이 속한 bucket 을 ± 1
+# 어긋나면 `python -m app.database.maintenance repair-hashtag-trend` 로 다시 맞춘다
+class HashtagTrend(ModelBase):
+    __tablename__ = "hashtag_trend"
+
+    # PK (bucket, hashtag_name): 기간으로 bucket 범위를 읽는다
+    bucket = Column(TIMESTAMP(timezone=True), primary_key=True)  # date_trunc('hour', ...)
+    hashtag_name = Column(String, ForeignKey("hashtag.name"), primary_key=True)
+    post_cnt = Column(Integer, nullable=False, server_default=sql_text("0"))
+
 
-'''
-[board 오브젝트를 부를때 실행]
-저장했다가 board.id로 부를때 암시적으로 board에 대한 쿼리가 실행됨
-(쿼리가 실행될 때 column_property에 대한)
-암시적으로 실행될 경우, column_property에 대한 쿼리는 await이 안 붙음
-따라서 암시적으로 가져올때, 명시적으로 부르지 않는이상 이 값을 가져오지 않도록 하면 됨 (deferred=True,)
-'''
-Post.like_cnt = sql_orm.column_property(
-    (
-        sa_exp.select(sa_func.count(Like.user_id))
-        .where(Like.post_id == Post.id)
-        .correlate_except(Like)
-        .scalar_subquery()
+event.listen(
+    ModelBase.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(
+        callable_=_pg_trgm_available
     ),
-    deferred=True,
-)
\ No newline at end of file
+)
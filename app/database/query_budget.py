@@ -0,0 +1,86 @@
+"""
+SQL 쿼리 예산(query budget).
+
+테스트에서 라우트가 실행하는 SQL 개수를 제한하고, 파라미터만 다른 같은 statement 가
+반복되는 N+1 패턴을 잡는다.
+
+    async with query_budget(2):
+        response = await app_client.post("/posts/search", json={...})
+
+async 함수에 decorator 로 붙일 수도 있다. (`@query_budget(3)`)
+statement 는 `SQL_INSTRUMENTATION` 이 켜져 있을 때만 기록된다.
+"""
+import collections
+import contextlib
+import dataclasses
+from contextvars import ContextVar
+from typing import Any, AsyncIterator
+
+_active_recorders: ContextVar[tuple["QueryRecorder", ...]] = ContextVar(
+    "_active_recorders", default=()
+)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@dataclasses.dataclass
+class QueryRecorder:
+    # (statement, parameters)
+    statements: list[tuple[str, Any]] = dataclasses.field(default_factory=list)
+
+    def repeated(self, max_repeats: int) -> dict[str, int]:
+        statement_cnt = collections.Counter(
+            statement for statement, _ in self.statements
+        )
+        return {
+            statement: cnt
+            for statement, cnt in statement_cnt.items()
+            if cnt > max_repeats
+        }
+
+
+def record_statement(statement: str, parameters: Any) -> None:
+    for recorder in _active_recorders.get():
+        recorder.statements.append((statement, parameters))
+
+
+@contextlib.asynccontextmanager
+async def record_queries() -> AsyncIterator[QueryRecorder]:
+    recorder = QueryRecorder()
+    token = _active_recorders.set((*_active_recorders.get(), recorder))
+    try:
+        yield recorder
+    finally:
+        _active_recorders.reset(token)
+
+
+@contextlib.asynccontextmanager
+async def query_budget(
+    max_statements: int,
+    *,
+    max_repeats: int = 1,
+) -> AsyncIterator[QueryRecorder]:
+    """
+    블록 안에서 실행된 statement 가 `max_statements` 개를 넘거나,
+    같은 statement 가 `max_repeats` 번 넘게 실행되면 `QueryBudgetExceeded`.
+    """
+    async with record_queries() as recorder:
+        yield recorder
+
+    executed = [statement for statement, _ in recorder.statements]
+    if len(executed) > max_statements:
+        raise QueryBudgetExceeded(
+            f"Executed {len(executed)} SQL statements (budget: {max_statements}):\n"
+            + "\n".join(
+                f"  {i}. {statement}" for i, statement in enumerate(executed, start=1)
+            )
+        )
+
+    repeated = recorder.repeated(max_repeats)
+    if repeated:
+        raise QueryBudgetExceeded(
+            "Same SQL statement executed repeatedly (possible N+1):\n"
+            + "\n".join(f"  x{cnt} {statement}" for statement, cnt in repeated.items())
+        )
@@ -22,6 +22,7 @@ from app.utils.ctx import Context
 _PBKDF2_HASH_NAME = "SHA256"
 _PBKDF2_ITERATIONS = 100_000
 user_auth_scheme = HTTPBearer()
+optional_user_auth_scheme = HTTPBearer(auto_error=False)  # 로그인 안 해도 되는 endpoint
 
 
 @dataclasses.dataclass
@@ -123,6 +124,17 @@ def resolve_access_token(
     return validate_access_token(credentials.credentials)
 
 
+def resolve_optional_access_token(
+    credentials: HTTPAuthorizationCredentials | None = Depends(
+        optional_user_auth_scheme
+    ),
+) -> int | None:
+    """Authorization header 가 없으면 None (있는데 잘못된 token 이면 똑같이 에러)"""
+    if credentials is None:
+        return None
+    return validate_access_token(credentials.credentials)
+
+
 
 async def validate_email_exist(email: str):
     is_email_exist = await Context.current.db.session.scalar(
@@ -0,0 +1,133 @@
+"""
+board 전체를 메모리에 올려 둔 snapshot.
+
+board 는 수가 적고 거의 바뀌지 않으므로, 조회 / 검색 / title 중복 확인 / post 의 board 확인을
+DB 대신 snapshot 으로 처리한다.
+
+- 첫 사용 때 읽어 오고, board 를 바꾸는 handler 는 commit 뒤에 바뀐 board 를 `put()` / `discard()` 한다.
+- 다른 worker 의 변경은 `BOARD_DIRECTORY_TTL` 이 지나 다시 읽을 때 반영된다.
+  (snapshot 에 없는 id 를 찾으면 TTL 전이라도 한 번 다시 읽는다)
+- snapshot 은 만든 뒤 바꾸지 않고 통째로 교체하므로, 읽는 쪽은 lock 없이 일관된 값을 본다.
+"""
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import datetime
+import operator
+import time
+from typing import Callable, Mapping
+
+from sqlalchemy.sql import expression as sql_exp
+
+from app.database import models as m
+from app.utils.ctx import Context
+
+# snapshot 에 없는 id 로 인한 재로딩의 최소 간격 (없는 id 요청이 몰려도 DB 를 두드리지 않도록)
+_MISS_RELOAD_INTERVAL = 1.0
+
+
+# `BoardEntry` 필드 순서 (INSERT / UPDATE ... RETURNING 에도 사용)
+BOARD_ENTRY_COLUMNS = (
+    m.Board.id,
+    m.Board.title,
+    m.Board.created_at,
+    m.Board.updated_at,
+    m.Board.written_user_id,
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class BoardEntry:
+    id: int
+    title: str
+    created_at: datetime.datetime
+    updated_at: datetime.datetime
+    written_user_id: int | None
+
+
+@dataclasses.dataclass(frozen=True)
+class BoardSnapshot:
+    boards: tuple[BoardEntry, ...]  # id 순
+    by_id: Mapping[int, BoardEntry]
+    by_title: Mapping[str, BoardEntry]
+    loaded_at: float
+
+    @classmethod
+    def build(cls, boards: list[BoardEntry], loaded_at: float) -> BoardSnapshot:
+        return cls(
+            boards=tuple(boards),
+            by_id={board.id: board for board in boards},
+            by_title={board.title: board for board in boards},
+            loaded_at=loaded_at,
+        )
+
+
+class BoardDirectory:
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl = ttl
+        self._clock = clock
+        self._snapshot: BoardSnapshot | None = None
+        self._lock = asyncio.Lock()  # 재로딩은 한 번에 하나씩
+
+    async def snapshot(self) -> BoardSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and (
+            self._clock() - snapshot.loaded_at < self.ttl or self._lock.locked()
+        ):
+            # 이미 다른 요청이 다시 읽고 있으면 기다리지 않고 이전 snapshot 을 쓴다
+            return snapshot
+
+        async with self._lock:
+            if self._snapshot is not snapshot:  # 기다리는 동안 다른 요청이 읽어 옴
+                return self._snapshot  # type: ignore
+            return await self._load()
+
+    async def get(self, board_id: int) -> BoardEntry | None:
+        snapshot = await self.snapshot()
+        board = snapshot.by_id.get(board_id)
+        if (
+            board is None
+            and self._clock() - snapshot.loaded_at >= _MISS_RELOAD_INTERVAL
+        ):
+            # 다른 worker 가 막 만든 board 일 수 있다
+            board = (await self.refresh()).by_id.get(board_id)
+        return board
+
+    async def get_by_title(self, title: str) -> BoardEntry | None:
+        return (await self.snapshot()).by_title.get(title)
+
+    async def refresh(self) -> BoardSnapshot:
+        async with self._lock:
+            return await self._load()
+
+    async def put(self, board: BoardEntry) -> None:
+        """commit 된 board 생성 / 수정을 snapshot 에 반영한다. (DB 조회 없음)"""
+        async with self._lock:  # 진행 중인 재로딩이 끝난 뒤에 적용
+            if self._snapshot is None:  # 다음 사용 때 DB 에서 읽는다
+                return
+            boards = {**self._snapshot.by_id, board.id: board}
+            self._replace(sorted(boards.values(), key=operator.attrgetter("id")))
+
+    async def discard(self, board_id: int) -> None:
+        """commit 된 board 삭제를 snapshot 에 반영한다."""
+        async with self._lock:
+            if self._snapshot is None:
+                return
+            self._replace(
+                [board for board in self._snapshot.boards if board.id != board_id]
+            )
+
+    def _replace(self, boards: list[BoardEntry]) -> None:
+        # TTL 은 마지막으로 DB 에서 읽은 시각 기준
+        self._snapshot = BoardSnapshot.build(boards, self._snapshot.loaded_at)  # type: ignore
+
+    async def _load(self) -> BoardSnapshot:
+        loaded_at = self._clock()
+        rows = await Context.current.db.session.execute(
+            sql_exp.select(*BOARD_ENTRY_COLUMNS).order_by(m.Board.id)
+        )
+        self._snapshot = BoardSnapshot.build(
+            [BoardEntry(*row) for row in rows], loaded_at
+        )
+        return self._snapshot
@@ -0,0 +1,355 @@
+"""
+응답 캐시.
+
+단건 GET (post / comment) 응답의 ETag 와 직렬화된 JSON (bytes) 을 key 별로 저장한다.
+hit 이면 DB 조회도, pydantic 직렬화도 하지 않는다.
+
+- key: "post:{post_id}", "comment:{post_id}:{comment_id}"  (board 는 `BoardDirectory`),
+  "hashtag_trending:{window}:{count}:{bucket}" (다음 bucket 이 시작될 때 만료)
+- `RESPONSE_CACHE_TTL` 초가 지나면 만료.
+- 데이터를 바꾸는 handler 는 commit 뒤에 관련 key 를 지운다.
+- 캐시를 채우는 조회는 primary 에서 한다 (`DbConn.use_primary`). replica 에서 읽으면
+  무효화 직후에 lag 이 있는 replica 의 수정 전 값이 다시 들어갈 수 있다.
+
+backend 는 `CACHE_BACKEND` 로 고른다.
+
+- "memory": worker 프로세스마다 따로 갖는 LRU. (`RESPONSE_CACHE_MAX_BYTES` 를 넘으면 가장
+  오래 안 쓴 것부터 버림) 다른 worker 의 무효화는 TTL 이 지나야 반영된다.
+- "redis": 모든 worker 가 같이 쓰는 redis. 무효화가 바로 모든 worker 에 보인다.
+"""
+from __future__ import annotations
+
+import abc
+import collections
+import dataclasses
+import logging
+import re
+import time
+from typing import TYPE_CHECKING, Callable, Iterable, Mapping, Sequence
+
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+    from app.settings import AppSettings
+
+try:
+    from redis.exceptions import RedisError
+except ImportError:  # redis 를 설치하지 않은 경우 ("memory" backend 만 사용)
+
+    class RedisError(Exception):  # type: ignore[no-redef]
+        pass
+
+
+logger = logging.getLogger(__name__)
+
+# key / value 외에 entry 하나가 차지하는 대략의 메모리 (OrderedDict node, tuple, float)
+_ENTRY_OVERHEAD_BYTES = 128
+
+
+@dataclasses.dataclass
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int  # 메모리 상한 때문에 버린 수 (TTL 만료, 무효화는 제외)
+    entries: int
+    size_bytes: int
+    max_bytes: int
+
+
+class LRUCache:
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        # key -> (만료 시각, value), 앞쪽이 가장 오래 안 쓴 것
+        self._entries: collections.OrderedDict[str, tuple[float, bytes]] = (
+            collections.OrderedDict()
+        )
+        self._size_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def _entry_size(key: str, value: bytes) -> int:
+        return len(key) + len(value) + _ENTRY_OVERHEAD_BYTES
+
+    def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            self._pop(key)
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return value
+
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        self._pop(key)
+
+        size = self._entry_size(key, value)
+        if size > self.max_bytes:  # 혼자서 상한을 넘는 값은 저장하지 않는다
+            return
+
+        while self._size_bytes + size > self.max_bytes:
+            self._pop(next(iter(self._entries)))
+            self._evictions += 1
+
+        self._entries[key] = (self._clock() + (self.ttl if ttl is None else ttl), value)
+        self._size_bytes += size
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._pop(key)
+
+    def delete_prefix(self, prefix: str) -> None:
+        """
+        prefix 로 시작하는 key 를 모두 지운다. 전체를 훑으므로 드문 작업 (cascade 삭제) 에만.
+        """
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            self._pop(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size_bytes = 0
+
+    def _pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size_bytes -= self._entry_size(key, entry[1])
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            entries=len(self._entries),
+            size_bytes=self._size_bytes,
+            max_bytes=self.max_bytes,
+        )
+
+
+class CacheBackend(abc.ABC):
+    """`Context.cache` 의 인터페이스. 값은 bytes, ttl 은 초 (None 이면 backend 기본값)"""
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> bytes | None:
+        ...
+
+    @abc.abstractmethod
+    async def get_many(self, keys: Sequence[str]) -> list[bytes | None]:
+        """keys 순서대로, 한 번의 왕복으로 읽는다."""
+
+    @abc.abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def set_many(
+        self, items: Mapping[str, bytes], ttl: float | None = None
+    ) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def delete_prefix(self, prefix: str) -> None:
+        """prefix 로 시작하는 key 를 모두 지운다. 전체를 훑으므로 드문 작업에만."""
+
+    @abc.abstractmethod
+    async def stats(self) -> CacheStats:
+        ...
+
+    async def delete(self, *keys: str) -> None:
+        await self.delete_many(keys)
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    def __init__(self, lru: LRUCache) -> None:
+        self.lru = lru
+
+    async def get(self, key: str) -> bytes | None:
+        return self.lru.get(key)
+
+    async def get_many(self, keys: Sequence[str]) -> list[bytes | None]:
+        return [self.lru.get(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        self.lru.set(key, value, ttl)
+
+    async def set_many(
+        self, items: Mapping[str, bytes], ttl: float | None = None
+    ) -> None:
+        for key, value in items.items():
+            self.lru.set(key, value, ttl)
+
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        self.lru.delete(*keys)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        self.lru.delete_prefix(prefix)
+
+    async def stats(self) -> CacheStats:
+        return self.lru.stats()
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    redis (또는 같은 프로토콜의 서버) 를 쓰는 backend.
+    redis 장애는 요청을 실패시키지 않고 miss / no-op 으로 처리한다. (DB 로 fallback)
+    """
+
+    def __init__(self, client: Redis, ttl: float, key_prefix: str = "") -> None:
+        self.client = client
+        self.ttl = ttl
+        self.key_prefix = key_prefix
+        # hit / miss 는 이 worker 기준
+        self._hits = 0
+        self._misses = 0
+
+    def _key(self, key: str) -> str:
+        return self.key_prefix + key
+
+    def _px(self, ttl: float | None) -> int:
+        return max(1, int((self.ttl if ttl is None else ttl) * 1000))
+
+    def _count(self, values: list[bytes | None]) -> list[bytes | None]:
+        hits = sum(value is not None for value in values)
+        self._hits += hits
+        self._misses += len(values) - hits
+        return values
+
+    async def get(self, key: str) -> bytes | None:
+        return (await self.get_many([key]))[0]
+
+    async def get_many(self, keys: Sequence[str]) -> list[bytes | None]:
+        if not keys:
+            return []
+        try:
+            values = await self.client.mget([self._key(key) for key in keys])
+        except RedisError:
+            logger.warning("Cache get failed", exc_info=True)
+            values = [None] * len(keys)
+        return self._count(values)
+
+    async def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        await self.set_many({key: value}, ttl)
+
+    async def set_many(
+        self, items: Mapping[str, bytes], ttl: float | None = None
+    ) -> None:
+        if not items:
+            return
+        px = self._px(ttl)
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.set(self._key(key), value, px=px)
+                await pipe.execute()
+        except RedisError:
+            logger.warning("Cache set failed", exc_info=True)
+
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        redis_keys = [self._key(key) for key in keys]
+        if not redis_keys:
+            return
+        try:
+            await self.client.unlink(*redis_keys)
+        except RedisError:
+            logger.warning("Cache delete failed", exc_info=True)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        # SCAN 은 glob 패턴이므로 특수문자를 escape
+        pattern = re.sub(r"([*?\[\]\\])", r"\\\1", self._key(prefix)) + "*"
+        try:
+            batch = []
+            async for redis_key in self.client.scan_iter(match=pattern, count=500):
+                batch.append(redis_key)
+                if len(batch) >= 500:
+                    await self.client.unlink(*batch)
+                    batch = []
+            if batch:
+                await self.client.unlink(*batch)
+        except RedisError:
+            logger.warning("Cache delete failed", exc_info=True)
+
+    async def stats(self) -> CacheStats:
+        # entries / size / evictions 는 redis 서버 전체 기준 (INFO 를 못 쓰면 0)
+        try:
+            info = await self.client.info()
+        except RedisError:
+            info = {}
+        try:
+            entries = await self.client.dbsize()
+        except RedisError:
+            entries = 0
+        return CacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=info.get("evicted_keys", 0),
+            entries=entries,
+            size_bytes=info.get("used_memory", 0),
+            max_bytes=info.get("maxmemory", 0),
+        )
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+def create_cache_backend(app_settings: AppSettings) -> CacheBackend:
+    if app_settings.CACHE_BACKEND == "redis":
+        from redis.asyncio import Redis
+
+        return RedisCacheBackend(
+            Redis.from_url(app_settings.CACHE_REDIS_URL),
+            ttl=app_settings.RESPONSE_CACHE_TTL,
+            key_prefix=app_settings.CACHE_KEY_PREFIX,
+        )
+
+    return MemoryCacheBackend(
+        LRUCache(
+            max_bytes=app_settings.RESPONSE_CACHE_MAX_BYTES,
+            ttl=app_settings.RESPONSE_CACHE_TTL,
+        )
+    )
+
+
+async def get_cached(cache: CacheBackend, key: str) -> tuple[str, bytes] | None:
+    """(ETag, 직렬화된 본문)"""
+    value = await cache.get(key)
+    if value is None:
+        return None
+    etag, _, body = value.partition(b"\n")
+    return etag.decode("ascii"), body
+
+
+async def set_cached(
+    cache: CacheBackend,
+    key: str,
+    etag: str,
+    model: BaseModel,
+    ttl: float | None = None,
+) -> bytes:
+    """model 을 한 번만 직렬화해서 ETag 와 같이 캐시에 넣고, 본문을 반환한다."""
+    body = model.json().encode("utf-8")
+    # ETag 에는 줄바꿈이 없으므로 첫 줄로 붙여 bytes 하나로 저장
+    await cache.set(key, etag.encode("ascii") + b"\n" + body, ttl)
+    return body
@@ -1,22 +1,35 @@
 from __future__ import annotations
 
 import contextlib
+import functools
+import itertools
 import logging
+import os
 import uuid
 from contextvars import ContextVar
 from typing import TYPE_CHECKING, AsyncIterator, NamedTuple
 
 import boto3
 from mypy_boto3_s3 import S3Client
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.cache import CacheBackend, create_cache_backend
 
 if TYPE_CHECKING:
     from app.database.db import DbConn
+    from app.utils.board_directory import BoardDirectory
+    from app.utils.hashtag_index import HashtagIndex
     from app.settings import AppSettings
 
 logger = logging.getLogger(__name__)
 
 _current_context: ContextVar[Context] = ContextVar("_current_context")
 
+# request id = "{worker prefix}-{counter}" (uuid4 보다 훨씬 싸다)
+_REQUEST_ID_PREFIX = f"{os.getpid():x}{uuid.uuid4().hex[:4]}"
+_request_counter = itertools.count(1)
+
 class _current_context_getter:
     def __get__(self, obj, objtype=None):  # type: ignore
         return _current_context.get()
@@ -29,37 +42,123 @@ class Context(NamedTuple):
     settings: AppSettings
     db: DbConn
     s3: S3Client
+    cache: CacheBackend  # 단건 GET 응답 캐시 (`CACHE_BACKEND`)
+    boards: BoardDirectory  # board 전체 snapshot (프로세스 단위)
+    hashtags: HashtagIndex  # hashtag 자동완성 index (프로세스 단위)
 
-    id: str | None = None
+    id: str | None = None  # 항상 마지막 필드로 유지 (`_new_request_context`)
 
 
 async def create_app_ctx(app_settings: AppSettings) -> Context:
     from app.database.db import DbConn
+    from app.utils.board_directory import BoardDirectory
+    from app.utils.hashtag_index import HashtagIndex
 
     return Context(
         settings=app_settings,
-        db=DbConn(app_settings.DATABASE_URL),
+        db=DbConn(app_settings),
         s3=boto3.client(
             service_name="s3",
             region_name="ap-northeast-2",
             aws_access_key_id=app_settings.AWS_ACCESS_KEY_ID,
             aws_secret_access_key=app_settings.AWS_SECRET_ACCESS_KEY,
         ),
+        cache=create_cache_backend(app_settings),
+        boards=BoardDirectory(ttl=app_settings.BOARD_DIRECTORY_TTL),
+        hashtags=HashtagIndex(ttl=app_settings.HASHTAG_INDEX_TTL),
+    )
+
+
+def _new_request_context(app_ctx: Context) -> Context:
+    # `_replace` 보다 싸다
+    return Context._make(
+        (*app_ctx[:-1], f"{_REQUEST_ID_PREFIX}-{next(_request_counter)}")
     )
 
 
+async def _clear_request_session(app_ctx: Context) -> None:
+    try:
+        await app_ctx.db.clear_scoped_session()  # 7
+    except Exception:
+        logger.warning("Failed to clear scoped session", exc_info=True)
+
+
 @contextlib.asynccontextmanager
 async def bind_context(app_ctx: Context) -> AsyncIterator[None]:
-    ctx_token = _current_context.set(app_ctx._replace(id=str(uuid.uuid4())))  # 4
+    ctx_token = _current_context.set(_new_request_context(app_ctx))  # 4
     try:
         yield  # 5
     finally:
-        try:
-            await app_ctx.db.clear_scoped_session()  # 7
-        except Exception:
-            logger.warning("Failed to clear scoped session", exc_info=True)
+        if app_ctx.db.has_scoped_session:  # DB 를 쓰지 않은 요청은 정리할 것이 없다
+            await _clear_request_session(app_ctx)
 
         _current_context.reset(ctx_token)  # 9
 
 
+class ContextMiddleware:
+    """
+    요청(http, websocket)마다 `bind_context` 를 적용하는 pure ASGI 미들웨어.
+    BaseHTTPMiddleware 와 달리 task / memory stream 을 거치지 않고,
+    응답 body 가 모두 전송될 때까지 context 가 유지된다.
+    """
+
+    def __init__(self, app: ASGIApp, app_ctx: Context) -> None:
+        self.app = app
+        self.app_ctx = app_ctx
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):  # lifespan
+            await self.app(scope, receive, send)
+            return
+
+        if scope["type"] == "http" and self.app_ctx.settings.SQL_INSTRUMENTATION:
+            send = functools.partial(_send_with_query_stats, scope, send)
+
+        # `bind_context` 와 같은 동작 (요청마다 asynccontextmanager 를 만들지 않도록 풀어 씀)
+        ctx_token = _current_context.set(_new_request_context(self.app_ctx))  # 3
+        try:
+            await self.app(scope, receive, send)  # 6
+        finally:
+            if self.app_ctx.db.has_scoped_session:
+                await _clear_request_session(self.app_ctx)
+
+            _current_context.reset(ctx_token)
+
+
+async def _send_with_query_stats(scope: Scope, send: Send, message: Message) -> None:
+    if message["type"] == "http.response.start":
+        ctx = Context.current
+        query_stats = ctx.db.query_stats
+        if query_stats is not None:
+            MutableHeaders(scope=message).append(
+                "Server-Timing",
+                query_stats.server_timing(ctx.settings.DEBUG_SQL_SERVER_TIMING),
+            )
+            logger.info(
+                "sql_stats request_id=%s method=%s path=%s status=%d "
+                "count=%d total_ms=%.2f slowest_ms=%.2f slowest=%r",
+                ctx.id,
+                scope["method"],
+                scope["path"],
+                message["status"],
+                query_stats.count,
+                query_stats.total * 1000,
+                query_stats.slowest * 1000,
+                query_stats.slowest_statement,
+            )
+
+            threshold = ctx.settings.SQL_REPEATED_STATEMENT_WARNING
+            if threshold:
+                for statement, cnt in query_stats.repeated(threshold).items():
+                    logger.warning(
+                        "Possible N+1: request_id=%s path=%s executed x%d %r",
+                        ctx.id,
+                        scope["path"],
+                        cnt,
+                        statement,
+                    )
+
+    await send(message)
+
+
 Context.current = _current_context_getter()  # type: ignore
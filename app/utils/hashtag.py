@@ -0,0 +1,158 @@
+"""
+본문의 hashtag 추출과 post <-> hashtag link 쓰기.
+
+link 를 쓰거나 지우는 statement 가 같은 statement 안에서 (data-modifying CTE)
+`hashtag_trend` 의 시간 bucket 도 같이 고치므로, 둘이 어긋나지 않는다.
+"""
+import datetime
+import re
+from collections import Counter
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.sql import ColumnElement
+from sqlalchemy.sql import expression as sql_exp
+from sqlalchemy.sql import func as sql_func
+
+from app.database import models as m
+from app.utils.ctx import Context
+
+# `#` 뒤에 이어지는 영문 / 숫자 / 한글 (`#` 만 있는 빈 tag 는 제외)
+HASHTAG_REGEX = re.compile(r"#([0-9a-zA-Z가-힣]+)")
+
+TREND_BUCKET = datetime.timedelta(hours=1)
+
+
+def extract_hashtags(content: str | None) -> list[str]:
+    """
+    본문의 hashtag 이름 (중복 제거, 정렬)
+    정렬해 두면 동시에 같은 tag 를 쓰는 요청들이 같은 순서로 row lock 을 잡는다.
+    """
+    if not content or "#" not in content:
+        return []
+    return sorted(set(HASHTAG_REGEX.findall(content)))
+
+
+def trend_bucket(moment: datetime.datetime) -> datetime.datetime:
+    """moment 가 속한 bucket 의 시작 시각 (UTC 정시, `trend_bucket_sql` 과 같은 값)"""
+    return moment.astimezone(datetime.timezone.utc).replace(
+        minute=0, second=0, microsecond=0
+    )
+
+
+def trend_bucket_sql(moment):
+    """
+    `trend_bucket` 의 SQL 버전.
+    timestamptz 에 바로 date_trunc 하면 session 의 TimeZone 기준으로 자르므로 UTC 로 바꿔서 자른다.
+
+    date_trunc('hour', moment AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+    """
+    return sql_func.timezone(
+        "UTC", sql_func.date_trunc("hour", sql_func.timezone("UTC", moment))
+    )
+
+
+async def add_post_hashtags(post_id: int, names: list[str]) -> Counter[str]:
+    """
+    tag 와 link 를 각각 INSERT 한 번으로 쓴다. (link 는 새로 생긴 것만 bucket 에 더함)
+    tag 별 사용 수 변화 (새로 생긴 link) 를 반환한다. (commit 뒤 `HashtagIndex.update_usage`)
+
+    INSERT INTO hashtag (name) VALUES ('code'), ('camp') ON CONFLICT DO NOTHING;
+    WITH linked AS (
+        INSERT INTO connect_post_hashtag (post_id, hashtag_name) VALUES (1, 'code'), (1, 'camp')
+        ON CONFLICT DO NOTHING RETURNING hashtag_name, created_at
+    )
+    INSERT INTO hashtag_trend (hashtag_name, bucket, post_cnt)
+    SELECT hashtag_name, <UTC 정시 (trend_bucket_sql)>, 1 FROM linked
+    ON CONFLICT (bucket, hashtag_name) DO UPDATE SET post_cnt = hashtag_trend.post_cnt + 1
+    RETURNING hashtag_name;
+    """
+    if not names:
+        return Counter()
+
+    await Context.current.db.session.execute(
+        pg_insert(m.Hashtag)
+        .values([{"name": name} for name in names])
+        .on_conflict_do_nothing()  # This is only available with postgresql
+    )
+
+    # CTE 안의 DML 은 ORM entity 가 아닌 Table 로 만들어야 한다
+    post_hashtag = m.PostHashTag.__table__
+    linked = (
+        pg_insert(post_hashtag)
+        .values([{"post_id": post_id, "hashtag_name": name} for name in names])
+        .on_conflict_do_nothing()
+        .returning(post_hashtag.c.hashtag_name, post_hashtag.c.created_at)
+        .cte("linked")
+    )
+    trend_insert = pg_insert(m.HashtagTrend).from_select(
+        ["hashtag_name", "bucket", "post_cnt"],
+        sql_exp.select(
+            linked.c.hashtag_name,
+            trend_bucket_sql(linked.c.created_at),
+            sql_exp.literal(1),
+        ),
+    )
+    linked_names = await Context.current.db.session.scalars(
+        trend_insert.on_conflict_do_update(
+            index_elements=[m.HashtagTrend.bucket, m.HashtagTrend.hashtag_name],
+            set_={
+                "post_cnt": m.HashtagTrend.post_cnt + trend_insert.excluded.post_cnt,
+                "updated_at": sql_func.current_timestamp(),
+            },
+        )
+        .returning(m.HashtagTrend.hashtag_name)
+        .add_cte(linked)
+    )
+    return Counter(linked_names)
+
+
+async def remove_post_hashtags(condition: ColumnElement[bool]) -> Counter[str]:
+    """
+    `condition` 에 맞는 link 를 지우고, 각 link 가 더해졌던 bucket 에서 뺀다.
+    post 를 지울 때도 FK cascade 에 맡기기 전에 불러야 bucket 이 맞는다.
+    tag 별 사용 수 변화 (음수) 를 반환한다.
+
+    WITH unlinked AS (DELETE FROM connect_post_hashtag WHERE ... RETURNING hashtag_name, created_at),
+    trended AS (
+        UPDATE hashtag_trend SET post_cnt = hashtag_trend.post_cnt - removed.post_cnt
+        FROM (SELECT hashtag_name, <UTC 정시> AS bucket, count(*) AS post_cnt
+              FROM unlinked GROUP BY 1, 2) AS removed
+        WHERE ... RETURNING hashtag_trend.hashtag_name
+    )
+    SELECT hashtag_name, count(*) FROM unlinked GROUP BY hashtag_name;
+    """
+    post_hashtag = m.PostHashTag.__table__
+    hashtag_trend = m.HashtagTrend.__table__
+    unlinked = (
+        sql_exp.delete(post_hashtag)
+        .where(condition)
+        .returning(post_hashtag.c.hashtag_name, post_hashtag.c.created_at)
+        .cte("unlinked")
+    )
+    bucket = trend_bucket_sql(unlinked.c.created_at)
+    removed = (
+        sql_exp.select(
+            unlinked.c.hashtag_name,
+            bucket.label("bucket"),
+            sql_func.count().label("post_cnt"),
+        )
+        .group_by(unlinked.c.hashtag_name, bucket)
+        .subquery("removed")
+    )
+    # 지난 bucket 이 정리 (prune) 되어 없더라도 사용 수는 unlinked 에서 센다
+    trended = (
+        sql_exp.update(hashtag_trend)
+        .where(
+            (hashtag_trend.c.hashtag_name == removed.c.hashtag_name)
+            & (hashtag_trend.c.bucket == removed.c.bucket)
+        )
+        .values(post_cnt=hashtag_trend.c.post_cnt - removed.c.post_cnt)
+        .returning(hashtag_trend.c.hashtag_name)
+        .cte("trended")
+    )
+    rows = await Context.current.db.session.execute(
+        sql_exp.select(unlinked.c.hashtag_name, sql_func.count())
+        .group_by(unlinked.c.hashtag_name)
+        .add_cte(trended)
+    )
+    return Counter({name: -cnt for name, cnt in rows})
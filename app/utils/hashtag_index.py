@@ -0,0 +1,127 @@
+"""
+hashtag 자동완성용 메모리 index.
+
+(소문자 이름, 이름) 을 정렬해 둔 배열에서 bisect 로 prefix 범위를 찾고,
+그 안에서 사용 수 (tag 가 붙은 post 수) 가 많은 순으로 k 개를 고른다. DB 조회 없음.
+
+- 첫 사용 때 hashtag / connect_post_hashtag 에서 읽어 온다.
+- post 의 tag 가 바뀌면 handler 가 commit 뒤에 `update_usage()` 로 반영한다.
+  (새 tag 는 bisect 로 삽입)
+- 다른 worker 의 변경은 `HASHTAG_INDEX_TTL` 이 지나 다시 읽을 때 반영된다.
+- 짧은 prefix 처럼 범위가 넓으면 고르는 데 오래 걸리므로 상위 `MAX_SUGGESTIONS` 개를
+  기억해 두고 (요청한 개수만큼 잘라서 씀), 사용 수가 바뀌면 그 자리에서 고친다.
+  (결과에 있던 tag 가 줄어들 때만 다시 고름)
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import heapq
+import time
+from typing import Callable, Mapping
+
+from sqlalchemy.sql import expression as sql_exp
+from sqlalchemy.sql import func as sql_func
+
+from app.database import models as m
+from app.utils.ctx import Context
+
+# 한 번에 돌려주는 최대 개수 (`GET /hashtag/suggest` 의 count 상한)
+MAX_SUGGESTIONS = 50
+# prefix 범위가 이보다 넓으면 상위 `MAX_SUGGESTIONS` 개를 기억해 둔다
+_MEMO_RANGE_SIZE = 1000
+
+
+class HashtagIndex:
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.ttl = ttl
+        self._clock = clock
+        self._keys: list[tuple[str, str]] = []  # (name.casefold(), name), 정렬
+        self._usage: dict[str, int] = {}  # name -> post 수
+        # prefix -> 상위 `MAX_SUGGESTIONS` 개
+        self._memo: dict[str, list[tuple[str, int]]] = {}
+        self._loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    async def suggest(self, prefix: str, limit: int) -> list[tuple[str, int]]:
+        """
+        prefix 로 시작하는 (대소문자 무시) tag 중 사용 수가 많은 순 (같으면 이름순)
+        limit 은 1 ~ `MAX_SUGGESTIONS`
+        """
+        await self._ensure_loaded()
+
+        key = prefix.casefold()
+        memo = self._memo.get(key)
+        if memo is not None:
+            return memo[:limit]
+
+        keys, usage = self._keys, self._usage
+        start = bisect.bisect_left(keys, (key,))
+        end = bisect.bisect_left(keys, (key + "\U0010ffff",), lo=start)
+        memoize = end - start > _MEMO_RANGE_SIZE
+
+        suggestions = heapq.nsmallest(
+            MAX_SUGGESTIONS if memoize else limit,
+            ((name, usage[name]) for _, name in keys[start:end]),
+            key=lambda item: (-item[1], item[0]),
+        )
+        if memoize:
+            self._memo[key] = suggestions
+        return suggestions[:limit]
+
+    def update_usage(self, delta: Mapping[str, int]) -> None:
+        """
+        commit 된 tag 사용 수 변화를 반영한다.
+        (`add_post_hashtags` / `remove_post_hashtags` 의 결과)
+        """
+        if self._loaded_at is None:  # 다음 사용 때 DB 에서 읽는다
+            return
+
+        for name, change in delta.items():
+            key = name.casefold()
+            if name not in self._usage:
+                bisect.insort(self._keys, (key, name))
+                self._usage[name] = 0
+            self._usage[name] = max(self._usage[name] + change, 0)
+
+            for i in range(1, len(key) + 1):  # 이 tag 가 속한 prefix 의 기억해 둔 결과
+                if key[:i] in self._memo:
+                    self._update_memo(key[:i], name, change)
+
+    def _update_memo(self, prefix: str, name: str, change: int) -> None:
+        suggestions = self._memo[prefix]
+        if change > 0:
+            # 늘어난 tag 는 들어가거나 순위만 오른다
+            suggestions = [item for item in suggestions if item[0] != name]
+            suggestions.append((name, self._usage[name]))
+            suggestions.sort(key=lambda item: (-item[1], item[0]))
+            self._memo[prefix] = suggestions[:MAX_SUGGESTIONS]
+        elif any(listed_name == name for listed_name, _ in suggestions):
+            # 결과 밖의 tag 가 대신 들어올 수 있으므로 다음 요청에서 다시 고른다
+            del self._memo[prefix]
+
+    async def _ensure_loaded(self) -> None:
+        if self._loaded_at is not None and (
+            self._clock() - self._loaded_at < self.ttl or self._lock.locked()
+        ):
+            return
+
+        async with self._lock:
+            loaded_at = self._loaded_at
+            if loaded_at is not None and self._clock() - loaded_at < self.ttl:
+                return  # 기다리는 동안 다른 요청이 읽어 옴
+            await self._load()
+
+    async def _load(self) -> None:
+        loaded_at = self._clock()
+        rows = await Context.current.db.session.execute(
+            sql_exp.select(m.Hashtag.name, sql_func.count(m.PostHashTag.post_id))
+            .outerjoin(m.PostHashTag, m.PostHashTag.hashtag_name == m.Hashtag.name)
+            .group_by(m.Hashtag.name)
+        )
+        usage = dict(rows.all())
+        # 만든 뒤 통째로 교체
+        self._keys = sorted((name.casefold(), name) for name in usage)
+        self._usage = usage
+        self._memo = {}
+        self._loaded_at = loaded_at
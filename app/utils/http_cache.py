@@ -0,0 +1,83 @@
+"""
+ETag / If-None-Match 조건부 응답.
+
+- 단건 GET: `updated_at` (post 는 `like_cnt` 도) 로 만든 strong ETag.
+  If-None-Match 가 오면 그 컬럼만 조회해서 비교하고, 같으면 본문 없이 304.
+- 검색 (POST /search): 직렬화한 본문의 hash 로 만든 weak ETag. (전송량만 줄어듦)
+  RFC 7232 §3.2 는 GET / HEAD 가 아닌 요청의 If-None-Match 일치에 412 를 요구하지만,
+  검색 POST 는 아무것도 바꾸지 않는 조회라서 일부러 GET 처럼 304 로 답한다.
+  (데이터를 바꾸는 POST / PUT / DELETE 에는 쓰지 말 것)
+
+`Cache-Control: no-cache` 라 클라이언트 / nginx 는 저장은 하되 매번 ETag 로 재검증한다.
+"""
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+from starlette.status import HTTP_304_NOT_MODIFIED
+
+CACHE_CONTROL = "no-cache"
+PRIVATE_CACHE_CONTROL = "private, no-cache"  # 로그인 유저에 따라 다른 응답 (공유 캐시 X)
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.blake2b(
+        "|".join(map(str, parts)).encode("utf-8"), digest_size=8
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def body_etag(body: bytes) -> str:
+    return f'W/"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    # If-None-Match 는 weak 비교 (W/ 무시)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    opaque_tag = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque_tag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str, cache_control: str = CACHE_CONTROL) -> Response:
+    return Response(
+        status_code=HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
+
+
+def json_response(
+    request: Request,
+    body: bytes,
+    etag: str,
+    cache_control: str = CACHE_CONTROL,
+) -> Response:
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
+
+
+def model_response(
+    request: Request,
+    model: BaseModel,
+    cache_control: str = CACHE_CONTROL,
+) -> Response:
+    """
+    본문 hash 를 ETag 로 쓰는 응답 (검색처럼 싸게 검증할 컬럼이 없는 경우)
+    method 와 상관없이 If-None-Match 가 맞으면 304 (조회용 POST 도, 모듈 docstring 참고)
+    """
+    body = model.json().encode("utf-8")
+    return json_response(request, body, body_etag(body), cache_control)
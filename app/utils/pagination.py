@@ -0,0 +1,152 @@
+import base64
+import binascii
+import dataclasses
+import json
+from typing import Any, Literal, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import Table
+from sqlalchemy.dialects.postgresql import REGCLASS
+from sqlalchemy.sql import Select
+from sqlalchemy.sql import expression as sql_exp
+from sqlalchemy.sql import func as sql_func
+from starlette.status import HTTP_400_BAD_REQUEST
+
+from app.database.explain import Explain, plan_rows
+from app.utils.ctx import Context
+
+
+def encode_cursor(values: list[Any]) -> str:
+    """keyset pagination 용 opaque cursor (json -> urlsafe base64)"""
+    return base64.urlsafe_b64encode(
+        json.dumps(values, separators=(",", ":"), default=str).encode("utf-8")
+    ).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, binascii.Error):
+        values = None
+
+    if not isinstance(values, list):
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="The cursor is invalid.",
+        )
+
+    return values
+
+
+CountMode = Literal["exact"] | Literal["none"] | Literal["estimate"] | Literal["has_more"]
+
+
+@dataclasses.dataclass
+class Page:
+    rows: list[Any]
+    count: int | None  # count_mode 가 "exact"/"estimate" 일 때만
+    has_more: bool | None  # count_mode 가 "has_more" 일 때만
+    found: bool  # False 면 조건에 맞는 행이 하나도 없다
+
+
+async def estimate_rows(query: Select) -> int:
+    """
+    조건 없는 단일 테이블 조회는 pg_class.reltuples 를, 그 외에는 planner 의 예상치를 쓴다.
+    둘 다 통계 기반이라 ANALYZE 주기만큼 어긋날 수 있다.
+    """
+    session = Context.current.db.session
+    froms = query.get_final_froms()
+
+    if query.whereclause is None and len(froms) == 1 and isinstance(froms[0], Table):
+        reltuples: float = await session.scalar(
+            sql_exp.select(sql_exp.column("reltuples"))
+            .select_from(sql_exp.table("pg_class"))
+            .where(
+                sql_exp.column("oid")
+                == sql_exp.cast(sql_func.quote_ident(froms[0].name), REGCLASS)
+            )
+        )
+        if reltuples >= 0:  # -1: 아직 VACUUM/ANALYZE 된 적 없는 테이블
+            return int(reltuples)
+
+    return plan_rows(await session.scalar(Explain(query)))
+
+
+async def count_rows(query: Select, count_mode: CountMode) -> int | None:
+    if count_mode == "exact":
+        return await Context.current.db.session.scalar(
+            sql_exp.select(sql_func.count()).select_from(query.subquery())
+        )
+    if count_mode == "estimate":
+        return await estimate_rows(query)
+    return None
+
+
+async def fetch_page(
+    query: Select,
+    *,
+    count_mode: CountMode,
+    offset: int,
+    limit: int,
+) -> Page:
+    """
+    정렬까지 끝난 `select(Model)` 의 한 페이지를 가져온다.
+
+    "exact" 는 `count() over ()` 로 전체 개수를 페이지와 한 번에 가져오고,
+    "has_more" 는 limit + 1 개를 읽어 다음 페이지 여부만 알려준다.
+    """
+    session = Context.current.db.session
+
+    if count_mode == "exact":
+        result = await session.execute(
+            query.add_columns(sql_func.count().over().label("total_cnt"))
+            .offset(offset)
+            .limit(limit)
+        )
+        rows = result.all()
+        if rows:
+            count = rows[0].total_cnt
+        elif offset > 0:  # 페이지를 넘어서면 window 결과가 없으니 따로 센다
+            count = await count_rows(query, "exact")
+        else:
+            count = 0
+        return Page(
+            rows=[row[0] for row in rows],
+            count=count,
+            has_more=None,
+            found=count > 0,
+        )
+
+    if count_mode == "has_more":
+        rows = (await session.scalars(query.offset(offset).limit(limit + 1))).all()
+        return Page(
+            rows=rows[:limit],
+            count=None,
+            has_more=len(rows) > limit,
+            found=bool(rows) or offset > 0,
+        )
+
+    rows = (await session.scalars(query.offset(offset).limit(limit))).all()
+    return Page(
+        rows=rows,
+        count=await count_rows(query, count_mode),
+        has_more=None,
+        found=bool(rows) or offset > 0,
+    )
+
+
+def slice_page(
+    items: Sequence[Any],
+    *,
+    count_mode: CountMode,
+    offset: int,
+    limit: int,
+) -> Page:
+    """이미 메모리에 있는 (정렬까지 끝난) 목록의 한 페이지. `fetch_page` 와 같은 `Page` 를 돌려준다."""
+    return Page(
+        rows=list(items[offset : offset + limit]),
+        # 메모리에서는 세는 비용이 없으므로 "estimate" 도 정확한 값
+        count=len(items) if count_mode in ("exact", "estimate") else None,
+        has_more=offset + limit < len(items) if count_mode == "has_more" else None,
+        found=bool(items),
+    )
@@ -0,0 +1,94 @@
+"""
+벤치마크 공용 유틸.
+
+모든 벤치마크는 `.env.test` 의 DB 를 사용하고, 실행할 때마다 테이블을 새로 만든다.
+(개발 DB 를 지우지 않도록 주의!)
+"""
+import statistics
+import time
+from typing import Awaitable, Callable, NamedTuple
+
+from app.database import models as m
+from app.database.base_ import ModelBase
+from app.settings import AppSettings
+from app.utils.ctx import Context, bind_context, create_app_ctx
+
+BENCH_ENV_FILE = ".env.test"
+
+
+class SeedIds(NamedTuple):
+    user_id: int
+    board_id: int
+    post_id: int
+
+
+def bench_settings(**overrides) -> AppSettings:
+    return AppSettings(_env_file=BENCH_ENV_FILE).copy(update=overrides)
+
+
+async def seed(app_settings: AppSettings, post_cnt: int = 100) -> SeedIds:
+    app_ctx = await create_app_ctx(app_settings)
+    try:
+        async with bind_context(app_ctx):
+            async with Context.current.db.engine.begin() as conn:
+                await conn.run_sync(ModelBase.metadata.drop_all)
+                await conn.run_sync(ModelBase.metadata.create_all)
+
+            session = Context.current.db.session
+            user = m.User(
+                email="bench@example.com",
+                password="-",
+                role=m.UserRoleEnum.Owner,
+            )
+            session.add(user)
+            await session.flush()
+
+            board = m.Board(title="bench", written_user_id=user.id)
+            session.add(board)
+            await session.flush()
+
+            posts = [
+                m.Post(
+                    title=f"bench post {i}",
+                    content=f"bench content {i} #bench",
+                    board_id=board.id,
+                    written_user_id=user.id,
+                )
+                for i in range(post_cnt)
+            ]
+            session.add_all(posts)
+            await session.commit()
+
+            return SeedIds(user_id=user.id, board_id=board.id, post_id=posts[0].id)
+    finally:
+        await app_ctx.db.dispose()
+
+
+async def measure(
+    fn: Callable[[], Awaitable[None]],
+    *,
+    iterations: int,
+    warmup: int = 50,
+) -> list[float]:
+    for _ in range(warmup):
+        await fn()
+
+    samples = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started_at)
+
+    return samples
+
+
+def summarize(label: str, samples: list[float]) -> str:
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return (
+        f"{label:<24} n={len(samples):<6} "
+        f"mean={statistics.fmean(samples) * 1000:8.3f}ms "
+        f"p50={statistics.median(samples) * 1000:8.3f}ms "
+        f"p99={p99 * 1000:8.3f}ms "
+        f"rps={len(samples) / sum(samples):10.1f}"
+    )
@@ -0,0 +1,83 @@
+"""
+context 바인딩 미들웨어 비교: BaseHTTPMiddleware(이전) vs pure ASGI `ContextMiddleware`.
+
+`GET /posts/{post_id}` 를 동시에 `concurrency` 개씩 보내 처리량을 잰다.
+
+    python -m bench.middleware [requests] [concurrency]
+"""
+import asyncio
+import sys
+import time
+
+from fastapi import FastAPI, Request, Response
+from httpx import AsyncClient
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+
+from app.apis import ALL_ROUTERS
+from app.utils.ctx import Context, ContextMiddleware, bind_context, create_app_ctx
+
+from ._common import bench_settings, seed
+
+
+def _create_app(app_ctx: Context, middleware: str) -> FastAPI:
+    app = FastAPI()
+    for api_router in ALL_ROUTERS:
+        app.include_router(api_router)
+
+    if middleware == "base_http":
+
+        async def _ctx_middleware(
+            request: Request, call_next: RequestResponseEndpoint
+        ) -> Response:
+            async with bind_context(app_ctx):
+                response = await call_next(request)
+            return response
+
+        app.add_middleware(BaseHTTPMiddleware, dispatch=_ctx_middleware)
+    else:
+        app.add_middleware(ContextMiddleware, app_ctx=app_ctx)
+
+    return app
+
+
+async def _run(middleware: str, post_id: int, requests: int, concurrency: int) -> float:
+    app_ctx = await create_app_ctx(bench_settings())
+    app = _create_app(app_ctx, middleware)
+
+    async with AsyncClient(app=app, base_url="http://bench") as client:
+
+        async def _worker(cnt: int) -> None:
+            for _ in range(cnt):
+                response = await client.get(f"/posts/{post_id}")
+                assert response.status_code == 200
+
+        await _worker(50)  # warm up
+
+        started_at = time.perf_counter()
+        await asyncio.gather(
+            *[_worker(requests // concurrency) for _ in range(concurrency)]
+        )
+        elapsed = time.perf_counter() - started_at
+
+    await app_ctx.db.dispose()
+    return elapsed
+
+
+async def main(requests: int, concurrency: int) -> None:
+    ids = await seed(bench_settings())
+
+    for middleware in ("base_http", "pure_asgi"):
+        elapsed = await _run(middleware, ids.post_id, requests, concurrency)
+        print(
+            f"{middleware:<12} requests={requests} concurrency={concurrency} "
+            f"elapsed={elapsed:.3f}s rps={requests / elapsed:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 3000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 8,
+        )
+    )
@@ -0,0 +1,123 @@
+"""
+요청 context 비용 비교 (요청당 CPU 시간).
+
+- legacy: uuid4 request id + `_replace` + 매 요청 `clear_scoped_session()`
+- current: counter request id + 세션이 만들어진 요청만 정리
+
+DB 를 쓰지 않는 요청(인증 실패 403, 없는 경로 404)을 raw ASGI 로 호출하고,
+context 바인딩만 따로 잰 값도 함께 출력한다.
+
+    python -m bench.request_context [requests]
+"""
+import asyncio
+import contextlib
+import sys
+import time
+import uuid
+from typing import AsyncIterator
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.apis import ALL_ROUTERS
+from app.utils import ctx as ctx_module
+from app.utils.ctx import Context, ContextMiddleware, create_app_ctx
+
+from ._common import bench_settings
+
+
+@contextlib.asynccontextmanager
+async def _legacy_bind_context(app_ctx: Context) -> AsyncIterator[None]:
+    ctx_token = ctx_module._current_context.set(app_ctx._replace(id=str(uuid.uuid4())))
+    try:
+        yield
+    finally:
+        await app_ctx.db.clear_scoped_session()
+        ctx_module._current_context.reset(ctx_token)
+
+
+class _LegacyContextMiddleware:
+    def __init__(self, app: ASGIApp, app_ctx: Context) -> None:
+        self.app = app
+        self.app_ctx = app_ctx
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        async with _legacy_bind_context(self.app_ctx):
+            await self.app(scope, receive, send)
+
+
+def _create_app(app_ctx: Context, middleware: type) -> FastAPI:
+    app = FastAPI()
+    for api_router in ALL_ROUTERS:
+        app.include_router(api_router)
+    app.add_middleware(middleware, app_ctx=app_ctx)
+    return app
+
+
+async def _call(app: FastAPI, method: str, path: str) -> None:
+    async def _receive() -> dict:
+        return {"type": "http.request", "body": b"{}", "more_body": False}
+
+    async def _send(message: dict) -> None:
+        pass
+
+    await app(
+        {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"content-type", b"application/json")],
+            "client": ("127.0.0.1", 0),
+            "server": ("bench", 80),
+        },
+        _receive,
+        _send,
+    )
+
+
+async def _cpu_per_request(
+    app: FastAPI, method: str, path: str, requests: int
+) -> float:
+    for _ in range(200):  # warm up
+        await _call(app, method, path)
+
+    started_at = time.process_time()
+    for _ in range(requests):
+        await _call(app, method, path)
+    return (time.process_time() - started_at) / requests
+
+
+async def main(requests: int) -> None:
+    app_ctx = await create_app_ctx(bench_settings())
+
+    for label, middleware in (
+        ("legacy", _LegacyContextMiddleware),
+        ("current", ContextMiddleware),
+    ):
+        app = _create_app(app_ctx, middleware)
+        for method, path in (("POST", "/boards/"), ("GET", "/not-found")):
+            cpu = await _cpu_per_request(app, method, path, requests)
+            print(f"{label:<8} {method:<4} {path:<14} cpu/request={cpu * 1e6:8.1f}us")
+
+    for label, bind in (
+        ("legacy", _legacy_bind_context),
+        ("current", ctx_module.bind_context),
+    ):
+        started_at = time.process_time()
+        for _ in range(requests):
+            async with bind(app_ctx):
+                pass
+        cpu = (time.process_time() - started_at) / requests
+        print(f"{label:<8} bind only{'':<10} cpu/request={cpu * 1e6:8.1f}us")
+
+    await app_ctx.db.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
@@ -0,0 +1,59 @@
+"""
+prepared statement 캐시 모드(`DATABASE_STATEMENT_CACHE_MODE`) 비교.
+
+`get_post`, `search_post`, `validate_user_role` 의 SELECT 를 요청 단위(=세션 단위)로 반복 실행한다.
+응답 캐시는 끈다 (켜 두면 두 번째 요청부터 `get_post` 가 DB 를 안 탄다).
+
+    python -m bench.statement_cache [iterations]
+"""
+import asyncio
+import sys
+
+from fastapi import Request
+
+from app.apis.post import SearchPostRequest, get_post, search_post
+from app.database import models as m
+from app.utils.auth import validate_user_role
+from app.utils.ctx import bind_context, create_app_ctx
+
+from ._common import SeedIds, bench_settings, measure, seed, summarize
+
+MODES = ("lru", "pgbouncer")
+
+# handler 는 If-None-Match 만 보므로 header 없는 빈 GET 이면 충분
+_REQUEST = Request({"type": "http", "method": "GET", "headers": [], "query_string": b""})
+
+
+async def _run_mode(mode: str, ids: SeedIds, iterations: int) -> list[float]:
+    app_ctx = await create_app_ctx(
+        bench_settings(
+            DATABASE_STATEMENT_CACHE_MODE=mode,
+            CACHE_BACKEND="memory",
+            RESPONSE_CACHE_MAX_BYTES=0,  # 캐시에 아무것도 저장하지 않음
+        )
+    )
+
+    async def _request() -> None:
+        async with bind_context(app_ctx):
+            await validate_user_role(ids.user_id, m.UserRoleEnum.Admin)
+            await get_post(ids.post_id, _REQUEST)
+            await search_post(
+                SearchPostRequest(board_id=ids.board_id, count=20), _REQUEST
+            )
+
+    try:
+        return await measure(_request, iterations=iterations)
+    finally:
+        await app_ctx.db.dispose()
+
+
+async def main(iterations: int) -> None:
+    ids = await seed(bench_settings())
+
+    for mode in MODES:
+        samples = await _run_mode(mode, ids, iterations)
+        print(summarize(mode, samples))
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -1,7 +1,10 @@
 import contextlib
-from typing import AsyncIterator
+from typing import Any, AsyncIterator
+
+from sqlalchemy import text as sql_text
 
 from app.database.base_ import ModelBase
+from app.database.query_budget import QueryRecorder
 from app.settings import AppSettings
 from app.utils.ctx import Context, bind_context, create_app_ctx
 
@@ -17,3 +20,33 @@ async def ensure_fresh_env() -> None:
     async with Context.current.db.engine.begin() as conn:
         await conn.run_sync(ModelBase.metadata.drop_all)
         await conn.run_sync(ModelBase.metadata.create_all)
+
+
+def index_names(plan: dict[str, Any]) -> set[str]:
+    """EXPLAIN (FORMAT JSON) plan node 와 그 하위 node 들이 사용하는 index 이름"""
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        names |= index_names(child)
+    return names
+
+
+async def explain_recorded(recorder: QueryRecorder) -> list[dict[str, Any]]:
+    """
+    `record_queries()` 로 기록한 statement 를 같은 파라미터로 EXPLAIN 한다.
+    테스트 데이터는 작아서 seq scan 이 항상 싸므로, index 를 쓸 수 있는지만 보도록 끈다.
+    (bitmap scan + sort 도 작은 데이터에선 싸서, ORDER BY 를 index 가 받는지 보려면 끈다)
+    """
+    session = Context.current.db.session
+    conn = await session.connection()
+    await conn.execute(sql_text("SET LOCAL enable_seqscan = off"))
+    await conn.execute(sql_text("SET LOCAL enable_bitmapscan = off"))
+
+    plans = []
+    for statement, parameters in recorder.statements:
+        result = await conn.exec_driver_sql(
+            "EXPLAIN (FORMAT JSON) " + statement, parameters
+        )
+        plans.append(result.scalar()[0]["Plan"])
+    await session.rollback()
+
+    return plans
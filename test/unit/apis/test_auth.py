@@ -5,6 +5,7 @@ import pytest
 import pytest_asyncio
 from httpx import AsyncClient
 
+from app.database.query_budget import query_budget
 from app.settings import AppSettings
 
 EMAIL = "authtest@example.com"
@@ -25,22 +26,24 @@ class TestAuth:
 
     @pytest.mark.asyncio
     async def test_signup(self, app_client: AsyncClient) -> None:
-        response = await app_client.post(
-            "/auth/signup",
-            json={
-                "email": EMAIL,
-                "password": PASSWORD,
-            },
-        )
+        async with query_budget(2):
+            response = await app_client.post(
+                "/auth/signup",
+                json={
+                    "email": EMAIL,
+                    "password": PASSWORD,
+                },
+            )
         assert response.status_code == 200
 
     @pytest.mark.asyncio
     async def test_login(self, app_client: AsyncClient):
-        response = await app_client.post(
-            "/auth/login",
-            json={
-                "email": EMAIL,
-                "password": PASSWORD,
-            },
-        )
+        async with query_budget(1):
+            response = await app_client.post(
+                "/auth/login",
+                json={
+                    "email": EMAIL,
+                    "password": PASSWORD,
+                },
+            )
         assert response.status_code == 200
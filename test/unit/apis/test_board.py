@@ -7,6 +7,7 @@ import pytest
 import pytest_asyncio
 from httpx import AsyncClient
 
+from app.database.query_budget import query_budget
 from app.settings import AppSettings
 
 
@@ -25,46 +26,76 @@ class TestBoard:
 
     @pytest.mark.asyncio
     async def test_create_board(self, app_client: AsyncClient, owner_access_token: str):
-        response = await app_client.post(
-            "/boards/",
-            json={
-                "title": BOARD_TITLE,
-            },
-            headers={"Authorization": f"Bearer {owner_access_token}"},
-        )
+        async with query_budget(3):
+            response = await app_client.post(
+                "/boards/",
+                json={
+                    "title": BOARD_TITLE,
+                },
+                headers={"Authorization": f"Bearer {owner_access_token}"},
+            )
         assert response.status_code == 200
 
     @pytest.mark.asyncio
     async def test_get_board(self, app_client: AsyncClient):
         board_id = (await search_board(app_client, BOARD_TITLE))["id"]
 
-        response = await app_client.get(
-            f"/boards/{board_id}",
-        )
+        async with query_budget(0):  # board snapshot
+            response = await app_client.get(
+                f"/boards/{board_id}",
+            )
 
         assert response.status_code == 200
         assert response.json()["id"] == board_id
         assert response.json()["title"] == BOARD_TITLE
 
+    @pytest.mark.asyncio
+    async def test_search_board(self, app_client: AsyncClient):
+        async with query_budget(0):  # board snapshot
+            response = await app_client.post(
+                "/boards/search",
+                json={"title": "this is a board%", "count_mode": "has_more"},
+            )
+
+        assert response.status_code == 200
+        assert [board["title"] for board in response.json()["boards"]] == [BOARD_TITLE]
+        assert response.json()["has_more"] is False
+
+    @pytest.mark.asyncio
+    async def test_create_board_duplicate_title(
+        self, app_client: AsyncClient, owner_access_token: str
+    ):
+        async with query_budget(1):  # title 중복은 board snapshot 으로 확인
+            response = await app_client.post(
+                "/boards/",
+                json={
+                    "title": BOARD_TITLE,
+                },
+                headers={"Authorization": f"Bearer {owner_access_token}"},
+            )
+        assert response.status_code == 409
+
     @pytest.mark.asyncio
     async def test_update_board(self, app_client: AsyncClient, owner_access_token: str):
         board_id = (await search_board(app_client, BOARD_TITLE))["id"]
 
-        response = await app_client.put(
-            f"/boards/{board_id}",
-            json={
-                "title": UPDATED_BOARD_TITLE,
-            },
-            headers={"Authorization": f"Bearer {owner_access_token}"},
-        )
+        async with query_budget(3):
+            response = await app_client.put(
+                f"/boards/{board_id}",
+                json={
+                    "title": UPDATED_BOARD_TITLE,
+                },
+                headers={"Authorization": f"Bearer {owner_access_token}"},
+            )
         assert response.status_code == 200
 
     @pytest.mark.asyncio
     async def test_delete_board(self, app_client: AsyncClient, owner_access_token: str):
         board_id = (await search_board(app_client, UPDATED_BOARD_TITLE))["id"]
 
-        response = await app_client.delete(
-            f"/boards/{board_id}",
-            headers={"Authorization": f"Bearer {owner_access_token}"},
-        )
+        async with query_budget(5):
+            response = await app_client.delete(
+                f"/boards/{board_id}",
+                headers={"Authorization": f"Bearer {owner_access_token}"},
+            )
         assert response.status_code == 200
@@ -8,6 +8,7 @@ import pytest
 import pytest_asyncio
 from httpx import AsyncClient
 
+from app.database.query_budget import query_budget
 from app.settings import AppSettings
 
 
@@ -31,13 +32,14 @@ class TestComment:
         post_id = await create_post_obj(app_client, owner_access_token, board_id)
 
         # parent_comment_id가 없는 경우
-        response = await app_client.post(
-            f"/posts/{post_id}/comments/",
-            json={
-                "content": COMMENT_CONTENT,
-            },
-            headers={"Authorization": f"Bearer {owner_access_token}"},
-        )
+        async with query_budget(2):
+            response = await app_client.post(
+                f"/posts/{post_id}/comments/",
+                json={
+                    "content": COMMENT_CONTENT,
+                },
+                headers={"Authorization": f"Bearer {owner_access_token}"},
+            )
         assert response.status_code == 200
 
         # parent_comment_id가 있는 경우 (위에서 생성되었기 때문에 아래가 실행될 수 있다)
@@ -58,9 +60,10 @@ class TestComment:
         post_id = (await search_post(app_client, POST_TITLE))["id"]
         comment_id = (await search_comment(app_client, COMMENT_CONTENT))["id"]
 
-        response = await app_client.get(
-            f"/posts/{post_id}/comments/{comment_id}",
-        )
+        async with query_budget(1):
+            response = await app_client.get(
+                f"/posts/{post_id}/comments/{comment_id}",
+            )
 
         assert response.status_code == 200
         assert response.json()["id"] == comment_id
@@ -73,11 +76,12 @@ class TestComment:
         post_id = (await search_post(app_client, POST_TITLE))["id"]
         comment_id = (await search_comment(app_client, COMMENT_CONTENT))["id"]
 
-        response = await app_client.put(
-            f"/posts/{post_id}/comments/{comment_id}",
-            json={"content": UPDATED_COMMENT_CONTENT},
-            headers={"Authorization": f"Bearer {owner_access_token}"},
-        )
+        async with query_budget(3):
+            response = await app_client.put(
+                f"/posts/{post_id}/comments/{comment_id}",
+                json={"content": UPDATED_COMMENT_CONTENT},
+                headers={"Authorization": f"Bearer {owner_access_token}"},
+            )
 
         assert response.status_code == 200
 
@@ -88,8 +92,236 @@ class TestComment:
         post_id = (await search_post(app_client, POST_TITLE))["id"]
         comment_id = (await search_comment(app_client, COMMENT_CONTENT))["id"]
 
-        response = await app_client.delete(
-            f"/posts/{post_id}/comments/{comment_id}",
+        async with query_budget(3):
+            response = await app_client.delete(
+                f"/posts/{post_id}/comments/{comment_id}",
+                headers={"Authorization": f"Bearer {owner_access_token}"},
+            )
+        assert response.status_code == 200
+
+
+class TestCommentTree:
+    @pytest_asyncio.fixture(scope="class", autouse=True)
+    async def _init_env(
+        self,
+        app_client: AsyncClient,
+        app_settings: AppSettings,
+    ) -> None:
+        async with with_app_ctx(app_settings):
+            await ensure_fresh_env()
+            await create_user(app_client=app_client)
+            await create_owner(app_client=app_client)
+
+    @pytest_asyncio.fixture(scope="class")
+    async def thread(
+        self, app_client: AsyncClient, owner_access_token: str
+    ) -> tuple[int, dict[str, int]]:
+        """a(a1(a1x), a2, a3), b"""
+        board_id = await create_board_obj(app_client, owner_access_token)
+        post_id = await create_post_obj(app_client, owner_access_token, board_id)
+
+        ids: dict[str, int] = {}
+        for name, parent in [
+            ("a", None),
+            ("b", None),
+            ("a1", "a"),
+            ("a2", "a"),
+            ("a3", "a"),
+            ("a1x", "a1"),
+        ]:
+            response = await app_client.post(
+                f"/posts/{post_id}/comments/",
+                json={
+                    "content": name,
+                    "parent_comment_id": ids[parent] if parent else None,
+                },
+                headers={"Authorization": f"Bearer {owner_access_token}"},
+            )
+            ids[name] = response.json()["comment_id"]
+        return post_id, ids
+
+    @staticmethod
+    def _shape(comments: list[dict]) -> list:
+        return [
+            (c["content"], c["has_more_replies"], TestCommentTree._shape(c["replies"]))
+            for c in comments
+        ]
+
+    @pytest.mark.asyncio
+    async def test_get_comment_tree(
+        self, app_client: AsyncClient, thread: tuple[int, dict[str, int]]
+    ):
+        post_id, _ = thread
+
+        async with query_budget(1):
+            response = await app_client.get(f"/posts/{post_id}/comments/tree")
+
+        assert response.status_code == 200
+        assert response.json()["has_more"] is False
+        assert self._shape(response.json()["comments"]) == [
+            (
+                "a",
+                False,
+                [
+                    ("a1", False, [("a1x", False, [])]),
+                    ("a2", False, []),
+                    ("a3", False, []),
+                ],
+            ),
+            ("b", False, []),
+        ]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "params, expected, has_more",
+        [
+            (
+                {"breadth": 1},
+                [("a", True, [("a1", False, [("a1x", False, [])])])],
+                True,
+            ),
+            ({"depth": 1}, [("a", True, []), ("b", False, [])], False),
+            (
+                # BFS 순서로 a, b, a1 까지만: a2 가 잘려서 a 에 표시, a1 은 펼쳐지지 않음
+                {"count": 3},
+                [("a", True, [("a1", True, [])]), ("b", False, [])],
+                False,
+            ),
+            (
+                # 넘친 행 (a3) 은 같은 부모의 대댓글 (a1, a2) 뒤라서 먼저 잘린다
+                {"breadth": 2, "count": 4},
+                [("a", True, [("a1", True, []), ("a2", False, [])]), ("b", False, [])],
+                False,
+            ),
+        ],
+    )
+    async def test_get_comment_tree_limits(
+        self,
+        app_client: AsyncClient,
+        thread: tuple[int, dict[str, int]],
+        params: dict,
+        expected: list,
+        has_more: bool,
+    ):
+        post_id, _ = thread
+
+        response = await app_client.get(
+            f"/posts/{post_id}/comments/tree", params=params
+        )
+
+        assert response.status_code == 200
+        assert response.json()["has_more"] is has_more
+        assert self._shape(response.json()["comments"]) == expected
+
+    @pytest.mark.asyncio
+    async def test_get_comment_tree_collapsed(
+        self, app_client: AsyncClient, thread: tuple[int, dict[str, int]]
+    ):
+        post_id, ids = thread
+
+        response = await app_client.get(
+            f"/posts/{post_id}/comments/tree",
+            params={"root_comment_id": ids["a"], "collapsed": [ids["a1"], ids["a2"]]},
+        )
+
+        assert response.status_code == 200
+        assert self._shape(response.json()["comments"]) == [
+            ("a", False, [("a1", True, []), ("a2", False, []), ("a3", False, [])])
+        ]
+
+    @pytest.mark.asyncio
+    async def test_get_comment_tree_not_found(
+        self, app_client: AsyncClient, thread: tuple[int, dict[str, int]]
+    ):
+        post_id, ids = thread
+
+        response = await app_client.get(
+            f"/posts/{post_id}/comments/tree", params={"root_comment_id": 0}
+        )
+        assert response.status_code == 404
+
+        response = await app_client.get(
+            f"/posts/{post_id}/comments/tree", params={"depth": 0}
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_get_comment_thread(
+        self, app_client: AsyncClient, thread: tuple[int, dict[str, int]]
+    ):
+        post_id, ids = thread
+
+        pages = []
+        cursor = None
+        while True:
+            async with query_budget(1):
+                response = await app_client.get(
+                    f"/posts/{post_id}/comments/thread",
+                    params={"count": 4} | ({"cursor": cursor} if cursor else {}),
+                )
+            assert response.status_code == 200
+            pages.append(
+                [(c["content"], c["depth"]) for c in response.json()["comments"]]
+            )
+            cursor = response.json()["next_cursor"]
+            if cursor is None:
+                break
+
+        # 부모 다음에 그 대댓글 (pre-order)
+        assert pages == [
+            [("a", 1), ("a1", 2), ("a1x", 3), ("a2", 2)],
+            [("a3", 2), ("b", 1)],
+        ]
+
+        response = await app_client.get(
+            f"/posts/{post_id}/comments/thread",
+            params={"root_comment_id": ids["a1"]},
+        )
+        assert [c["content"] for c in response.json()["comments"]] == ["a1", "a1x"]
+
+        response = await app_client.get(
+            f"/posts/{post_id}/comments/thread", params={"cursor": "invalid"}
+        )
+        assert response.status_code == 400
+
+        for count in (0, 201):
+            response = await app_client.get(
+                f"/posts/{post_id}/comments/thread", params={"count": count}
+            )
+            assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_create_comment_unknown_parent(
+        self,
+        app_client: AsyncClient,
+        owner_access_token: str,
+        thread: tuple[int, dict[str, int]],
+    ):
+        post_id, _ = thread
+
+        response = await app_client.post(
+            f"/posts/{post_id}/comments/",
+            json={"content": "orphan", "parent_comment_id": 0},
             headers={"Authorization": f"Bearer {owner_access_token}"},
         )
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_delete_comment_subtree(
+        self,
+        app_client: AsyncClient,
+        owner_access_token: str,
+        thread: tuple[int, dict[str, int]],
+    ):
+        post_id, ids = thread
+
+        # 조회 1 + subtree DELETE 1 (대댓글 수와 무관)
+        async with query_budget(3):
+            response = await app_client.delete(
+                f"/posts/{post_id}/comments/{ids['a']}",
+                headers={"Authorization": f"Bearer {owner_access_token}"},
+            )
         assert response.status_code == 200
+
+        response = await app_client.get(f"/posts/{post_id}/comments/thread")
+        assert [c["content"] for c in response.json()["comments"]] == ["b"]
@@ -0,0 +1,308 @@
+import datetime
+from test.helper import ensure_fresh_env, with_app_ctx
+from test.mock.obj import create_board_obj
+from test.mock.user import create_owner, create_user
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy.sql import expression as sql_exp
+
+from app.database import models as m
+from app.database.query_budget import query_budget
+from app.settings import AppSettings
+from app.utils.ctx import Context
+from app.utils.hashtag import TREND_BUCKET, extract_hashtags, trend_bucket
+
+
+def test_extract_hashtags():
+    assert extract_hashtags("#b #a 본문 #a #한글 # #") == ["a", "b", "한글"]
+    assert extract_hashtags("no hashtag") == []
+
+
+class TestHashtagPosts:
+    @pytest_asyncio.fixture(scope="class", autouse=True)
+    async def _init_env(
+        self,
+        app_client: AsyncClient,
+        app_settings: AppSettings,
+    ) -> None:
+        async with with_app_ctx(app_settings):
+            await ensure_fresh_env()
+            await create_user(app_client=app_client)
+            await create_owner(app_client=app_client)
+
+    @pytest_asyncio.fixture(scope="class")
+    async def board_id(self, app_client: AsyncClient, owner_access_token: str) -> int:
+        return await create_board_obj(app_client, owner_access_token)
+
+    async def _create_post(
+        self,
+        app_client: AsyncClient,
+        owner_access_token: str,
+        board_id: int,
+        content: str,
+    ) -> int:
+        response = await app_client.post(
+            "/posts/",
+            json={"title": "hashtag", "content": content, "board_id": board_id},
+            headers={"Authorization": f"Bearer {owner_access_token}"},
+        )
+        assert response.status_code == 200
+        return response.json()["post_id"]
+
+    @pytest.mark.asyncio
+    async def test_get_hashtag_posts(
+        self, app_client: AsyncClient, owner_access_token: str, board_id: int
+    ):
+        post_ids = [
+            await self._create_post(
+                app_client, owner_access_token, board_id, f"#fastapi {i}"
+            )
+            for i in range(5)
+        ]
+
+        seen = []
+        params = {"count": 2}
+        while True:
+            async with query_budget(1):
+                response = await app_client.get("/hashtag/fastapi/posts", params=params)
+            assert response.status_code == 200
+            seen += [post["id"] for post in response.json()["posts"]]
+            if response.json()["next_cursor"] is None:
+                break
+            params["cursor"] = response.json()["next_cursor"]
+
+        assert seen == post_ids[::-1]  # 최신 post 부터
+
+    @pytest.mark.asyncio
+    async def test_update_post_hashtags(
+        self, app_client: AsyncClient, owner_access_token: str, board_id: int
+    ):
+        post_id = await self._create_post(
+            app_client, owner_access_token, board_id, "#keep #removed"
+        )
+
+        response = await app_client.put(
+            f"/posts/{post_id}",
+            json={"title": "hashtag", "content": "#keep #added", "board_id": board_id},
+            headers={"Authorization": f"Bearer {owner_access_token}"},
+        )
+        assert response.status_code == 200
+
+        for name in ("keep", "added"):
+            response = await app_client.get(f"/hashtag/{name}/posts")
+            assert [post["id"] for post in response.json()["posts"]] == [post_id]
+        response = await app_client.get("/hashtag/removed/posts")
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_delete_post_unlinks_hashtags(
+        self, app_client: AsyncClient, owner_access_token: str, board_id: int
+    ):
+        post_id = await self._create_post(
+            app_client, owner_access_token, board_id, "#deleted"
+        )
+
+        response = await app_client.delete(
+            f"/posts/{post_id}",
+            headers={"Authorization": f"Bearer {owner_access_token}"},
+        )
+        assert response.status_code == 200
+
+        response = await app_client.get("/hashtag/deleted/posts")
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_invalid_cursor(self, app_client: AsyncClient):
+        response = await app_client.get(
+            "/hashtag/fastapi/posts", params={"cursor": "invalid"}
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("count", [0, 101])
+    async def test_count_out_of_range(self, app_client: AsyncClient, count: int):
+        response = await app_client.get(
+            "/hashtag/fastapi/posts", params={"count": count}
+        )
+        assert response.status_code == 422
+
+
+class TestTrendingHashtags:
+    @pytest_asyncio.fixture(scope="class", autouse=True)
+    async def _init_env(
+        self,
+        app_client: AsyncClient,
+        app_settings: AppSettings,
+    ) -> None:
+        async with with_app_ctx(app_settings):
+            await ensure_fresh_env()
+            await create_user(app_client=app_client)
+            await create_owner(app_client=app_client)
+
+    async def _trend(self, app_settings: AppSettings) -> dict[tuple[str, int], int]:
+        """{(hashtag_name, 몇 시간 전 bucket): post_cnt}"""
+        async with with_app_ctx(app_settings):
+            rows = await Context.current.db.session.execute(
+                sql_exp.select(
+                    m.HashtagTrend.hashtag_name,
+                    m.HashtagTrend.bucket,
+                    m.HashtagTrend.post_cnt,
+                )
+            )
+            now = trend_bucket(datetime.datetime.now(datetime.timezone.utc))
+            return {
+                (name, (now - bucket) // TREND_BUCKET): cnt for name, bucket, cnt in rows
+            }
+
+    async def _age_links(self, app_settings: AppSettings) -> None:
+        # 지금까지의 link 를 한 시간 전 (끝난 bucket) 으로 옮긴다
+        async with with_app_ctx(app_settings):
+            session = Context.current.db.session
+            await session.execute(
+                sql_exp.update(m.PostHashTag).values(
+                    created_at=m.PostHashTag.created_at - TREND_BUCKET
+                )
+            )
+            await session.execute(
+                sql_exp.update(m.HashtagTrend).values(
+                    bucket=m.HashtagTrend.bucket - TREND_BUCKET
+                )
+            )
+            await session.commit()
+
+    @pytest.mark.asyncio
+    async def test_trending(
+        self,
+        app_client: AsyncClient,
+        app_settings: AppSettings,
+        owner_access_token: str,
+    ):
+        board_id = await create_board_obj(app_client, owner_access_token)
+        post_ids = []
+        for content in ("#python #fastapi", "#python", "#python #sql"):
+            response = await app_client.post(
+                "/posts/",
+                json={"title": "trend", "content": content, "board_id": board_id},
+                headers={"Authorization": f"Bearer {owner_access_token}"},
+            )
+            post_ids.append(response.json()["post_id"])
+        await self._age_links(app_settings)
+
+        # 진행 중인 bucket 의 변경
+        await app_client.post(
+            "/posts/",
+            json={"title": "trend", "content": "#sql", "board_id": board_id},
+            headers={"Authorization": f"Bearer {owner_access_token}"},
+        )
+        await app_client.delete(
+            f"/posts/{post_ids[0]}",
+            headers={"Authorization": f"Bearer {owner_access_token}"},
+        )
+
+        assert await self._trend(app_settings) == {
+            ("python", 1): 2,
+            ("fastapi", 1): 0,
+            ("sql", 1): 1,
+            ("sql", 0): 1,
+        }
+
+        async with query_budget(1):
+            response = await app_client.get(
+                "/hashtag/trending", params={"window": "24h"}
+            )
+        assert response.status_code == 200
+        # 진행 중인 bucket (sql +1) 은 포함하지 않는다
+        assert response.json()["hashtags"] == [
+            {"name": "python", "post_cnt": 2},
+            {"name": "sql", "post_cnt": 1},
+        ]
+
+        # 다음 bucket 이 시작될 때까지 캐시
+        async with query_budget(0):
+            cached = await app_client.get("/hashtag/trending", params={"window": "24h"})
+        assert cached.json() == response.json()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("count", [-1, 0, 101])
+    async def test_count_out_of_range(self, app_client: AsyncClient, count: int):
+        response = await app_client.get("/hashtag/trending", params={"count": count})
+        assert response.status_code == 422
+
+
+class TestSuggestHashtag:
+    @pytest_asyncio.fixture(scope="class", autouse=True)
+    async def _init_env(
+        self,
+        app_client: AsyncClient,
+        app_settings: AppSettings,
+    ) -> None:
+        async with with_app_ctx(app_settings):
+            await ensure_fresh_env()
+            await create_user(app_client=app_client)
+            await create_owner(app_client=app_client)
+            # index 를 처음 읽을 때 있던 tag
+            Context.current.db.session.add_all(
+                [m.Hashtag(name="Pydantic"), m.Hashtag(name="rust")]
+            )
+            await Context.current.db.session.commit()
+
+    async def _suggest(self, app_client: AsyncClient, prefix: str) -> list[dict]:
+        async with query_budget(0):
+            response = await app_client.get(
+                "/hashtag/suggest", params={"prefix": prefix}
+            )
+        assert response.status_code == 200
+        return response.json()["hashtags"]
+
+    @pytest.mark.asyncio
+    async def test_suggest(self, app_client: AsyncClient, owner_access_token: str):
+        # 첫 요청에 index 를 읽는다
+        response = await app_client.get("/hashtag/suggest", params={"prefix": "py"})
+        assert response.json()["hashtags"] == [{"name": "Pydantic", "post_cnt": 0}]
+
+        board_id = await create_board_obj(app_client, owner_access_token)
+        post_ids = []
+        for content in ("#python #pytest", "#python", "#pydantic"):
+            response = await app_client.post(
+                "/posts/",
+                json={"title": "suggest", "content": content, "board_id": board_id},
+                headers={"Authorization": f"Bearer {owner_access_token}"},
+            )
+            post_ids.append(response.json()["post_id"])
+
+        # 새 tag 와 사용 수가 DB 를 다시 읽지 않고 반영된다
+        assert await self._suggest(app_client, "#PY") == [
+            {"name": "python", "post_cnt": 2},
+            {"name": "pydantic", "post_cnt": 1},
+            {"name": "pytest", "post_cnt": 1},
+            {"name": "Pydantic", "post_cnt": 0},
+        ]
+
+        response = await app_client.put(
+            f"/posts/{post_ids[0]}",
+            json={"title": "suggest", "content": "#rust", "board_id": board_id},
+            headers={"Authorization": f"Bearer {owner_access_token}"},
+        )
+        assert response.status_code == 200
+
+        assert await self._suggest(app_client, "pyt") == [
+            {"name": "python", "post_cnt": 1},
+            {"name": "pytest", "post_cnt": 0},
+        ]
+        assert await self._suggest(app_client, "r") == [{"name": "rust", "post_cnt": 1}]
+        assert await self._suggest(app_client, "go") == []
+
+    @pytest.mark.asyncio
+    async def test_empty_prefix(self, app_client: AsyncClient):
+        response = await app_client.get("/hashtag/suggest", params={"prefix": "#"})
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("count", [0, 51])
+    async def test_count_out_of_range(self, app_client: AsyncClient, count: int):
+        response = await app_client.get(
+            "/hashtag/suggest", params={"prefix": "py", "count": count}
+        )
+        assert response.status_code == 422
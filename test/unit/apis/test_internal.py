@@ -0,0 +1,65 @@
+from test.helper import ensure_fresh_env, with_app_ctx
+from test.mock.user import create_owner, create_user
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from app.settings import AppSettings
+
+
+class TestInternal:
+    @pytest_asyncio.fixture(scope="class", autouse=True)
+    async def _init_env(
+        self,
+        app_client: AsyncClient,
+        app_settings: AppSettings,
+    ) -> None:
+        async with with_app_ctx(app_settings):
+            await ensure_fresh_env()
+            await create_user(app_client=app_client)
+            await create_owner(app_client=app_client)
+
+    @pytest.mark.asyncio
+    async def test_get_pool_status(
+        self,
+        app_client: AsyncClient,
+        owner_access_token: str,
+        app_settings: AppSettings,
+    ):
+        response = await app_client.get(
+            "/internal/db/pool",
+            headers={"Authorization": f"Bearer {owner_access_token}"},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["size"] == app_settings.DATABASE_POOL_SIZE
+        assert response.json()["checked_out"] >= 1  # 이 요청이 사용 중인 커넥션
+        assert response.json()["acquire_cnt"] >= 1
+
+    @pytest.mark.asyncio
+    async def test_get_pool_status_forbidden(
+        self, app_client: AsyncClient, user_access_token: str
+    ):
+        response = await app_client.get(
+            "/internal/db/pool",
+            headers={"Authorization": f"Bearer {user_access_token}"},
+        )
+
+        assert response.status_code == 403
+
+    @pytest.mark.asyncio
+    async def test_get_cache_stats(
+        self,
+        app_client: AsyncClient,
+        owner_access_token: str,
+        app_settings: AppSettings,
+    ):
+        response = await app_client.get(
+            "/internal/cache",
+            headers={"Authorization": f"Bearer {owner_access_token}"},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["max_bytes"] == app_settings.RESPONSE_CACHE_MAX_BYTES
+        assert response.json()["hits"] >= 0
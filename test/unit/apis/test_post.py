@@ -5,10 +5,12 @@ from test.mock.obj import create_board_obj, create_post_obj
 from test.mock.user import create_owner, create_user
 from test.utils import search_board, search_post
 
+import jwt
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient
 
+from app.database.query_budget import query_budget
 from app.settings import AppSettings
 
 
@@ -27,43 +29,155 @@ class TestPost:
     @pytest.mark.asyncio
     async def test_create_post(self, app_client: AsyncClient, owner_access_token: str):
         board_id = await create_board_obj(app_client, owner_access_token)
-        response = await app_client.post(
-            "/posts/",
-            json={
-                "title": POST_TITLE,
-                "content": POST_CONTENT,
-                "board_id": board_id,
-            },
-            headers={"Authorization": f"Bearer {owner_access_token}"},
-        )
+        async with query_budget(5):
+            response = await app_client.post(
+                "/posts/",
+                json={
+                    "title": POST_TITLE,
+                    "content": POST_CONTENT,
+                    "board_id": board_id,
+                },
+                headers={"Authorization": f"Bearer {owner_access_token}"},
+            )
         assert response.status_code == 200
 
     @pytest.mark.asyncio
     async def test_get_post(self, app_client: AsyncClient):
         post_id = (await search_post(app_client, POST_TITLE))["id"]
 
-        response = await app_client.get(
-            f"/posts/{post_id}",
-        )
+        async with query_budget(1):
+            response = await app_client.get(
+                f"/posts/{post_id}",
+            )
 
         assert response.status_code == 200
         assert response.json()["id"] == post_id
         assert response.json()["title"] == POST_TITLE
 
+        # 두 번째부터는 응답 캐시
+        async with query_budget(0):
+            cached = await app_client.get(f"/posts/{post_id}")
+        assert cached.json() == response.json()
+
+    @pytest.mark.asyncio
+    async def test_get_post_not_modified(self, app_client: AsyncClient):
+        post_id = (await search_post(app_client, POST_TITLE))["id"]
+        response = await app_client.get(f"/posts/{post_id}")
+        etag = response.headers["ETag"]
+        assert response.headers["Cache-Control"] == "no-cache"
+
+        async with query_budget(0):  # 응답 캐시에 ETag 도 같이 있다
+            response = await app_client.get(
+                f"/posts/{post_id}", headers={"If-None-Match": etag}
+            )
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert response.content == b""
+
+    @pytest.mark.asyncio
+    async def test_search_post_not_modified(self, app_client: AsyncClient):
+        board_id = (await search_board(app_client, BOARD_TITLE))["id"]
+        body = {"board_id": board_id, "title": POST_TITLE}
+        etag = (await app_client.post("/posts/search", json=body)).headers["ETag"]
+        assert etag.startswith('W/"')
+
+        response = await app_client.post(
+            "/posts/search", json=body, headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 304
+
+    @pytest.mark.asyncio
+    async def test_search_post_server_timing(self, app_client: AsyncClient):
+        board_id = (await search_board(app_client, BOARD_TITLE))["id"]
+
+        async with query_budget(1):
+            response = await app_client.post(
+                "/posts/search",
+                json={"board_id": board_id, "title": POST_TITLE},
+            )
+
+        assert response.status_code == 200
+        assert response.json()["count"] == 1
+        server_timing = response.headers["Server-Timing"]
+        assert "db;dur=" in server_timing
+        # 전체 개수는 count() over () 로 page 쿼리와 함께 온다
+        assert '"1 queries"' in server_timing
+        assert "sql-1;dur=" in server_timing
+
+    @pytest.mark.asyncio
+    async def test_search_post_full_text(self, app_client: AsyncClient):
+        board_id = (await search_board(app_client, BOARD_TITLE))["id"]
+
+        async with query_budget(1):
+            response = await app_client.post(
+                "/posts/search",
+                json={
+                    "board_id": board_id,
+                    # content 에만 있는 단어, 대소문자 무시
+                    "query": "CONTENT -missing",
+                    "sort_by": "rank",
+                    "sort_direction": "desc",
+                },
+            )
+        assert response.status_code == 200
+        assert response.json()["posts"][0]["title"] == POST_TITLE
+
+        response = await app_client.post(
+            "/posts/search",
+            json={"board_id": board_id, "query": "missing"},
+        )
+        assert response.status_code == 404
+
+        response = await app_client.post(
+            "/posts/search",
+            json={"board_id": board_id, "sort_by": "rank"},
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "count_mode, count, has_more",
+        [("none", None, None), ("has_more", None, False), ("estimate", 1, None)],
+    )
+    async def test_search_post_count_mode(
+        self,
+        app_client: AsyncClient,
+        count_mode: str,
+        count: int | None,
+        has_more: bool | None,
+    ):
+        board_id = (await search_board(app_client, BOARD_TITLE))["id"]
+
+        response = await app_client.post(
+            "/posts/search",
+            json={"board_id": board_id, "title": POST_TITLE, "count_mode": count_mode},
+        )
+
+        assert response.status_code == 200
+        assert len(response.json()["posts"]) == 1
+        assert response.json()["has_more"] == has_more
+        if count_mode == "estimate":
+            # planner 예상치라 정확하지 않을 수 있다
+            assert response.json()["count"] >= 0
+        else:
+            assert response.json()["count"] == count
+
     @pytest.mark.asyncio
     async def test_update_post(self, app_client: AsyncClient, owner_access_token: str):
         board_id = (await search_board(app_client, BOARD_TITLE))["id"]
         post_id = (await search_post(app_client, POST_TITLE))["id"]
 
-        response = await app_client.put(
-            f"/posts/{post_id}",
-            json={
-                "title": UPDATED_POST_TITLE,
-                "content": UPDATED_POST_CONTENT,
-                "board_id": board_id,
-            },
-            headers={"Authorization": f"Bearer {owner_access_token}"},
-        )
+        # #hashtag 빠지고 #add 추가: link 조회 / 삭제, tag / link INSERT
+        async with query_budget(7):
+            response = await app_client.put(
+                f"/posts/{post_id}",
+                json={
+                    "title": UPDATED_POST_TITLE,
+                    "content": UPDATED_POST_CONTENT,
+                    "board_id": board_id,
+                },
+                headers={"Authorization": f"Bearer {owner_access_token}"},
+            )
 
         assert response.status_code == 200
 
@@ -71,10 +185,11 @@ class TestPost:
     async def test_delete_post(self, app_client: AsyncClient, owner_access_token: str):
         post_id = (await search_post(app_client, UPDATED_POST_TITLE))["id"]
 
-        response = await app_client.delete(
-            f"/posts/{post_id}",
-            headers={"Authorization": f"Bearer {owner_access_token}"},
-        )
+        async with query_budget(6):
+            response = await app_client.delete(
+                f"/posts/{post_id}",
+                headers={"Authorization": f"Bearer {owner_access_token}"},
+            )
         assert response.status_code == 200
 
     @pytest.mark.asyncio
@@ -85,19 +200,283 @@ class TestPost:
         #     board_id = await create_board_obj(app_client, owner_access_token)
         post_id = await create_post_obj(app_client, owner_access_token, board_id)
 
-        response = await app_client.post(
-            f"/posts/{post_id}/like",
-            headers={"Authorization": f"Bearer {owner_access_token}"},
-        )
+        async with query_budget(1):  # like 와 카운터를 statement 하나로
+            response = await app_client.post(
+                f"/posts/{post_id}/like",
+                headers={"Authorization": f"Bearer {owner_access_token}"},
+            )
         assert response.status_code == 200
+        assert (await app_client.get(f"/posts/{post_id}")).json()["like_cnt"] == 1
 
     @pytest.mark.asyncio
     async def test_like_delete(self, app_client: AsyncClient, owner_access_token: str):
         board_id = (await search_board(app_client, BOARD_TITLE))["id"]
         post_id = (await search_post(app_client, POST_TITLE))["id"]
 
-        response = await app_client.delete(
+        async with query_budget(1):  # like 와 카운터를 statement 하나로
+            response = await app_client.delete(
+                f"/posts/{post_id}/like",
+                headers={"Authorization": f"Bearer {owner_access_token}"},
+            )
+        assert response.status_code == 200
+        assert (await app_client.get(f"/posts/{post_id}")).json()["like_cnt"] == 0
+
+    @pytest.mark.asyncio
+    async def test_like_repeat(self, app_client: AsyncClient, owner_access_token: str):
+        post_id = (await search_post(app_client, POST_TITLE))["id"]
+        headers = {"Authorization": f"Bearer {owner_access_token}"}
+
+        for method in ("post", "delete"):
+            response = await app_client.request(
+                method, f"/posts/{post_id}/like", headers=headers
+            )
+            assert response.status_code == 200
+
+            # 두 번째는 기본이 400, idempotent 면 200 (카운터는 그대로)
+            response = await app_client.request(
+                method, f"/posts/{post_id}/like", headers=headers
+            )
+            assert response.status_code == 400
+            async with query_budget(2):
+                response = await app_client.request(
+                    method,
+                    f"/posts/{post_id}/like",
+                    params={"idempotent": "true"},
+                    headers=headers,
+                )
+            assert response.status_code == 200
+
+            like_cnt = (await app_client.get(f"/posts/{post_id}")).json()["like_cnt"]
+            assert like_cnt == (1 if method == "post" else 0)
+
+        for method in ("post", "delete"):
+            response = await app_client.request(
+                method,
+                "/posts/0/like",
+                params={"idempotent": "true"},
+                headers=headers,
+            )
+            assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_like_unknown_user(self, app_client: AsyncClient):
+        post_id = (await search_post(app_client, POST_TITLE))["id"]
+        # 유효하지만 없는 user 의 token: post 가 없다고 답하지 않는다
+        token = jwt.encode(
+            {"_id": 0, "iss": "fastapi-practice"}, "secret", algorithm="HS256"
+        )
+
+        response = await app_client.post(
+            f"/posts/{post_id}/like", headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 404
+        assert response.json()["detail"] == "User not found."
+
+    @pytest.mark.asyncio
+    async def test_search_post_cursor(self, app_client: AsyncClient, owner_access_token: str):
+        board_id = (await search_board(app_client, BOARD_TITLE))["id"]
+        created_ids = []
+        for _ in range(3):
+            response = await app_client.post(
+                "/posts/",
+                json={"title": "cursor post", "content": POST_CONTENT, "board_id": board_id},
+                headers={"Authorization": f"Bearer {owner_access_token}"},
+            )
+            created_ids.append(response.json()["post_id"])
+
+        seen_ids = []
+        cursor = None
+        for _ in range(2):
+            async with query_budget(2):
+                response = await app_client.post(
+                    "/posts/search",
+                    json={
+                        "board_id": board_id,
+                        "title": "cursor post",
+                        "pagination": "cursor",
+                        "cursor": cursor,
+                        "count": 2,
+                    },
+                )
+            assert response.status_code == 200
+            assert response.json()["count"] == 3
+            seen_ids += [post["id"] for post in response.json()["posts"]]
+            cursor = response.json()["next_cursor"]
+
+        assert seen_ids == created_ids
+        assert cursor is None
+
+        response = await app_client.post(
+            "/posts/search",
+            json={
+                "board_id": board_id,
+                "pagination": "cursor",
+                "cursor": "not-a-cursor",
+            },
+        )
+        assert response.status_code == 400
+
+        for pagination in ("offset", "cursor"):
+            response = await app_client.post(
+                "/posts/search",
+                json={"board_id": board_id, "pagination": pagination, "count": 0},
+            )
+            assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_search_post_by_score(self, app_client: AsyncClient, owner_access_token: str):
+        board_id = (await search_board(app_client, BOARD_TITLE))["id"]
+        post_ids = []
+        for _ in range(2):
+            response = await app_client.post(
+                "/posts/",
+                json={
+                    "title": "score post",
+                    "content": POST_CONTENT,
+                    "board_id": board_id,
+                },
+                headers={"Authorization": f"Bearer {owner_access_token}"},
+            )
+            post_ids.append(response.json()["post_id"])
+        older_post_id, newer_post_id = post_ids
+        await app_client.post(
+            f"/posts/{older_post_id}/like",
+            headers={"Authorization": f"Bearer {owner_access_token}"},
+        )
+
+        async def _search(sort_by: str) -> list[int]:
+            async with query_budget(1):
+                response = await app_client.post(
+                    "/posts/search",
+                    json={
+                        "board_id": board_id,
+                        "title": "score post",
+                        "sort_by": sort_by,
+                        "sort_direction": "desc",
+                    },
+                )
+            assert response.status_code == 200
+            return [post["id"] for post in response.json()["posts"]]
+
+        # like 가 많은 순
+        assert await _search("popularity") == [older_post_id, newer_post_id]
+        # like 1개 (log 1 = 0) 로는 최신 글을 못 이긴다
+        assert await _search("hot") == [newer_post_id, older_post_id]
+
+
+class TestPostConditionalGet:
+    @pytest.fixture(scope="class")
+    def app_settings(self, app_settings: AppSettings) -> AppSettings:
+        # 응답 캐시를 끄고 ETag 검증 쿼리를 확인
+        return app_settings.copy(update={"RESPONSE_CACHE_MAX_BYTES": 0})
+
+    @pytest_asyncio.fixture(scope="class", autouse=True)
+    async def _init_env(
+        self,
+        app_client: AsyncClient,
+        app_settings: AppSettings,
+    ) -> None:
+        async with with_app_ctx(app_settings):
+            await ensure_fresh_env()
+            await create_user(app_client=app_client)
+            await create_owner(app_client=app_client)
+
+    @pytest.mark.asyncio
+    async def test_etag_follows_updated_at_and_like_cnt(
+        self, app_client: AsyncClient, owner_access_token: str
+    ):
+        board_id = await create_board_obj(app_client, owner_access_token)
+        post_id = await create_post_obj(app_client, owner_access_token, board_id)
+        response = await app_client.get(f"/posts/{post_id}")
+        etag, created_updated_at = response.headers["ETag"], response.json()["updated_at"]
+
+        async with query_budget(1) as recorder:
+            response = await app_client.get(
+                f"/posts/{post_id}", headers={"If-None-Match": etag}
+            )
+        assert response.status_code == 304
+        # post 전체가 아니라 ETag 재료 컬럼만 조회
+        assert "post.content" not in recorder.statements[0][0]
+
+        await app_client.post(
             f"/posts/{post_id}/like",
             headers={"Authorization": f"Bearer {owner_access_token}"},
         )
+        response = await app_client.get(
+            f"/posts/{post_id}", headers={"If-None-Match": etag}
+        )
         assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+        assert response.json()["like_cnt"] == 1
+        assert response.json()["updated_at"] == created_updated_at  # like 는 수정이 아님
+
+        etag = response.headers["ETag"]
+        updated_at = response.json()["updated_at"]
+        await app_client.put(
+            f"/posts/{post_id}",
+            json={
+                "title": UPDATED_POST_TITLE,
+                "content": UPDATED_POST_CONTENT,
+                "board_id": board_id,
+            },
+            headers={"Authorization": f"Bearer {owner_access_token}"},
+        )
+        response = await app_client.get(
+            f"/posts/{post_id}", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.json()["updated_at"] > updated_at
+
+
+class TestPostStats:
+    @pytest_asyncio.fixture(scope="class", autouse=True)
+    async def _init_env(
+        self,
+        app_client: AsyncClient,
+        app_settings: AppSettings,
+    ) -> None:
+        async with with_app_ctx(app_settings):
+            await ensure_fresh_env()
+            await create_user(app_client=app_client)
+            await create_owner(app_client=app_client)
+
+    @pytest.mark.asyncio
+    async def test_get_post_stats(
+        self, app_client: AsyncClient, owner_access_token: str
+    ):
+        board_id = await create_board_obj(app_client, owner_access_token)
+        liked_id = await create_post_obj(app_client, owner_access_token, board_id)
+        other_id = await create_post_obj(app_client, owner_access_token, board_id)
+        headers = {"Authorization": f"Bearer {owner_access_token}"}
+        await app_client.post(f"/posts/{liked_id}/like", headers=headers)
+        for _ in range(2):
+            await app_client.post(
+                f"/posts/{liked_id}/comments/",
+                json={"content": "comment"},
+                headers=headers,
+            )
+
+        # post 수와 상관없이 쿼리 1 번, 없는 post 는 빠지고 중복은 한 번만
+        async with query_budget(1):
+            response = await app_client.post(
+                "/posts/stats",
+                json={"post_ids": [other_id, liked_id, 0, other_id]},
+                headers=headers,
+            )
+        assert response.status_code == 200
+        assert response.json()["stats"] == [
+            {"post_id": other_id, "like_cnt": 0, "comment_cnt": 0, "liked_by_me": False},
+            {"post_id": liked_id, "like_cnt": 1, "comment_cnt": 2, "liked_by_me": True},
+        ]
+        assert response.headers["Cache-Control"] == "private, no-cache"
+
+        # 로그인 안 해도 카운터는 보인다
+        response = await app_client.post("/posts/stats", json={"post_ids": [liked_id]})
+        assert response.status_code == 200
+        assert response.json()["stats"] == [
+            {"post_id": liked_id, "like_cnt": 1, "comment_cnt": 2, "liked_by_me": False},
+        ]
+
+        for post_ids in ([], list(range(1, 102))):
+            response = await app_client.post("/posts/stats", json={"post_ids": post_ids})
+            assert response.status_code == 422
@@ -0,0 +1,155 @@
+from test.constants import COMMENT_CONTENT
+from test.helper import (ensure_fresh_env, explain_recorded, index_names,
+                         with_app_ctx)
+from test.mock.obj import create_board_obj, create_post_obj
+from test.mock.user import create_owner, create_user
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from app.database.query_budget import record_queries
+from app.settings import AppSettings
+
+
+class TestQueryPlan:
+    """검색 endpoint 가 실행하는 SQL 이 의도한 index 를 계속 쓰는지 (plan regression)"""
+
+    @pytest_asyncio.fixture(scope="class", autouse=True)
+    async def _init_env(
+        self,
+        app_client: AsyncClient,
+        app_settings: AppSettings,
+    ) -> None:
+        async with with_app_ctx(app_settings):
+            await ensure_fresh_env()
+            await create_user(app_client=app_client)
+            await create_owner(app_client=app_client)
+
+    @pytest_asyncio.fixture(scope="class")
+    async def post_id(self, app_client: AsyncClient, owner_access_token: str) -> int:
+        board_id = await create_board_obj(app_client, owner_access_token)
+        post_id = await create_post_obj(app_client, owner_access_token, board_id)
+        await app_client.post(
+            f"/posts/{post_id}/comments/",
+            json={"content": COMMENT_CONTENT},
+            headers={"Authorization": f"Bearer {owner_access_token}"},
+        )
+        await app_client.post(
+            f"/posts/{post_id}/like",
+            headers={"Authorization": f"Bearer {owner_access_token}"},
+        )
+        return post_id
+
+    async def _plans(
+        self,
+        app_client: AsyncClient,
+        app_settings: AppSettings,
+        url: str,
+        body: dict | None = None,
+    ) -> list[set[str]]:
+        async with record_queries() as recorder:
+            if body is None:
+                response = await app_client.get(url)
+            else:
+                response = await app_client.post(url, json=body)
+        assert response.status_code == 200
+
+        async with with_app_ctx(app_settings):
+            return [index_names(plan) for plan in await explain_recorded(recorder)]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("pagination", ["offset", "cursor"])
+    async def test_search_post_by_board(
+        self,
+        app_client: AsyncClient,
+        app_settings: AppSettings,
+        post_id: int,
+        pagination: str,
+    ):
+        board_id = (await app_client.get(f"/posts/{post_id}")).json()["board_id"]
+
+        plans = await self._plans(
+            app_client,
+            app_settings,
+            "/posts/search",
+            {"board_id": board_id, "pagination": pagination},
+        )
+
+        # page 쿼리 (cursor 모드에서는 count 쿼리도)
+        assert plans
+        assert all("ix_post_board_created" in indexes for indexes in plans)
+
+    @pytest.mark.asyncio
+    async def test_search_post_by_like_user(
+        self,
+        app_client: AsyncClient,
+        app_settings: AppSettings,
+        owner_access_token: str,
+        post_id: int,
+    ):
+        me = await app_client.get(
+            "/user/me", headers={"Authorization": f"Bearer {owner_access_token}"}
+        )
+
+        plans = await self._plans(
+            app_client,
+            app_settings,
+            "/posts/search",
+            {"like_user_id": me.json()["id"]},
+        )
+
+        assert "ix_like_user_post" in plans[-1]
+
+    @pytest.mark.asyncio
+    async def test_search_comments_by_post(
+        self,
+        app_client: AsyncClient,
+        app_settings: AppSettings,
+        post_id: int,
+    ):
+        plans = await self._plans(
+            app_client,
+            app_settings,
+            f"/posts/{post_id}/comments/search",
+            {"post_id": post_id},
+        )
+
+        assert "ix_comment_post_created" in plans[-1]
+
+    @pytest.mark.asyncio
+    async def test_get_hashtag_posts(
+        self,
+        app_client: AsyncClient,
+        app_settings: AppSettings,
+        post_id: int,
+    ):
+        plans = await self._plans(app_client, app_settings, "/hashtag/hashtag/posts")
+
+        assert "ix_post_hashtag_name_post" in plans[-1]
+
+    @pytest.mark.asyncio
+    async def test_get_comment_tree(
+        self,
+        app_client: AsyncClient,
+        app_settings: AppSettings,
+        post_id: int,
+    ):
+        plans = await self._plans(
+            app_client, app_settings, f"/posts/{post_id}/comments/tree"
+        )
+
+        assert {"ix_comment_post_created", "ix_comment_parent_created"} <= plans[-1]
+
+    @pytest.mark.asyncio
+    async def test_get_comment_thread(
+        self,
+        app_client: AsyncClient,
+        app_settings: AppSettings,
+        post_id: int,
+    ):
+        plans = await self._plans(
+            app_client, app_settings, f"/posts/{post_id}/comments/thread"
+        )
+
+        assert "ix_comment_post_path" in plans[-1]
@@ -10,6 +10,7 @@ from httpx import AsyncClient
 
 from app.apis import user
 from app.database import models as m
+from app.database.query_budget import query_budget
 from app.settings import AppSettings
 
 UPDATED_USER_EMAIL = "updated_user@example.com"
@@ -42,10 +43,11 @@ class TestUser:
         owner_access_token: str,
     ):
         user_id = (await search_user(app_client, DEFAULT_USER_EMAIL, owner_access_token))["id"]
-        response = await app_client.get(
-            f"/user/{user_id}",
-            headers={"Authorization": f"Bearer {owner_access_token}"},
-        )
+        async with query_budget(2, max_repeats=2):
+            response = await app_client.get(
+                f"/user/{user_id}",
+                headers={"Authorization": f"Bearer {owner_access_token}"},
+            )
 
         assert response.status_code == 200
         assert response.json()["id"] == user_id
@@ -65,11 +67,12 @@ class TestUser:
             mp.setattr(user, "upload_profile_img", _func)
 
             with open('test/mock/assets/sample_profile.png', 'rb') as f:
-                response = await app_client.post(
-                    "/user/profile_img",
-                    files={"profile_file": f},
-                    headers={"Authorization": f"Bearer {user_access_token}"},
-                )
+                async with query_budget(2):
+                    response = await app_client.post(
+                        "/user/profile_img",
+                        files={"profile_file": f},
+                        headers={"Authorization": f"Bearer {user_access_token}"},
+                    )
                 assert response.status_code == 200
                 assert response.json()['key'] == "attachment_key"
 
@@ -85,63 +88,69 @@ class TestUser:
 
     @pytest.mark.asyncio
     async def test_get_my_profile(self, app_client: AsyncClient, user_access_token: str):
-        response = await app_client.get(
-            "/user/me",
-            headers={"Authorization": f"Bearer {user_access_token}"}
-        )
+        async with query_budget(1):
+            response = await app_client.get(
+                "/user/me",
+                headers={"Authorization": f"Bearer {user_access_token}"}
+            )
         assert response.status_code == 200
 
     @pytest.mark.asyncio
     async def test_update_me(self, app_client: AsyncClient, user_access_token: str):
-        response = await app_client.put(
-            "/user/me",
-            json={
-                "email": UPDATED_USER_EMAIL,
-            },
-            headers={"Authorization": f"Bearer {user_access_token}"},
-        )
+        async with query_budget(3):
+            response = await app_client.put(
+                "/user/me",
+                json={
+                    "email": UPDATED_USER_EMAIL,
+                },
+                headers={"Authorization": f"Bearer {user_access_token}"},
+            )
         assert response.status_code == 200
 
     @pytest.mark.asyncio
     async def test_change_password(self, app_client: AsyncClient, user_access_token: str):
-        response = await app_client.put(
-            "/user/change-password",
-            json={
-                "old_password": DEFAULT_USER_PASSWORD,
-                "new_password": NEW_PASSWORD,
-            },
-            headers={"Authorization": f"Bearer {user_access_token}"},
-        )
+        async with query_budget(2):
+            response = await app_client.put(
+                "/user/change-password",
+                json={
+                    "old_password": DEFAULT_USER_PASSWORD,
+                    "new_password": NEW_PASSWORD,
+                },
+                headers={"Authorization": f"Bearer {user_access_token}"},
+            )
         assert response.status_code == 200
 
     @pytest.mark.asyncio
     async def test_change_user_role(self, app_client: AsyncClient, owner_access_token: str):
         user_id = (await search_user(app_client, OTHER_USER_EMAIL, owner_access_token))["id"]
-        response = await app_client.put(
-            "/user/role",
-            json={
-                "role": m.UserRoleEnum.Admin,
-                "user_id": user_id,
-            },
-            headers={"Authorization": f"Bearer {owner_access_token}"},
-        )
+        async with query_budget(3, max_repeats=2):
+            response = await app_client.put(
+                "/user/role",
+                json={
+                    "role": m.UserRoleEnum.Admin,
+                    "user_id": user_id,
+                },
+                headers={"Authorization": f"Bearer {owner_access_token}"},
+            )
         assert response.status_code == 200
 
     @pytest.mark.asyncio
     async def test_delete_self(self, app_client: AsyncClient, user_access_token: str):
         '''Delete default_user self.'''
-        response = await app_client.delete(
-            "/user/me",
-            headers={"Authorization": f"Bearer {user_access_token}"},
-        )
+        async with query_budget(8):
+            response = await app_client.delete(
+                "/user/me",
+                headers={"Authorization": f"Bearer {user_access_token}"},
+            )
         assert response.status_code == 200
 
     @pytest.mark.asyncio
     async def test_delete_user(self, app_client: AsyncClient, owner_access_token: str):
         '''Delete other_user with owner authority.'''
         user_id = (await search_user(app_client, OTHER_USER_EMAIL, owner_access_token))["id"]
-        response = await app_client.delete(
-            f"/user/{user_id}",
-            headers={"Authorization": f"Bearer {owner_access_token}"},
-        )
+        async with query_budget(9, max_repeats=2):
+            response = await app_client.delete(
+                f"/user/{user_id}",
+                headers={"Authorization": f"Bearer {owner_access_token}"},
+            )
         assert response.status_code == 200
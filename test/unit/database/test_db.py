@@ -0,0 +1,111 @@
+from test.helper import ensure_fresh_env, with_app_ctx
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.sql import expression as sql_exp
+
+from app.database import models as m
+from app.database.db import QueryStats
+from app.settings import AppSettings
+from app.utils.ctx import Context, bind_context
+
+
+class TestReadReplica:
+    @pytest.fixture(scope="class")
+    def replica_settings(self, app_settings: AppSettings) -> AppSettings:
+        # 로컬에서는 같은 인스턴스를 가리키는 URL 두 개를 replica 로 사용
+        return app_settings.copy(
+            update={"DATABASE_REPLICA_URLS": [app_settings.DATABASE_URL] * 2}
+        )
+
+    @pytest_asyncio.fixture(scope="class", autouse=True)
+    async def _init_env(self, app_settings: AppSettings) -> None:
+        async with with_app_ctx(app_settings):
+            await ensure_fresh_env()
+
+    @pytest.mark.asyncio
+    async def test_read_only_session_uses_replica(self, replica_settings: AppSettings):
+        async with with_app_ctx(replica_settings) as app_ctx:
+            Context.current.db.mark_read_only()
+            session = Context.current.db.session
+
+            assert session.get_bind(clause=sql_exp.select(m.User)) in [
+                engine.sync_engine for engine in app_ctx.db.replica_engines
+            ]
+            assert (await session.scalar(sql_exp.select(sql_exp.literal(1)))) == 1
+
+        await app_ctx.db.dispose()
+
+    @pytest.mark.asyncio
+    async def test_session_sticks_to_primary_after_write(
+        self, replica_settings: AppSettings
+    ):
+        async with with_app_ctx(replica_settings) as app_ctx:
+            Context.current.db.mark_read_only()
+            session = Context.current.db.session
+
+            session.add(m.User(email="replica@example.com", password="-"))
+            await session.flush()
+
+            assert session.get_bind(clause=sql_exp.select(m.User)) is (
+                app_ctx.db.engine.sync_engine
+            )
+            # 방금 쓴 값을 primary 에서 다시 읽을 수 있다
+            assert await session.scalar(
+                sql_exp.select(m.User).where(m.User.email == "replica@example.com")
+            )
+
+        await app_ctx.db.dispose()
+
+    @pytest.mark.asyncio
+    async def test_use_primary_after_replica_read(self, replica_settings: AppSettings):
+        async with with_app_ctx(replica_settings) as app_ctx:
+            Context.current.db.mark_read_only()
+            session = Context.current.db.session
+            assert (await session.scalar(sql_exp.select(sql_exp.literal(1)))) == 1
+
+            # 캐시를 채우는 조회는 primary 로
+            Context.current.db.use_primary()
+            assert session.get_bind(clause=sql_exp.select(m.User)) is (
+                app_ctx.db.engine.sync_engine
+            )
+
+        await app_ctx.db.dispose()
+
+    @pytest.mark.asyncio
+    async def test_replicas_are_round_robin(self, replica_settings: AppSettings):
+        async with with_app_ctx(replica_settings) as app_ctx:
+            binds = []
+            for _ in range(2):
+                async with bind_context(app_ctx):
+                    Context.current.db.mark_read_only()
+                    binds.append(
+                        Context.current.db.session.get_bind(
+                            clause=sql_exp.select(m.User)
+                        )
+                    )
+
+            assert binds[0] is not binds[1]
+
+        await app_ctx.db.dispose()
+
+    @pytest.mark.asyncio
+    async def test_session_without_mark_uses_primary(
+        self, replica_settings: AppSettings
+    ):
+        async with with_app_ctx(replica_settings) as app_ctx:
+            assert Context.current.db.session.get_bind(
+                clause=sql_exp.select(m.User)
+            ) is (app_ctx.db.engine.sync_engine)
+
+        await app_ctx.db.dispose()
+
+
+def test_server_timing_hides_statements_by_default():
+    query_stats = QueryStats()
+    query_stats.record('SELECT "user".email FROM "user"', 0.002)
+
+    server_timing = query_stats.server_timing()
+    assert server_timing == 'db;dur=2.00;desc="1 queries", db-slowest;dur=2.00'
+
+    assert "sql-1;dur=2.00" in query_stats.server_timing(with_statements=True)
@@ -0,0 +1,117 @@
+import datetime
+from test.helper import ensure_fresh_env, with_app_ctx
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text as sql_text
+from sqlalchemy.sql import expression as sql_exp
+
+from app.database import models as m
+from app.database.maintenance import (HASHTAG_TREND_RETENTION, repair_hashtag_trend,
+                                      repair_like_cnt, repair_post_score)
+from app.settings import AppSettings
+from app.utils.ctx import Context
+from app.utils.hashtag import TREND_BUCKET, trend_bucket, trend_bucket_sql
+
+
+class TestRepairLikeCnt:
+    @pytest_asyncio.fixture(scope="class", autouse=True)
+    async def _init_env(self, app_settings: AppSettings) -> None:
+        async with with_app_ctx(app_settings):
+            await ensure_fresh_env()
+
+    @pytest.mark.asyncio
+    async def test_repair_like_cnt(self, app_settings: AppSettings):
+        async with with_app_ctx(app_settings):
+            session = Context.current.db.session
+            user = m.User(email="repair@example.com", password="-")
+            board = m.Board(title="repair", written_user=user)
+            liked_post = m.Post(title="liked", board=board, written_user=user)
+            # 어긋난 값
+            drifted_post = m.Post(
+                title="drifted", board=board, written_user=user, like_cnt=3
+            )
+            session.add_all([liked_post, drifted_post])
+            await session.flush()
+            session.add(m.Like(post_id=liked_post.id, user_id=user.id))
+            await session.commit()
+
+            assert await repair_like_cnt() == 2
+            assert await repair_like_cnt() == 0
+
+            like_cnts = dict(
+                (await session.execute(sql_exp.select(m.Post.title, m.Post.like_cnt))).all()
+            )
+            assert like_cnts == {"liked": 1, "drifted": 0}
+
+    @pytest.mark.asyncio
+    async def test_repair_post_score(self, app_settings: AppSettings):
+        async with with_app_ctx(app_settings):
+            session = Context.current.db.session
+            # 앞 테스트의 post 들은 post_score 없이 만들어졌다
+            assert await repair_post_score() == 2
+            assert await repair_post_score() == 0
+
+            scores = dict(
+                (
+                    await session.execute(
+                        sql_exp.select(m.Post.title, m.PostScore.popularity).join(
+                            m.Post.score
+                        )
+                    )
+                ).all()
+            )
+            assert scores == {"liked": 1, "drifted": 0}
+
+    @pytest.mark.asyncio
+    async def test_repair_hashtag_trend(self, app_settings: AppSettings):
+        async with with_app_ctx(app_settings):
+            session = Context.current.db.session
+            post_id = await session.scalar(
+                sql_exp.select(m.Post.id).where(m.Post.title == "liked")
+            )
+            session.add_all([m.Hashtag(name="linked"), m.Hashtag(name="stale")])
+            await session.flush()
+            # rollup 을 거치지 않은 link 와, link 가 없는 bucket
+            session.add(m.PostHashTag(post_id=post_id, hashtag_name="linked"))
+            now = datetime.datetime.now(datetime.timezone.utc)
+            session.add(
+                m.HashtagTrend(
+                    hashtag_name="stale",
+                    bucket=trend_bucket(now) - TREND_BUCKET,
+                    post_cnt=1,
+                )
+            )
+            # 보관 기간보다 오래된 link 는 (prune 된) bucket 을 되살리지 않는다
+            session.add(
+                m.PostHashTag(
+                    post_id=post_id,
+                    hashtag_name="stale",
+                    created_at=now - HASHTAG_TREND_RETENTION - TREND_BUCKET,
+                )
+            )
+            await session.commit()
+
+            assert await repair_hashtag_trend() == 2
+            assert await repair_hashtag_trend() == 0
+
+            trend = (
+                await session.execute(
+                    sql_exp.select(m.HashtagTrend.hashtag_name, m.HashtagTrend.post_cnt)
+                )
+            ).all()
+            assert trend == [("linked", 1)]
+
+    @pytest.mark.asyncio
+    async def test_trend_bucket_sql_is_utc(self, app_settings: AppSettings):
+        moment = datetime.datetime(2023, 1, 1, 10, 40, tzinfo=datetime.timezone.utc)
+        async with with_app_ctx(app_settings):
+            session = Context.current.db.session
+            # 30 분 단위 offset 이면 session TimeZone 기준 date_trunc 는 정시가 아니다
+            await session.execute(sql_text("SET LOCAL TIME ZONE 'Asia/Kolkata'"))
+            bucket = await session.scalar(
+                sql_exp.select(trend_bucket_sql(sql_exp.literal(moment)))
+            )
+            await session.rollback()
+
+        assert bucket == trend_bucket(moment)
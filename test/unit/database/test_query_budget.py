@@ -0,0 +1,38 @@
+from test.helper import with_app_ctx
+
+import pytest
+from sqlalchemy.sql import expression as sql_exp
+
+from app.database.query_budget import QueryBudgetExceeded, query_budget
+from app.settings import AppSettings
+from app.utils.ctx import Context
+
+
+class TestQueryBudget:
+    @pytest.mark.asyncio
+    async def test_within_budget(self, app_settings: AppSettings):
+        async with with_app_ctx(app_settings):
+            async with query_budget(2) as recorder:
+                await Context.current.db.session.scalar(sql_exp.select(1))
+                await Context.current.db.session.scalar(sql_exp.select(2, 3))
+
+        assert len(recorder.statements) == 2
+
+    @pytest.mark.asyncio
+    async def test_exceed_budget(self, app_settings: AppSettings):
+        async with with_app_ctx(app_settings):
+            with pytest.raises(QueryBudgetExceeded, match="budget: 1"):
+                async with query_budget(1):
+                    await Context.current.db.session.scalar(sql_exp.select(1))
+                    await Context.current.db.session.scalar(sql_exp.select(2, 3))
+
+    @pytest.mark.asyncio
+    async def test_detect_repeated_statement(self, app_settings: AppSettings):
+        async with with_app_ctx(app_settings):
+            with pytest.raises(QueryBudgetExceeded, match="N\\+1"):
+                async with query_budget(10):
+                    # 파라미터만 다른 같은 statement
+                    for i in range(3):
+                        await Context.current.db.session.scalar(
+                            sql_exp.select(sql_exp.literal(i))
+                        )
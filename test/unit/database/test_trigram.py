@@ -0,0 +1,107 @@
+from test.helper import ensure_fresh_env, index_names, with_app_ctx
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text as sql_text
+from sqlalchemy.sql import expression as sql_exp
+
+from app.database import models as m
+from app.database.explain import Explain
+from app.settings import AppSettings
+from app.utils.ctx import Context
+
+SEED_CNT = 500
+
+
+class TestTrigramIndex:
+    @pytest_asyncio.fixture(scope="class", autouse=True)
+    async def _init_env(self, app_settings: AppSettings) -> None:
+        async with with_app_ctx(app_settings):
+            await ensure_fresh_env()
+
+            session = Context.current.db.session
+            await session.execute(
+                sql_exp.insert(m.User),
+                [
+                    {"email": f"user{i}@example.com", "password": "password"}
+                    for i in range(SEED_CNT)
+                ],
+            )
+            user_id = await session.scalar(sql_exp.select(sql_exp.func.min(m.User.id)))
+            await session.execute(
+                sql_exp.insert(m.Board),
+                [
+                    {"title": f"board title {i}", "written_user_id": user_id}
+                    for i in range(SEED_CNT)
+                ],
+            )
+            board_id = await session.scalar(sql_exp.select(sql_exp.func.min(m.Board.id)))
+            await session.execute(
+                sql_exp.insert(m.Post),
+                [
+                    {
+                        "title": f"post title {i}",
+                        "written_user_id": user_id,
+                        "board_id": board_id,
+                    }
+                    for i in range(SEED_CNT)
+                ],
+            )
+            post_id = await session.scalar(sql_exp.select(sql_exp.func.min(m.Post.id)))
+            await session.execute(
+                sql_exp.insert(m.Comment),
+                [
+                    {
+                        "content": f"comment content {i}",
+                        "written_user_id": user_id,
+                        "post_id": post_id,
+                        "path": f"{i:08x}",  # 최상위 댓글 (id 와는 무관해도 됨)
+                    }
+                    for i in range(SEED_CNT)
+                ],
+            )
+            await session.execute(
+                sql_exp.insert(m.Hashtag),
+                [{"name": f"tag{i}"} for i in range(SEED_CNT)],
+            )
+            await session.commit()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "column, pattern, index_name",
+        [
+            (m.Board.title, "%title 42%", "ix_board_title_trgm"),
+            (m.Post.title, "%TITLE 42%", "ix_post_title_trgm"),
+            (m.User.email, "%user42@%", "ix_user_email_trgm"),
+            (m.Comment.content, "%content 42%", "ix_comment_content_trgm"),
+            (m.Hashtag.name, "%ag42%", "ix_hashtag_name_trgm"),
+        ],
+    )
+    async def test_ilike_uses_trigram_index(
+        self,
+        app_settings: AppSettings,
+        column,
+        pattern: str,
+        index_name: str,
+    ):
+        async with with_app_ctx(app_settings):
+            session = Context.current.db.session
+            if not await session.scalar(
+                sql_text(
+                    "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+                )
+            ):
+                pytest.skip("pg_trgm is not installed on this server")
+
+            preparer = Context.current.db.engine.dialect.identifier_preparer
+            await session.execute(
+                sql_text(f"ANALYZE {preparer.format_table(column.class_.__table__)}")
+            )
+            # 작은 테이블에서는 seq scan 이 더 싸므로, index 를 쓸 수 있는지만 본다
+            await session.execute(sql_text("SET LOCAL enable_seqscan = off"))
+            # handler 와 같은 필터 (앞에 wildcard 가 있는 ILIKE)
+            plan = await session.scalar(
+                Explain(sql_exp.select(column.class_).where(column.ilike(pattern)))
+            )
+
+            assert index_name in index_names(plan[0]["Plan"])
@@ -0,0 +1,152 @@
+import fakeredis
+import fakeredis.aioredis
+import pytest
+import pytest_asyncio
+
+from app.utils.cache import LRUCache, MemoryCacheBackend, RedisCacheBackend, get_cached
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestLRUCache:
+    def test_hit_and_miss(self):
+        cache = LRUCache(max_bytes=1024, ttl=60)
+        cache.set("post:1", b'{"id":1}')
+
+        assert cache.get("post:1") == b'{"id":1}'
+        assert cache.get("post:2") is None
+        assert (cache.stats().hits, cache.stats().misses) == (1, 1)
+
+    def test_evict_least_recently_used(self):
+        entry_size = LRUCache._entry_size("post:1", b"x" * 100)
+        cache = LRUCache(max_bytes=entry_size * 2, ttl=60)
+        cache.set("post:1", b"x" * 100)
+        cache.set("post:2", b"x" * 100)
+        cache.get("post:1")  # post:2 가 가장 오래 안 쓴 것이 됨
+        cache.set("post:3", b"x" * 100)
+
+        assert cache.get("post:2") is None
+        assert cache.get("post:1") is not None
+        assert cache.stats().evictions == 1
+        assert cache.stats().size_bytes <= cache.max_bytes
+
+    def test_ttl(self):
+        clock = FakeClock()
+        cache = LRUCache(max_bytes=1024, ttl=10, clock=clock)
+        cache.set("board:1", b"{}")
+
+        clock.now = 9.9
+        assert cache.get("board:1") == b"{}"
+        clock.now = 10
+        assert cache.get("board:1") is None
+        assert cache.stats().entries == 0
+        assert cache.stats().size_bytes == 0
+
+    def test_delete_prefix(self):
+        cache = LRUCache(max_bytes=1024, ttl=60)
+        cache.set("comment:1:1", b"{}")
+        cache.set("comment:1:2", b"{}")
+        cache.set("comment:10:1", b"{}")
+
+        cache.delete_prefix("comment:1:")
+
+        assert cache.stats().entries == 1
+        assert cache.get("comment:10:1") == b"{}"
+
+    def test_too_large_value_is_not_stored(self):
+        cache = LRUCache(max_bytes=64, ttl=60)
+        cache.set("post:1", b"x" * 100)
+
+        assert cache.get("post:1") is None
+        assert cache.stats().size_bytes == 0
+
+
+@pytest_asyncio.fixture(params=["memory", "redis"])
+async def backend(request):
+    if request.param == "memory":
+        yield MemoryCacheBackend(LRUCache(max_bytes=1024, ttl=60))
+    else:
+        backend = RedisCacheBackend(
+            fakeredis.aioredis.FakeRedis(), ttl=60, key_prefix="test:"
+        )
+        yield backend
+        await backend.close()
+
+
+class TestCacheBackend:
+    @pytest.mark.asyncio
+    async def test_get_many(self, backend):
+        await backend.set_many({"post:1": b"1", "post:2": b"2"})
+
+        assert await backend.get_many(["post:2", "post:3", "post:1"]) == [b"2", None, b"1"]
+        assert (await backend.stats()).hits == 2
+        assert (await backend.stats()).misses == 1
+
+    @pytest.mark.asyncio
+    async def test_delete(self, backend):
+        await backend.set_many({"post:1": b"1", "post:2": b"2", "board:1": b"3"})
+
+        await backend.delete("post:1", "board:1")
+
+        assert await backend.get_many(["post:1", "post:2", "board:1"]) == [None, b"2", None]
+
+    @pytest.mark.asyncio
+    async def test_delete_prefix(self, backend):
+        await backend.set_many(
+            {"comment:1:1": b"{}", "comment:1:2": b"{}", "comment:10:1": b"{}"}
+        )
+
+        await backend.delete_prefix("comment:1:")
+
+        assert await backend.get_many(
+            ["comment:1:1", "comment:1:2", "comment:10:1"]
+        ) == [None, None, b"{}"]
+
+    @pytest.mark.asyncio
+    async def test_get_cached(self, backend):
+        await backend.set("post:1", b'"etag"\n{"id":1}')
+
+        assert await get_cached(backend, "post:1") == ('"etag"', b'{"id":1}')
+        assert await get_cached(backend, "post:2") is None
+
+
+class TestRedisCacheBackend:
+    @pytest.mark.asyncio
+    async def test_shared_between_workers(self):
+        server = fakeredis.FakeServer()
+        worker1 = RedisCacheBackend(fakeredis.aioredis.FakeRedis(server=server), ttl=60)
+        worker2 = RedisCacheBackend(fakeredis.aioredis.FakeRedis(server=server), ttl=60)
+
+        await worker1.set("post:1", b"{}")
+        assert await worker2.get("post:1") == b"{}"
+
+        await worker2.delete("post:1")  # 다른 worker 의 무효화가 바로 보인다
+        assert await worker1.get("post:1") is None
+
+    @pytest.mark.asyncio
+    async def test_ttl(self):
+        client = fakeredis.aioredis.FakeRedis()
+        backend = RedisCacheBackend(client, ttl=60, key_prefix="test:")
+
+        await backend.set("post:1", b"{}")
+        await backend.set("post:2", b"{}", ttl=0.5)
+
+        assert 59_000 < await client.pttl("test:post:1") <= 60_000
+        assert 0 < await client.pttl("test:post:2") <= 500
+
+    @pytest.mark.asyncio
+    async def test_connection_error_is_a_miss(self):
+        backend = RedisCacheBackend(
+            fakeredis.aioredis.FakeRedis(connected=False), ttl=60
+        )
+
+        await backend.set("post:1", b"{}")
+        await backend.delete_prefix("post:")
+
+        assert await backend.get("post:1") is None
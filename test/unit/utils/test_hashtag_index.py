@@ -0,0 +1,55 @@
+import heapq
+import random
+
+import pytest
+
+from app.utils import hashtag_index
+from app.utils.hashtag_index import HashtagIndex
+
+
+class FakeHashtagIndex(HashtagIndex):
+    def __init__(self, usage: dict[str, int]) -> None:
+        super().__init__(ttl=60)
+        self.initial_usage = usage
+
+    async def _load(self) -> None:  # DB 대신
+        self._keys = sorted((name.casefold(), name) for name in self.initial_usage)
+        self._usage = dict(self.initial_usage)
+        self._memo = {}
+        self._loaded_at = self._clock()
+
+
+def _expected(
+    usage: dict[str, int], prefix: str, limit: int
+) -> list[tuple[str, int]]:
+    return heapq.nsmallest(
+        limit,
+        [(name, cnt) for name, cnt in usage.items() if name.casefold().startswith(prefix)],
+        key=lambda item: (-item[1], item[0]),
+    )
+
+
+class TestHashtagIndex:
+    @pytest.mark.asyncio
+    async def test_memo_follows_usage(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(hashtag_index, "_MEMO_RANGE_SIZE", 0)  # 항상 기억
+        rng = random.Random(0)
+        names = [f"{rng.choice('abc')}{rng.choice('abc')}{i}" for i in range(200)]
+        index = FakeHashtagIndex({name: rng.randint(0, 5) for name in names})
+
+        for _ in range(300):
+            for prefix in ("a", "ab", "c"):
+                # 기억해 둔 결과는 하나이고 count 마다 잘라서 쓴다
+                for limit in (1, 5):
+                    assert await index.suggest(prefix, limit) == _expected(
+                        index._usage, prefix, limit
+                    )
+            name = rng.choice(names + ["aa-new", "Ab-new"])
+            index.update_usage({name: rng.choice([1, 2, -1, -3])})
+
+        # prefix 하나당 상위 MAX_SUGGESTIONS 개 목록 하나
+        assert all(
+            isinstance(suggestions, list)
+            and len(suggestions) <= hashtag_index.MAX_SUGGESTIONS
+            for suggestions in index._memo.values()
+        )
@@ -0,0 +1,34 @@
+from test.helper import with_app_ctx
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.sql import expression as sql_exp
+
+from app.database import models as m
+from app.settings import AppSettings
+from app.utils.pagination import decode_cursor, encode_cursor, estimate_rows
+
+
+class TestPagination:
+    def test_cursor_round_trip(self):
+        cursor = encode_cursor(["created_at", "asc", "2023-01-01T00:00:00+00:00", 1])
+
+        assert decode_cursor(cursor) == ["created_at", "asc", "2023-01-01T00:00:00+00:00", 1]
+
+    def test_invalid_cursor(self):
+        with pytest.raises(HTTPException):
+            decode_cursor("not-a-cursor")
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "query",
+        [
+            # 조건 없는 단일 테이블: pg_class.reltuples (예약어 테이블 이름 포함)
+            sql_exp.select(m.User),
+            # 그 외: EXPLAIN 의 Plan Rows
+            sql_exp.select(m.Post).where(m.Post.title.ilike("%")),
+        ],
+    )
+    async def test_estimate_rows(self, app_settings: AppSettings, query):
+        async with with_app_ctx(app_settings):
+            assert await estimate_rows(query) >= 0